@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+PyOOCalc - Python Libre/Open Office Calc interface API (UNO)
+
+Open profiles benchmark.
+
+Opens and closes the documents with every open profile and prints the mean
+open time, the close time is not counted. Each document is opened once
+before to warm up the office. Start Libre/Open Office in listening mode
+first:
+
+soffice --headless --accept="socket,host=localhost,port=2002;urp;"
+
+Usage:
+
+python3 benchmark_open.py [-n REPEAT] [file.ods ...]
+
+Copyright (c) 2015
+
+@author: Yurii Puchkov
+@organization: http://arilot.com/
+@license: GPL v3
+@contact: panpuchkov@gmail.com
+"""
+
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append('./../')
+import pyoocalc
+
+PROFILES = ("default", "hidden", "read_only", "no_macros", "no_link_update",
+            "preview", "ingest")
+
+
+def benchmark(doc, file_name, profile, repeat):
+    """
+    Get mean open time of the file with the profile in seconds.
+    """
+    elapsed = 0.0
+    for i in range(repeat):
+        start = time.time()
+        doc.open_document(file_name, profile)
+        elapsed += time.time() - start
+        doc.close_document()
+    return elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open profiles benchmark")
+    parser.add_argument("files", nargs="*",
+                        default=[os.getcwd() + "/example.ods"],
+                        help="documents to open")
+    parser.add_argument("-n", "--repeat", type=int, default=10,
+                        help="number of opens per profile")
+    args = parser.parse_args()
+
+    doc = pyoocalc.Document()
+    print("{0:40} {1:>15} {2:>10}".format("file", "profile", "open, ms"))
+    for file_name in args.files:
+        file_name = os.path.abspath(file_name)
+        # warm up the office
+        benchmark(doc, file_name, "hidden", 1)
+        for profile in PROFILES:
+            print("{0:40} {1:>15} {2:>10.1f}".format(
+                os.path.basename(file_name)[-40:], profile,
+                benchmark(doc, file_name, profile, args.repeat) * 1000))
+
+
+if __name__ == "__main__":
+    main()
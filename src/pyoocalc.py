@@ -24,9 +24,27 @@ Copyright (c) 2015
 import uno
 import unohelper
 
+import argparse
+import csv
+import functools
+import json
 import os
+import queue
+import re
+import shlex
+import shutil
+import signal
 import subprocess
+import sys
+import tempfile
+import threading
 import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, \
+    wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
 
 # Exceptions
 from com.sun.star.uno import RuntimeException
@@ -41,398 +59,3711 @@ from com.sun.star.beans import PropertyValue
 # Office eNums
 from com.sun.star.table.CellContentType import TEXT, EMPTY, VALUE, FORMULA
 
+# Office constants
+from com.sun.star.sheet.CellFlags import VALUE as CELL_VALUE, \
+    DATETIME as CELL_DATETIME, STRING as CELL_STRING, \
+    FORMULA as CELL_FORMULA
+
 
 ###############################################################################
 __version__ = "0.0.5"
 _MSG_EXCEPT_SIDE_EFFECT = "Assigning a value to the '{0}' is not allowed."
 
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Office call did not finish within its deadline (see Document.deadlines).
+    The connection of the call is quarantined.
+    """
+
+
+_RECOVERABLE_EXCEPTIONS = (RuntimeException, NoConnectException,
+                           DeadlineExceeded)
+
+# Operations with deadlines, see Document.deadlines
+_DEADLINE_OPERATIONS = ("default", "open", "save", "close", "calculate",
+                        "cell", "range", "rows", "job", "wait")
+
+_RE_CELL_NAME = re.compile(r"^\$?([A-Za-z]{1,3})\$?([0-9]+)$")
+
+_DEFAULT_CONNECTION_STRING = \
+    "uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext"
+
+# Load properties of the open profiles, see Document.open_document(). There
+# is no profile loading only some sheets: the Calc import filters have no
+# load property for it
+_OPEN_PROFILES = {
+    "default": {},
+    "hidden": {"Hidden": True},
+    "read_only": {"ReadOnly": True},
+    # com.sun.star.document.MacroExecMode.NEVER_EXECUTE
+    "no_macros": {"MacroExecutionMode": 0},
+    # com.sun.star.document.UpdateDocMode.NO_UPDATE
+    "no_link_update": {"UpdateDocMode": 0},
+    "preview": {"Preview": True, "ReadOnly": True},
+    "ingest": {"Hidden": True, "ReadOnly": True, "MacroExecutionMode": 0,
+               "UpdateDocMode": 0},
+}
+
+# com.sun.star.sheet.GeneralFunction names of Sheet.aggregate() functions
+_AGGREGATE_FUNCTIONS = {
+    "sum": "SUM",
+    "count": "COUNT",
+    "count_nums": "COUNTNUMS",
+    "average": "AVERAGE",
+    "max": "MAX",
+    "min": "MIN",
+    "product": "PRODUCT",
+    "stdev": "STDEV",
+    "stdevp": "STDEVP",
+    "var": "VAR",
+    "varp": "VARP",
+}
+
+# com.sun.star.sheet.FilterOperator names of Sheet.filter_range() operators
+_FILTER_OPERATORS = {
+    "=": "EQUAL",
+    "!=": "NOT_EQUAL",
+    ">": "GREATER",
+    ">=": "GREATER_EQUAL",
+    "<": "LESS",
+    "<=": "LESS_EQUAL",
+    "empty": "EMPTY",
+    "not_empty": "NOT_EMPTY",
+}
+
+# Text import filter: character sets and column formats
+_CSV_FILTER = "Text - txt - csv (StarCalc)"
+_CSV_CHARSETS = {
+    "utf-8": 76,
+    "utf8": 76,
+    "utf-16": 65535,
+    "ascii": 11,
+    "latin-1": 12,
+    "latin1": 12,
+    "iso-8859-1": 12,
+    "cp1252": 1,
+    "windows-1252": 1,
+}
+_CSV_COLUMN_TYPES = {
+    "standard": 1,
+    "text": 2,
+    "mdy": 3,
+    "dmy": 4,
+    "ymd": 5,
+    "skip": 9,
+    "us": 10,
+}
+
+# File name extensions of the export filters
+_FILTER_EXTENSIONS = {
+    "": "ods",
+    "calc8": "ods",
+    "calc_pdf_Export": "pdf",
+    "Text - txt - csv (StarCalc)": "csv",
+    "calc_MS_Excel_40": "xls",
+    "MS Excel 97": "xls",
+    "Calc Office Open XML": "xlsx",
+    "Calc MS Excel 2007 XML": "xlsx",
+}
+
 ###############################################################################
 ###############################################################################
 ###############################################################################
 
 
-class Field:
+@lru_cache(maxsize=4096)
+def _parse_cell_name(name):
     """
-    Document field.
+    Parse the cell name ("E5", "$E$5").
 
-    Operations on the existing field.
+    @rtype:   tuple
+    @return:  (column index, row index)
     """
+    match = _RE_CELL_NAME.match(name.strip())
+    if match is None or int(match.group(2)) < 1:
+        raise ValueError("Wrong cell name '{0}'".format(name))
+    col = 0
+    for letter in match.group(1).upper():
+        col = col * 26 + ord(letter) - ord("A") + 1
+    return col - 1, int(match.group(2)) - 1
 
-    def __init__(self, fields, name):
-        """
-        Constructor
 
-        @type  fields: Fields
-        @param fields: Fields object
+def _column_name(col):
+    """
+    Get the column name by the column index (0 -> "A").
+    """
+    name = ""
+    col += 1
+    while col:
+        col, letter = divmod(col - 1, 26)
+        name = chr(ord("A") + letter) + name
+    return name
 
-        @type  name: string
-        @param name: Field name
-        """
-        self._fields = fields
-        self._is_null = True
 
-        # LibreOffice variables.
-        self._oSheet = None
-        self._oNamedRanges = None
-        self._oRange = None
-        self._oCell = None
-        self._oCellAddress = None
+@lru_cache(maxsize=4096)
+def _parse_range_name(name):
+    """
+    Parse the cell range name ("A1:H200") or the cell name ("E5").
 
-        if self._fields:
-            if 0 == len(name):
-                raise ValueError("'name' is an empty string")
-            if self._fields._oNamedRanges.hasByName(name):
-                self._oRange = self._fields._oNamedRanges.getByName(name)
-                self._oCellAddress = self._oRange.getReferencePosition()
-                oSheets = self._fields.document.o_doc.getSheets()
-                self._oSheet = oSheets.getByIndex(self._oCellAddress.Sheet)
-                self._is_null = False
+    @rtype:   tuple
+    @return:  (start column, start row, end column, end row)
+    """
+    start, _, end = name.partition(":")
+    start_col, start_row = _parse_cell_name(start)
+    if end:
+        end_col, end_row = _parse_cell_name(end)
+    else:
+        end_col, end_row = start_col, start_row
+    return (min(start_col, end_col), min(start_row, end_row),
+            max(start_col, end_col), max(start_row, end_row))
+
+
+def _cover_cells(cells):
+    """
+    Cover the cells with rectangles.
+
+    Cells of a row are joined into runs of adjacent columns, runs with the
+    same columns in adjacent rows are joined into rectangles.
+
+    @type  cells: iterable
+    @param cells: (column, row) tuples
+
+    @rtype:   list
+    @return:  (start column, start row, end column, end row) tuples
+    """
+    rows = {}
+    for col, row in set(cells):
+        rows.setdefault(row, []).append(col)
+    result = []
+    open_rects = {}
+    for row in sorted(rows):
+        runs = []
+        for col in sorted(rows[row]):
+            if runs and runs[-1][1] == col - 1:
+                runs[-1][1] = col
             else:
-                self._oRange = None
-                self._is_null = True
-        else:
-            raise ValueError("'fields' value is None")
+                runs.append([col, col])
+        next_rects = {}
+        for start_col, end_col in runs:
+            rect = open_rects.pop((start_col, end_col), None)
+            if rect is not None and rect[3] == row - 1:
+                rect[3] = row
+            else:
+                if rect is not None:
+                    # The run came back after a gap of rows
+                    result.append(rect)
+                rect = [start_col, row, end_col, row]
+            next_rects[(start_col, end_col)] = rect
+        result.extend(open_rects.values())
+        open_rects = next_rects
+    result.extend(open_rects.values())
+    return [tuple(rect) for rect in result]
+
+
+def _read_cells(oSheet, cells):
+    """
+    Read values of many cells of the sheet by rectangles.
 
-    @property
-    def is_null(self):
-        """
-        Checking if the field is null.
+    A dense cell set is read by the bounding rectangle in one call, a sparse
+    one by the rectangles covering the cells (see RangeRef.cover()).
 
-        @rtype:   bool
-        @return:  Value insertion result
-        """
-        return self._is_null
+    @type  oSheet: com::sun::star::sheet::XSpreadsheet
+    @param oSheet: Libre/Open office Spreadsheet object
 
-    @is_null.setter
-    def is_null(self, value):
-        """
-        Side-effect protection. Raising an exception 'ValueError'.
-        """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+    @type  cells: list
+    @param cells: (column, row) tuples
 
-    def set_value(self, value, column=0, row=0):
-        """
-        Set filed value at position Column/Row
+    @rtype:   dict
+    @return:  Values by (column, row) as getDataArray() returns them
+    """
+    values = {}
+    bounds = RangeRef.bounds(cells)
+    if bounds is None:
+        return values
+    if len(bounds) <= 4 * len(cells):
+        # Dense cell set, read the bounding rectangle
+        rects = [bounds]
+    else:
+        rects = RangeRef.cover(cells)
+    for start_col, start_row, end_col, end_row in rects:
+        data = oSheet.getCellRangeByPosition(
+            start_col, start_row, end_col, end_row).getDataArray()
+        for row, row_data in enumerate(data, start_row):
+            for col, value in enumerate(row_data, start_col):
+                values[(col, row)] = value
+    return values
+
+
+def _open_properties(profile):
+    """
+    Get load properties of the open profile.
 
-        @type  value: string
-        @param value: Cell value
+    @type  profile: string or list
+    @param profile: Profile name or names, see Document.open_document()
 
-        @type  column: int
-        @param column: column index
+    @rtype:   dict
+    @return:  Load properties
+    """
+    if profile is None:
+        profile = ()
+    elif isinstance(profile, str):
+        profile = (profile,)
+    properties = {}
+    for name in profile:
+        if name not in _OPEN_PROFILES:
+            raise ValueError("Unknown open profile '{0}'".format(name))
+        properties.update(_OPEN_PROFILES[name])
+    return properties
+
+
+def _data_value(value):
+    """
+    Convert the value as getDataArray() returns it: numbers are floats,
+    None is an empty string, other values are strings.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return str(value)
 
-        @type  row: int
-        @param row: row index
+
+def _deadline(operation):
+    """
+    Decorator. Runs the method of Document, Sheets, Sheet, Fields, Field or
+    Session within the deadline of the operation, see Document.deadlines.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def _f(self, *args, **kwargs):
+            if isinstance(self, Field):
+                doc = self._fields._document
+            elif isinstance(self, Sheet):
+                doc = self._sheets._document
+            elif isinstance(self, Document):
+                doc = self
+            elif isinstance(self, Session):
+                doc = self._connection
+            else:
+                doc = self._document
+            return doc._call(operation, method, self, *args, **kwargs)
+        return _f
+    return decorator
+
+
+class _Dispatcher:
+    """
+    Office calls of a connection.
+
+    Calls of all documents sharing the connection are serialized by the
+    connection lock, so documents and connections can be shared between
+    threads. Nested calls (an operation calling other operations) run
+    under the lock of the outer call.
+
+    Bridge calls have no timeout, so calls with a deadline are run on the
+    worker thread of the connection and the caller stops waiting when the
+    deadline is exceeded. The deadline starts when the call holds the
+    connection lock, waiting for the calls of other threads has its own
+    deadline. A nested call is bound by the tighter of its own deadline and
+    the rest of the outer one: it runs inline when the outer deadline is
+    the tighter one, else on a helper thread while the outer call waits.
+    The connection is quarantined when a deadline is exceeded: the call is
+    probably stuck in the office, the worker exits as soon as it is
+    released, queued calls and every following call fail at once.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._lock = threading.Lock()
+        self._call_lock = threading.RLock()
+        self._local = threading.local()
+        self._queue = None
+        self._thread = None
+        self._quarantined = False
+
+    @property
+    def quarantined(self):
+        """
+        Checking if the connection is quarantined.
 
         @rtype:   bool
-        @return:  Value insertion result
+        @return:  Connection state
         """
-        result = True
-        if self._oRange:
-            self._oCell = self._oSheet.getCellByPosition(
-                self._oCellAddress.Column + column,
-                self._oCellAddress.Row + row)
-            if self._oCell:
-                self._oCell.setString(value)
-        else:
-            result = False
-        return result
+        return self._quarantined
 
-    def value(self, column=0, row=0):
+    def _run(self, function, args, kwargs, deadline):
         """
-        Get filed value at position Column/Row
+        Run the function as a call holding the connection lock.
 
-        @type  column: int
-        @param column: column index
+        @type  deadline: float
+        @param deadline: Time the call must end by, None - no deadline
+        """
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        outer = getattr(local, "deadline", None)
+        local.depth, local.deadline = depth + 1, deadline
+        try:
+            return function(*args, **kwargs)
+        finally:
+            local.depth, local.deadline = depth, outer
 
-        @type  row: int
-        @param row: row index
+    def _exceeded(self, function, timeout):
+        """
+        Quarantine the connection and get the exception of the call
+        exceeding its deadline.
 
-        @rtype:   string
-        @return: Document cell value in string format. Regardless of document\
-                cell type.
+        @rtype:   DeadlineExceeded
+        @return:  Exception to raise
         """
-        value = ""
-        if self._oRange:
-            self._oCell = self._oSheet.getCellByPosition(
-                self._oCellAddress.Column + column,
-                self._oCellAddress.Row + row)
-            if self._oCell:
-                value = self._oCell.getString()
-        return value
+        with self._lock:
+            self._quarantine()
+        return DeadlineExceeded(
+            "'{0}' exceeded the deadline of {1} s".format(
+                getattr(function, "__name__", function), timeout))
 
-    def insert_rows(self, num_rows=1, step=1, columns_to_copy=250):
+    def _call_nested(self, timeout, function, args, kwargs):
         """
-        Insert rows
+        Call the function from a call holding the connection lock.
+        """
+        outer = self._local.deadline
+        if timeout is None or \
+                (outer is not None and outer <= time.time() + timeout):
+            # The outer deadline is the tighter one, its caller waits for it
+            return self._run(function, args, kwargs, outer)
+        deadline = time.time() + timeout
+        future = Future()
+
+        def helper():
+            # The lock stays with the outer call waiting for the helper
+            try:
+                future.set_result(
+                    self._run(function, args, kwargs, deadline))
+            except BaseException as e:
+                future.set_exception(e)
 
-        Insert new rows at the specified position relatively to cell.
-        After the new row insertion the content of the current rows is copied
-        to the new rows.
+        threading.Thread(target=helper, name="pyoocalc-nested",
+                         daemon=True).start()
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise self._exceeded(function, timeout)
 
-        @type  num_rows: int
-        @param num_rows: Number of rows to insert. Default value=1
+    def _worker(self, calls):
+        """
+        Run queued calls until the None item.
 
-        @type  step: int
-        @param step: Step of rows insertion.
+        @type  calls: queue.Queue
+        @param calls: Calls of the worker
+        """
+        while True:
+            item = calls.get()
+            if item is None:
+                break
+            started, future, timeout, function, args, kwargs = item
+            with self._call_lock:
+                # Skip calls the caller does not wait for any more
+                if not started.set_running_or_notify_cancel():
+                    continue
+                if self._quarantined:
+                    started.set_exception(DeadlineExceeded(
+                        "The office connection is quarantined"))
+                    continue
+                # The deadline of the caller starts now
+                deadline = time.time() + timeout
+                started.set_result(True)
+                try:
+                    future.set_result(
+                        self._run(function, args, kwargs, deadline))
+                except BaseException as e:
+                    future.set_exception(e)
 
-        @type  columns_to_copy: bool
-        @param columns_to_copy: Number of a columns to copy on insert.
-                            No copy will be performed if columns_to_copy = 0
+    def _stop_worker(self):
+        """
+        Let the worker thread exit after the queued calls.
 
-        @rtype:   bool
-        @return:  Operation result
+        Called with the lock held.
         """
-        result = False
-        if num_rows <= 0:
-            raise ValueError("'num_rows' must be a positive number")
-        if columns_to_copy <= 0:
-            raise ValueError("'columns_to_copy' must be a positive number")
-        if 0 == step:
-            raise ValueError("'step' must not be equal to Zero")
+        if self._thread is not None:
+            self._queue.put(None)
+            self._queue = None
+            self._thread = None
 
-        if self._fields and self._oSheet:
-            insert_pos_with_step = self._oCellAddress.Row + 1 + step
-            self._oSheet.Rows.insertByIndex(
-                insert_pos_with_step, (num_rows * step))
+    def _quarantine(self):
+        """
+        Quarantine the connection, fail the queued calls and stop the
+        worker thread.
 
-            # Copy rows
-            # Initialize variable as CellRangeAddress object
-            oCellRangeAddress_Src = CellRangeAddress()
+        Called with the lock held.
+        """
+        self._quarantined = True
+        if self._thread is not None:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and \
+                        item[0].set_running_or_notify_cancel():
+                    item[0].set_exception(DeadlineExceeded(
+                        "The office connection is quarantined"))
+        self._stop_worker()
 
-            # Source address
-            oCellRangeAddress_Src.Sheet = self._oCellAddress.Sheet
-            oCellRangeAddress_Src.StartColumn = 0
-            oCellRangeAddress_Src.EndColumn = columns_to_copy
-            oCellRangeAddress_Src.StartRow = \
-                self._oCellAddress.Row + 1
-            oCellRangeAddress_Src.EndRow = \
-                oCellRangeAddress_Src.StartRow + step - 1
+    def close(self):
+        """
+        Stop the worker thread. It is started again by the next call with
+        a deadline.
+        """
+        with self._lock:
+            self._stop_worker()
 
-            # Destination address
-            oCellAddress_Dst = self._oCellAddress
-            oCellAddress_Dst.Column = 0
-            oCellAddress_Dst.Row = oCellAddress_Dst.Row + 1 + step
+    def call(self, timeout, wait_timeout, function, *args, **kwargs):
+        """
+        Call the function within the timeout.
 
-            for i in range(0, num_rows):
-                self._oSheet.copyRange(oCellAddress_Dst,
-                                       oCellRangeAddress_Src)
-                oCellAddress_Dst.Row += step
+        @type  timeout: float
+        @param timeout: Deadline in seconds. None - no deadline, the function
+                        is called in the current thread. The deadline does
+                        not include waiting for the calls of other threads.
 
-            # Restore cell address variable
-            self._oCellAddress = self._oRange.getReferencePosition()
+        @type  wait_timeout: float
+        @param wait_timeout: Deadline of waiting for the calls of other
+                             threads in seconds, None - no deadline. The
+                             connection is not quarantined when it is
+                             exceeded.
 
-            result = True
-        return result
+        @type  function: callable
+        @param function: Function calling the office
+
+        @rtype:   object
+        @return:  Function result
+        """
+        if self._quarantined:
+            raise DeadlineExceeded("The office connection is quarantined")
+        if getattr(self._local, "depth", 0):
+            return self._call_nested(timeout, function, args, kwargs)
+        busy = "'{0}' exceeded the deadline of {1} s waiting for the " \
+            "office connection"
+        if timeout is None:
+            if not self._call_lock.acquire(
+                    timeout=-1 if wait_timeout is None else wait_timeout):
+                raise DeadlineExceeded(busy.format(
+                    getattr(function, "__name__", function), wait_timeout))
+            try:
+                return self._run(function, args, kwargs, None)
+            finally:
+                self._call_lock.release()
+        started = Future()
+        future = Future()
+        with self._lock:
+            if self._quarantined:
+                raise DeadlineExceeded(
+                    "The office connection is quarantined")
+            if self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._worker, args=(self._queue,),
+                    name="pyoocalc-dispatcher", daemon=True)
+                self._thread.start()
+            self._queue.put((started, future, timeout, function, args,
+                             kwargs))
+        try:
+            # Wait for the calls of other threads
+            started.result(wait_timeout)
+        except FutureTimeoutError:
+            if started.cancel():
+                raise DeadlineExceeded(busy.format(
+                    getattr(function, "__name__", function), wait_timeout))
+            # Started meanwhile
+            started.result()
+        except BaseException:
+            started.cancel()
+            raise
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise self._exceeded(function, timeout)
 
 ###############################################################################
 ###############################################################################
 ###############################################################################
 
 
-class Fields:
+class CellRef:
     """
-    Document fields.
-    Search and manage fields (name ranges).
+    Cell position, immutable.
+
+    Compact hashable value for sets and dict keys of cells. Unpacks as a
+    (column, row) tuple, so it can be passed where a tuple is expected.
     """
 
-    def __init__(self, document):
+    __slots__ = ("_col", "_row")
+
+    def __init__(self, col, row):
         """
         Constructor
 
-        @type  document: Document
-        @param document: Document object
-        """
-        self._document = document
-        self._field = None
-        self._is_null = True
+        @type  col: int
+        @param col: Column index
 
-        # LibreOffice variables.
-        self._oNamedRanges = None
-        if self._document:
-            self._oNamedRanges = self._document.o_doc.NamedRanges
-            self._is_null = False
-        else:
-            raise ValueError("'document' value is None")
+        @type  row: int
+        @param row: Row index
+        """
+        if col < 0:
+            raise ValueError("'col' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        object.__setattr__(self, "_col", col)
+        object.__setattr__(self, "_row", row)
 
-    @property
-    def is_null(self):
+    @classmethod
+    def from_name(cls, name):
         """
-        Checking if the fields (NamedRanges) object is initialized
+        Get the cell position by the cell name.
 
-        @rtype:   bool
-        @return:  Fields object state
+        @type  name: string
+        @param name: Cell name ("E5")
+
+        @rtype:   CellRef
+        @return:  Cell position
         """
-        return self._is_null
+        return cls(*_parse_cell_name(name))
 
-    @is_null.setter
-    def is_null(self, value):
+    def __setattr__(self, name, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format(name))
+
+    def __iter__(self):
+        return iter((self._col, self._row))
+
+    def __eq__(self, other):
+        return isinstance(other, CellRef) and \
+            self._col == other._col and self._row == other._row
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._col, self._row))
+
+    def __repr__(self):
+        return "CellRef('{0}')".format(self.name)
 
     @property
-    def count(self):
+    def col(self):
         """
-        Get number of fields (named ranges) in the document.
+        Get column index.
 
         @rtype:   int
-        @return:  the number of fields in the document.
+        @return:  Column index
         """
-        count = 0
-        if self._oNamedRanges:
-            count = self._oNamedRanges.getCount()
-        return count
+        return self._col
 
-    @count.setter
-    def count(self, value):
+    @property
+    def row(self):
         """
-        Side-effect protection. Raising an exception 'ValueError'.
+        Get row index.
+
+        @rtype:   int
+        @return:  Row index
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+        return self._row
 
     @property
-    def document(self):
+    def name(self):
         """
-        Get document object.
+        Get cell name.
 
-        @rtype:   Template
-        @return:  Template object
+        @rtype:   string
+        @return:  Cell name ("E5")
         """
-        return self._document
+        return "{0}{1}".format(_column_name(self._col), self._row + 1)
 
-    @document.setter
-    def document(self, value):
-        """
-        Side-effect protection. Raising an exception 'ValueError'.
+    def offset(self, cols=0, rows=0):
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("document"))
+        Get the cell moved by the offset.
 
-    def field(self, name):
-        """
-        Get document field by name
+        @type  cols: int
+        @param cols: Column offset
 
-        @type  name: string
-        @param name: Field name
+        @type  rows: int
+        @param rows: Row offset
 
-        @rtype:   Field object
-        @return:  Field object
+        @rtype:   CellRef
+        @return:  Cell position
         """
-        self._field = Field(self, name)
-        if self._field.is_null is None:
-            self._field = None
-        return self._field
+        return CellRef(self._col + cols, self._row + rows)
 
-    def add(self, name, value, sheet, column, row):
+    def to_uno(self, sheet=0):
         """
-        Not implemented yet. FIXME
-        Adds a new field (named range) to the collection.
+        Get the office cell address.
 
-        @type  name: string
-        @param name: the new name of the named range.
+        @type  sheet: int
+        @param sheet: Sheet index
 
-        @type  value: string
-        @param value: the formula expression.
+        @rtype:   com::sun::star::table::CellAddress
+        @return:  Cell address
+        """
+        oCellAddress = uno.createUnoStruct("com.sun.star.table.CellAddress")
+        oCellAddress.Sheet = sheet
+        oCellAddress.Column = self._col
+        oCellAddress.Row = self._row
+        return oCellAddress
 
-        @type  sheet: int
-        @param sheet: the formula expression.
+###############################################################################
+###############################################################################
+###############################################################################
 
-        @type  column: int
-        @param column: the formula expression.
+
+class RangeRef:
+    """
+    Cell range position (rectangle), immutable.
+
+    Compact hashable value with the range algebra used to batch cell
+    operations: a set of cells is covered by a few rectangles and every
+    rectangle is read or written in one office call. Unpacks as a
+    (start column, start row, end column, end row) tuple.
+    """
+
+    __slots__ = ("_start_col", "_start_row", "_end_col", "_end_row")
+
+    def __init__(self, start_col, start_row, end_col=None, end_row=None):
+        """
+        Constructor
+
+        Corners are normalized, a range of one cell is created when the end
+        is omitted.
+
+        @type  start_col: int
+        @param start_col: Start column index
+
+        @type  start_row: int
+        @param start_row: Start row index
+
+        @type  end_col: int
+        @param end_col: End column index (inclusive)
+
+        @type  end_row: int
+        @param end_row: End row index (inclusive)
+        """
+        if end_col is None:
+            end_col = start_col
+        if end_row is None:
+            end_row = start_row
+        if min(start_col, end_col) < 0:
+            raise ValueError("Column index must be >= 0")
+        if min(start_row, end_row) < 0:
+            raise ValueError("Row index must be >= 0")
+        object.__setattr__(self, "_start_col", min(start_col, end_col))
+        object.__setattr__(self, "_start_row", min(start_row, end_row))
+        object.__setattr__(self, "_end_col", max(start_col, end_col))
+        object.__setattr__(self, "_end_row", max(start_row, end_row))
+
+    @classmethod
+    def from_name(cls, name):
+        """
+        Get the range position by the range name.
+
+        @type  name: string
+        @param name: Cell range name ("A1:H200") or cell name ("E5")
+
+        @rtype:   RangeRef
+        @return:  Range position
+        """
+        return cls(*_parse_range_name(name))
+
+    @classmethod
+    def bounds(cls, cells):
+        """
+        Get the smallest range containing all the cells.
+
+        @type  cells: list
+        @param cells: CellRef objects or (column, row) tuples
+
+        @rtype:   RangeRef
+        @return:  Range position, None if there are no cells
+        """
+        cells = [tuple(cell) for cell in cells]
+        if not cells:
+            return None
+        cols = [cell[0] for cell in cells]
+        rows = [cell[1] for cell in cells]
+        return cls(min(cols), min(rows), max(cols), max(rows))
+
+    @classmethod
+    def cover(cls, cells):
+        """
+        Cover the cells with rectangles.
+
+        Cells of a row are joined into runs of adjacent columns, runs with
+        the same columns in adjacent rows are joined into rectangles. Every
+        cell is covered once, no cell outside of the set is covered.
+
+        @type  cells: iterable
+        @param cells: CellRef objects or (column, row) tuples
+
+        @rtype:   list
+        @return:  RangeRef objects
+        """
+        return [cls(*rect)
+                for rect in _cover_cells(tuple(cell) for cell in cells)]
+
+    def __setattr__(self, name, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format(name))
+
+    def __iter__(self):
+        return iter((self._start_col, self._start_row,
+                     self._end_col, self._end_row))
+
+    def __eq__(self, other):
+        return isinstance(other, RangeRef) and tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return "RangeRef('{0}')".format(self.name)
+
+    def __contains__(self, cell):
+        """
+        Checking if the cell is inside of the range.
+
+        @type  cell: CellRef or tuple
+        @param cell: Cell position
+        """
+        col, row = cell
+        return self._start_col <= col <= self._end_col and \
+            self._start_row <= row <= self._end_row
+
+    def __len__(self):
+        return self.n_columns * self.n_rows
+
+    @property
+    def start(self):
+        """
+        Get top left cell.
+
+        @rtype:   CellRef
+        @return:  Cell position
+        """
+        return CellRef(self._start_col, self._start_row)
+
+    @property
+    def end(self):
+        """
+        Get bottom right cell.
+
+        @rtype:   CellRef
+        @return:  Cell position
+        """
+        return CellRef(self._end_col, self._end_row)
+
+    @property
+    def n_columns(self):
+        """
+        Get number of columns.
+
+        @rtype:   int
+        @return:  Number of columns
+        """
+        return self._end_col - self._start_col + 1
+
+    @property
+    def n_rows(self):
+        """
+        Get number of rows.
+
+        @rtype:   int
+        @return:  Number of rows
+        """
+        return self._end_row - self._start_row + 1
+
+    @property
+    def name(self):
+        """
+        Get range name.
+
+        @rtype:   string
+        @return:  Cell range name ("A1:H200")
+        """
+        return "{0}:{1}".format(self.start.name, self.end.name)
+
+    def cells(self):
+        """
+        Get cells of the range by rows.
+
+        @rtype:   generator
+        @return:  CellRef objects
+        """
+        for row in range(self._start_row, self._end_row + 1):
+            for col in range(self._start_col, self._end_col + 1):
+                yield CellRef(col, row)
+
+    def offset(self, cols=0, rows=0):
+        """
+        Get the range moved by the offset.
+
+        @type  cols: int
+        @param cols: Column offset
+
+        @type  rows: int
+        @param rows: Row offset
+
+        @rtype:   RangeRef
+        @return:  Range position
+        """
+        return RangeRef(self._start_col + cols, self._start_row + rows,
+                        self._end_col + cols, self._end_row + rows)
+
+    def intersection(self, other):
+        """
+        Get the common part of the ranges.
+
+        @type  other: RangeRef
+        @param other: Range position
+
+        @rtype:   RangeRef
+        @return:  Range position, None if the ranges do not intersect
+        """
+        start_col = max(self._start_col, other._start_col)
+        start_row = max(self._start_row, other._start_row)
+        end_col = min(self._end_col, other._end_col)
+        end_row = min(self._end_row, other._end_row)
+        if start_col > end_col or start_row > end_row:
+            return None
+        return RangeRef(start_col, start_row, end_col, end_row)
+
+    def union(self, other):
+        """
+        Get the smallest range containing both ranges.
+
+        @type  other: RangeRef
+        @param other: Range position
+
+        @rtype:   RangeRef
+        @return:  Range position
+        """
+        return RangeRef(min(self._start_col, other._start_col),
+                        min(self._start_row, other._start_row),
+                        max(self._end_col, other._end_col),
+                        max(self._end_row, other._end_row))
+
+    def to_uno(self, sheet=0):
+        """
+        Get the office cell range address.
+
+        @type  sheet: int
+        @param sheet: Sheet index
+
+        @rtype:   com::sun::star::table::CellRangeAddress
+        @return:  Cell range address
+        """
+        oCellRangeAddress = CellRangeAddress()
+        oCellRangeAddress.Sheet = sheet
+        oCellRangeAddress.StartColumn = self._start_col
+        oCellRangeAddress.StartRow = self._start_row
+        oCellRangeAddress.EndColumn = self._end_col
+        oCellRangeAddress.EndRow = self._end_row
+        return oCellRangeAddress
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Field:
+    """
+    Document field.
+
+    Operations on the existing field.
+    """
+
+    def __init__(self, fields, name):
+        """
+        Constructor
+
+        @type  fields: Fields
+        @param fields: Fields object
+
+        @type  name: string
+        @param name: Field name
+        """
+        self._fields = fields
+        self._is_null = True
+
+        # LibreOffice variables.
+        self._oSheet = None
+        self._oNamedRanges = None
+        self._oRange = None
+        self._oCellAddress = None
+
+        if self._fields:
+            if 0 == len(name):
+                raise ValueError("'name' is an empty string")
+            if self._fields._oNamedRanges.hasByName(name):
+                self._oRange = self._fields._oNamedRanges.getByName(name)
+                self._oCellAddress = self._oRange.getReferencePosition()
+                oSheets = self._fields.document.o_doc.getSheets()
+                self._oSheet = oSheets.getByIndex(self._oCellAddress.Sheet)
+                self._is_null = False
+            else:
+                self._oRange = None
+                self._is_null = True
+        else:
+            raise ValueError("'fields' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the field is null.
+
+        @rtype:   bool
+        @return:  Value insertion result
+        """
+        return self._is_null
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def ref(self):
+        """
+        Get field cell position.
+
+        @rtype:   CellRef
+        @return:  Cell position, None if the field is null
+        """
+        result = None
+        if self._oCellAddress is not None:
+            result = CellRef(self._oCellAddress.Column,
+                             self._oCellAddress.Row)
+        return result
+
+    @ref.setter
+    def ref(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("ref"))
+
+    @_deadline("cell")
+    def set_value(self, value, column=0, row=0):
+        """
+        Set filed value at position Column/Row
+
+        @type  value: string
+        @param value: Cell value
+
+        @type  column: int
+        @param column: column index
 
         @type  row: int
-        @param row: the formula expression.
+        @param row: row index
+
+        @rtype:   bool
+        @return:  Value insertion result
+        """
+        result = True
+        if self._oRange:
+            oCell = self._oSheet.getCellByPosition(
+                self._oCellAddress.Column + column,
+                self._oCellAddress.Row + row)
+            if oCell:
+                oCell.setString(value)
+        else:
+            result = False
+        return result
+
+    @_deadline("cell")
+    def value(self, column=0, row=0):
+        """
+        Get filed value at position Column/Row
+
+        @type  column: int
+        @param column: column index
+
+        @type  row: int
+        @param row: row index
+
+        @rtype:   string
+        @return: Document cell value in string format. Regardless of document\
+                cell type.
+        """
+        value = ""
+        if self._oRange:
+            oCell = self._oSheet.getCellByPosition(
+                self._oCellAddress.Column + column,
+                self._oCellAddress.Row + row)
+            if oCell:
+                value = oCell.getString()
+        return value
+
+    @_deadline("rows")
+    def insert_rows(self, num_rows=1, step=1, columns_to_copy=250):
+        """
+        Insert rows
+
+        Insert new rows at the specified position relatively to cell.
+        After the new row insertion the content of the current rows is copied
+        to the new rows.
+
+        @type  num_rows: int
+        @param num_rows: Number of rows to insert. Default value=1
+
+        @type  step: int
+        @param step: Step of rows insertion.
+
+        @type  columns_to_copy: bool
+        @param columns_to_copy: Number of a columns to copy on insert.
+                            No copy will be performed if columns_to_copy = 0
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if num_rows <= 0:
+            raise ValueError("'num_rows' must be a positive number")
+        if columns_to_copy <= 0:
+            raise ValueError("'columns_to_copy' must be a positive number")
+        if 0 == step:
+            raise ValueError("'step' must not be equal to Zero")
+
+        if self._fields and self._oSheet:
+            insert_pos_with_step = self._oCellAddress.Row + 1 + step
+            self._oSheet.Rows.insertByIndex(
+                insert_pos_with_step, (num_rows * step))
+
+            # Copy rows, the field address is never modified
+            sheet = self._oCellAddress.Sheet
+            src = RangeRef(0, self._oCellAddress.Row + 1,
+                           columns_to_copy, self._oCellAddress.Row + step)
+            oCellRangeAddress_Src = src.to_uno(sheet)
+            for i in range(0, num_rows):
+                self._oSheet.copyRange(
+                    src.start.offset(rows=(i + 1) * step).to_uno(sheet),
+                    oCellRangeAddress_Src)
+
+            # Restore cell address variable
+            self._oCellAddress = self._oRange.getReferencePosition()
+
+            result = True
+        return result
+
+    @_deadline("rows")
+    def resize_table(self, count, step=1, current=1, columns_to_copy=250):
+        """
+        Resize table
+
+        Set the exact number of table rows below the field. Missing rows are
+        inserted in one operation (see insert_rows()), surplus rows are
+        removed in one operation. Fields below the table are moved by the
+        office.
+
+        @type  count: int
+        @param count: Required number of table rows (blocks of 'step' rows)
+
+        @type  step: int
+        @param step: Number of sheet rows in one table row.
+
+        @type  current: int
+        @param current: Current number of table rows (blocks of 'step' rows).
+                        Default value=1, a template with one table row.
+
+        @type  columns_to_copy: int
+        @param columns_to_copy: Number of a columns to copy on insert.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if count < 0:
+            raise ValueError("'count' must be >= 0")
+        if current < 0:
+            raise ValueError("'current' must be >= 0")
+        if step <= 0:
+            raise ValueError("'step' must be a positive number")
+
+        if self._fields and self._oSheet:
+            if count > current:
+                result = self.insert_rows(count - current, step,
+                                          columns_to_copy)
+            else:
+                if count < current:
+                    self._oSheet.Rows.removeByIndex(
+                        self._oCellAddress.Row + 1 + count * step,
+                        (current - count) * step)
+                result = True
+        return result
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Fields:
+    """
+    Document fields.
+    Search and manage fields (name ranges).
+    """
+
+    def __init__(self, document, sheet=None):
+        """
+        Constructor
+
+        @type  document: Document
+        @param document: Document object
+
+        @type  sheet: Sheet
+        @param sheet: Use the sheet-local named ranges of the sheet.
+                      None - document (global) named ranges
+        """
+        self._document = document
+        self._is_null = True
+
+        # LibreOffice variables.
+        self._oNamedRanges = None
+        if self._document:
+            if sheet is None:
+                self._oNamedRanges = self._document.o_doc.NamedRanges
+            else:
+                self._oNamedRanges = sheet.o_sheet.NamedRanges
+            self._is_null = False
+        else:
+            raise ValueError("'document' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the fields (NamedRanges) object is initialized
+
+        @rtype:   bool
+        @return:  Fields object state
+        """
+        return self._is_null
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    @_deadline("cell")
+    def count(self):
+        """
+        Get number of fields (named ranges) in the document.
+
+        @rtype:   int
+        @return:  the number of fields in the document.
+        """
+        count = 0
+        if self._oNamedRanges:
+            count = self._oNamedRanges.getCount()
+        return count
+
+    @count.setter
+    def count(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+
+    @property
+    def document(self):
+        """
+        Get document object.
+
+        @rtype:   Template
+        @return:  Template object
+        """
+        return self._document
+
+    @document.setter
+    def document(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("document"))
+
+    @_deadline("cell")
+    def field(self, name):
+        """
+        Get document field by name
+
+        @type  name: string
+        @param name: Field name
+
+        @rtype:   Field object
+        @return:  Field object
+        """
+        field = Field(self, name)
+        if field.is_null is None:
+            field = None
+        return field
+
+    @_deadline("rows")
+    def resize_tables(self, counts, columns_to_copy=250):
+        """
+        Resize several tables at once.
+
+        All table positions are resolved once, then the tables are resized
+        from the bottom of every sheet to the top, so a resize never moves
+        the tables which are not resized yet and every table is resized in
+        a single operation (see Field.resize_table()).
+
+        @type  counts: dict
+        @param counts: Required number of rows by table field name. A value
+                       is a number of rows or a tuple (count, step) or
+                       (count, step, current).
+
+        @type  columns_to_copy: int
+        @param columns_to_copy: Number of a columns to copy on insert.
+
+        @rtype:   dict
+        @return:  Table fields by name with the positions after the resize.
+        """
+        plan = []
+        for name, count in counts.items():
+            if not isinstance(count, tuple):
+                count = (count,)
+            count, step, current = (count + (1, 1))[:3]
+            field = self.field(name)
+            if field.is_null:
+                raise ValueError("No field '{0}' in the document".format(
+                    name))
+            plan.append((field._oCellAddress.Sheet, field._oCellAddress.Row,
+                         name, field, (count, step, current)))
+
+        # Final layout: a field is moved by the tables above it
+        layout = {}
+        for sheet, row, name, field, (count, step, current) in plan:
+            layout[name] = row + sum(
+                (other[4][0] - other[4][2]) * other[4][1] for other in plan
+                if other[0] == sheet and other[1] < row)
+
+        # Bottom-up: insertions and removals only move rows below them
+        result = {}
+        for sheet, row, name, field, count in sorted(plan, reverse=True):
+            field.resize_table(*count, columns_to_copy=columns_to_copy)
+            field._oCellAddress = CellRef(field._oCellAddress.Column,
+                                          layout[name]).to_uno(sheet)
+            result[name] = field
+        return result
+
+    @_deadline("range")
+    def values(self, names=None, typed=False):
+        """
+        Get values of many fields.
+
+        Field positions are resolved locally, the cells are read by sheets
+        with a few range calls (see Sheet.get_many()).
+
+        @type  names: list
+        @param names: Field names. None - all fields of the document
+
+        @type  typed: bool
+        @param typed: False - values are strings as Field.value() returns
+                      them (numbers are formatted by the office, one call
+                      per number). True - numbers are floats, text is
+                      strings, empty cells are empty strings.
+
+        @rtype:   dict
+        @return:  Values by field name
+        """
+        result = {}
+        if self._oNamedRanges:
+            known = self._oNamedRanges.getElementNames()
+            if names is None:
+                names = known
+            else:
+                known = set(known)
+                for name in names:
+                    if name not in known:
+                        raise ValueError(
+                            "No field '{0}' in the document".format(name))
+            by_sheet = {}
+            for name in names:
+                oCellAddress = self._oNamedRanges.getByName(
+                    name).getReferencePosition()
+                by_sheet.setdefault(oCellAddress.Sheet, []).append(
+                    (name, (oCellAddress.Column, oCellAddress.Row)))
+            oSheets = self._document.o_doc.getSheets()
+            for sheet, fields in by_sheet.items():
+                oSheet = oSheets.getByIndex(sheet)
+                values = _read_cells(oSheet, [cell for name, cell in fields])
+                for name, cell in fields:
+                    value = values[cell]
+                    if not typed and isinstance(value, float):
+                        value = oSheet.getCellByPosition(*cell).getString()
+                    result[name] = value
+        return result
+
+    @_deadline("cell")
+    def add(self, name, value, sheet, column, row):
+        """
+        Not implemented yet. FIXME
+        Adds a new field (named range) to the collection.
+
+        @type  name: string
+        @param name: the new name of the named range.
+
+        @type  value: string
+        @param value: the formula expression.
+
+        @type  sheet: int
+        @param sheet: the formula expression.
+
+        @type  column: int
+        @param column: the formula expression.
+
+        @type  row: int
+        @param row: the formula expression.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if 0 == len(name):
+            raise ValueError("'name' is an empty string")
+        if sheet < 0:
+            raise ValueError("'sheet' must be >= 0")
+        if column < 0:
+            raise ValueError("'column' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        cell_address = CellRef(column, row).to_uno(sheet)
+        if self._oNamedRanges:
+            self._oNamedRanges.addNewByName(name, value, cell_address, 0)
+        return None
+
+    @_deadline("cell")
+    def remove(self, name):
+        """
+        Not implemented yet. FIXME
+        Removes a field (named range) from the collection.
+
+        @type  name: string
+        @param name: the new name of the named range.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if 0 == len(name):
+            raise ValueError("'name' is an empty string")
+        if self._oNamedRanges:
+            self._oNamedRanges.removeByName(name)
+            result = True
+        return result
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Sheet:
+    """
+    Document sheet.
+    Manage sheet and cells.
+    """
+
+    def __init__(self, sheets, index_or_name):
+        """
+        Constructor
+
+        @type  sheets: Sheets
+        @param sheets: Sheets object
+
+        @type  index_or_name: int or string
+        @param index_or_name: Sheet index or sheet name
+        """
+
+        self._sheets = sheets
+        self._is_null = True
+
+        # LibreOffice variables.
+        self._oSheet = None
+
+        if sheets:
+            if isinstance(index_or_name, int):
+                if index_or_name < 0:
+                    raise ValueError("'index_or_name' must be >= 0")
+                # get by index
+                self._oSheet = self._sheets.o_sheets.getByIndex(index_or_name)
+                self._is_null = False
+            else:
+                if 0 == len(index_or_name):
+                    raise ValueError("'index_or_name' is an empty string")
+                # get by name
+                self._oSheet = self._sheets.o_sheets.getByName(index_or_name)
+                self._is_null = False
+        else:
+            raise ValueError("'sheets' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the sheet is null.
+
+        @rtype:   bool
+        @return:  Value insertion result
+        """
+        return self._is_null
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def o_sheet(self):
+        """
+        LibreOffice/OpenOffice Calc Spreadsheet object.
+
+        Not recommended use it directly.
+
+        @rtype:   com::sun::star::sheet::XSpreadsheet
+        @return:  Libre/Open office Spreadsheet object
+        """
+        return self._oSheet
+
+    @o_sheet.setter
+    def o_sheet(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("o_sheet"))
+
+    @property
+    @_deadline("cell")
+    def fields(self):
+        """
+        Get fields (sheet-local named ranges) of the sheet.
+
+        Sheets cloned by Sheets.clone_sheet() have local copies of the
+        document fields of the source sheet.
+
+        @rtype:   Fields
+        @return:  Fields object
+        """
+        return Fields(self._sheets._document, self)
+
+    @fields.setter
+    def fields(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("fields"))
+
+    @_deadline("cell")
+    def set_cell_value_by_index(self, value, col, row, is_formula=False):
+        """
+        Set cell value.
+
+        @type  value: string
+        @param value: Cell value
+
+        @type  col: int
+        @param col: Cell column index
+
+        @type  row: int
+        @param row: Cell row index
+
+        @type  is_formula: bool
+        @param is_formula: Set value as a formula ("=A1+B1")
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if col < 0:
+            raise ValueError("'col' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        result = False
+        oCell = self._oSheet.getCellByPosition(col, row)
+        if is_formula:
+            oCell.setFormula(value)
+            result = True
+        elif isinstance(value, int)\
+                or isinstance(value, float):
+            oCell.setValue(value)
+            result = True
+        else:
+            oCell.setString(value)
+            result = True
+        return result
+
+    @_deadline("cell")
+    def cell_value_by_index(self, col, row, val_type="AUTO"):
+        """
+        Get cell value.
+
+        @type  col: int
+        @param col: Cell column index
+
+        @type  row: int
+        @param row: Cell row index
+
+        @type  val_type: string
+        @param val_type: Data type of return value
+
+        @rtype:   long, int, float or string
+        @return:  Value. Value type depends on val_type parameter
+        """
+        if col < 0:
+            raise ValueError("'col' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        value = None
+        oCell = self._oSheet.getCellByPosition(col, row)
+
+        if val_type == "AUTO":
+            # Return data type is set based on getType()
+            value_type = oCell.getType()
+            if VALUE == value_type:
+                value = oCell.getValue()
+            if FORMULA == value_type:
+                value = oCell.getFormula()
+            if TEXT == value_type:
+                value = oCell.getString()
+        elif val_type == "VALUE":
+            # Force return data type to be cell value
+            value = oCell.getValue()
+        elif val_type == "FORMULA":
+            # Force return data type to be cell formula
+            value = oCell.getFormula()
+        elif val_type == "STRING":
+            # Force return data type to be cell string
+            value = oCell.getString()
+        return value
+
+    def cell(self, name, val_type="AUTO"):
+        """
+        Get cell value by cell name.
+
+        @type  name: string or CellRef
+        @param name: Cell name ("E5") or cell position
+
+        @type  val_type: string
+        @param val_type: Data type of return value, see cell_value_by_index()
+
+        @rtype:   long, int, float or string
+        @return:  Value. Value type depends on val_type parameter
+        """
+        col, row = _parse_cell_name(name) if isinstance(name, str) else name
+        return self.cell_value_by_index(col, row, val_type)
+
+    @_deadline("range")
+    def range(self, name):
+        """
+        Get values of the cell range in one call.
+
+        @type  name: string, tuple or RangeRef
+        @param name: Cell range name ("A1:H200") or position
+
+        @rtype:   tuple
+        @return:  Tuple of rows. Values are floats for numbers and strings
+                  for text and empty cells
+        """
+        return self._cell_range(name).getDataArray()
+
+    @_deadline("range")
+    def get_many(self, names):
+        """
+        Get values of many cells.
+
+        Cells are grouped into rectangles, every rectangle is read in one
+        call. Values are the same as range() returns.
+
+        @type  names: list
+        @param names: Cell names (["B2", "C7"]), CellRef objects or
+                      (column, row) tuples
+
+        @rtype:   list
+        @return:  Values in order of names
+        """
+        cells = [_parse_cell_name(name) if isinstance(name, str)
+                 else tuple(name) for name in names]
+        values = _read_cells(self._oSheet, cells)
+        return [values[cell] for cell in cells]
+
+    def _cell_range(self, cell_range):
+        """
+        Get the office cell range object.
+
+        @type  cell_range: string, tuple or RangeRef
+        @param cell_range: Cell range name ("A1:H200"), tuple
+                           (start column, start row, end column, end row)
+                           or RangeRef
+
+        @rtype:   com::sun::star::table::XCellRange
+        @return:  Libre/Open office cell range object
+        """
+        if isinstance(cell_range, str):
+            cell_range = RangeRef.from_name(cell_range)
+        elif not isinstance(cell_range, RangeRef):
+            start_col, start_row, end_col, end_row = cell_range
+            if start_col < 0 or start_row < 0 or end_col < start_col or \
+                    end_row < start_row:
+                raise ValueError("'cell_range' is not a valid range")
+        return self._oSheet.getCellRangeByPosition(*cell_range)
+
+    @_deadline("range")
+    def format_range(self, cell_range, **props):
+        """
+        Set cell properties of the range in one call.
+
+        Example:
+            sheet.format_range("A10:H10", CharWeight=150.0,
+                               NumberFormat="#,##0.00")
+
+        @type  cell_range: string, tuple or RangeRef
+        @param cell_range: Cell range name ("A1:H200"), tuple
+                           (start column, start row, end column, end row)
+                           or RangeRef
+
+        @type  props: dict
+        @param props: Cell properties (com.sun.star.table.CellProperties,
+                      com.sun.star.style.CharacterProperties). NumberFormat
+                      can be a format string, resolved keys are cached.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        oRange = self._cell_range(cell_range)
+        if props:
+            number_format = props.get("NumberFormat")
+            if isinstance(number_format, str):
+                props["NumberFormat"] = \
+                    self._sheets._document._number_format_key(number_format)
+            # XMultiPropertySet requires sorted property names
+            names = tuple(sorted(props))
+            oRange.setPropertyValues(names,
+                                     tuple(props[name] for name in names))
+            result = True
+        return result
+
+    @_deadline("range")
+    def apply_style(self, cell_range, style_name):
+        """
+        Apply cell style to the range.
+
+        @type  cell_range: string, tuple or RangeRef
+        @param cell_range: Cell range name ("A1:H200"), tuple
+                           (start column, start row, end column, end row)
+                           or RangeRef
+
+        @type  style_name: string
+        @param style_name: Cell style name
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if 0 == len(style_name):
+            raise ValueError("'style_name' is an empty string")
+        self._cell_range(cell_range).setPropertyValue("CellStyle",
+                                                      style_name)
+        return True
+
+    @_deadline("range")
+    def write_formulas(self, col, row, rows):
+        """
+        Set formulas of a cell block in one call.
+
+        Combine with Document.automatic_calculation = False and
+        Document.recalculate() to recalculate once after many writes.
+
+        @type  col: int
+        @param col: Column index of the top left cell
+
+        @type  row: int
+        @param row: Row index of the top left cell
+
+        @type  rows: list
+        @param rows: Rows of formulas (strings, like "=A1+B1"). Constants are
+                     set as they are entered in the office, None clears
+                     the cell, short rows are padded with empty cells.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if col < 0:
+            raise ValueError("'col' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        result = False
+        rows = [["" if formula is None else str(formula)
+                 for formula in row_data] for row_data in rows]
+        n_columns = max([len(row_data) for row_data in rows] or [0])
+        if n_columns:
+            data = tuple(tuple(row_data + [""] * (n_columns - len(row_data)))
+                         for row_data in rows)
+            oRange = self._oSheet.getCellRangeByPosition(
+                col, row, col + n_columns - 1, row + len(data) - 1)
+            oRange.setFormulaArray(data)
+            result = True
+        return result
+
+    @_deadline("range")
+    def sort_range(self, cell_range, keys, has_header=False,
+                   case_sensitive=False):
+        """
+        Sort rows of the range by the office.
+
+        Example, by the third column descending, then by the first one:
+            sheet.sort_range("A2:F500", [(2, False), 0])
+
+        @type  cell_range: string, tuple or RangeRef
+        @param cell_range: Cell range name ("A1:H200"), tuple
+                           (start column, start row, end column, end row)
+                           or RangeRef
+
+        @type  keys: list
+        @param keys: Sort keys: column index relatively to the range or
+                     tuple (column index, ascending)
+
+        @type  has_header: bool
+        @param has_header: The first row of the range is a header
+
+        @type  case_sensitive: bool
+        @param case_sensitive: Case sensitive comparison
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if 0 == len(keys):
+            raise ValueError("'keys' is empty")
+        oRange = self._cell_range(cell_range)
+        n_columns = oRange.getColumns().getCount()
+        fields = []
+        for key in keys:
+            column, ascending = key if isinstance(key, tuple) else (key, True)
+            if column < 0 or column >= n_columns:
+                raise ValueError("Sort column {0} is out of the range".format(
+                    column))
+            oField = uno.createUnoStruct("com.sun.star.table.TableSortField")
+            oField.Field = column
+            oField.IsAscending = bool(ascending)
+            oField.IsCaseSensitive = bool(case_sensitive)
+            fields.append(oField)
+        oRange.sort(self._sheets._document._to_properties(
+            ContainsHeader=bool(has_header),
+            SortFields=uno.Any("[]com.sun.star.table.TableSortField",
+                               tuple(fields))))
+        return True
+
+    @_deadline("range")
+    def filter_range(self, cell_range, conditions, has_header=True,
+                     match_any=False, copy_to=None):
+        """
+        Filter rows of the range by the office (standard filter).
+
+        Rows not matching the conditions are hidden, or the matching rows
+        are copied to 'copy_to' and the range is left as is. Empty
+        conditions remove the filter.
+
+        Example:
+            sheet.filter_range("A1:F500", [(2, ">", 100), (0, "=", "EUR")],
+                               copy_to="H1")
+
+        @type  cell_range: string, tuple or RangeRef
+        @param cell_range: Cell range name ("A1:H200"), tuple
+                           (start column, start row, end column, end row)
+                           or RangeRef
+
+        @type  conditions: list
+        @param conditions: Tuples (column index relatively to the range,
+                           operator, value). Operators: "=", "!=", ">", ">=",
+                           "<", "<=", "empty", "not_empty".
+
+        @type  has_header: bool
+        @param has_header: The first row of the range is a header
+
+        @type  match_any: bool
+        @param match_any: False - all conditions (AND), True - any (OR)
+
+        @type  copy_to: string, tuple or CellRef
+        @param copy_to: Top left cell of the filter result copy
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        oRange = self._cell_range(cell_range)
+        n_columns = oRange.getColumns().getCount()
+        fields = []
+        for column, operator, value in conditions:
+            if column < 0 or column >= n_columns:
+                raise ValueError(
+                    "Filter column {0} is out of the range".format(column))
+            if operator not in _FILTER_OPERATORS:
+                raise ValueError("Unknown operator '{0}'".format(operator))
+            oField = uno.createUnoStruct("com.sun.star.sheet.TableFilterField")
+            oField.Connection = uno.Enum(
+                "com.sun.star.sheet.FilterConnection",
+                "OR" if match_any else "AND")
+            oField.Field = column
+            oField.Operator = uno.Enum("com.sun.star.sheet.FilterOperator",
+                                       _FILTER_OPERATORS[operator])
+            if isinstance(value, (int, float)):
+                oField.IsNumeric = True
+                oField.NumericValue = value
+            else:
+                oField.IsNumeric = False
+                oField.StringValue = "" if value is None else str(value)
+            fields.append(oField)
+
+        oDescriptor = oRange.createFilterDescriptor(True)
+        oDescriptor.setFilterFields(tuple(fields))
+        oDescriptor.ContainsHeader = bool(has_header)
+        if copy_to is not None:
+            col, row = _parse_cell_name(copy_to) \
+                if isinstance(copy_to, str) else copy_to
+            oDescriptor.CopyOutputData = True
+            oDescriptor.OutputPosition = CellRef(col, row).to_uno(
+                self._oSheet.getRangeAddress().Sheet)
+        oRange.filter(oDescriptor)
+        return True
+
+    @_deadline("range")
+    def aggregate(self, cell_range, func="sum"):
+        """
+        Compute the function over the range by the office.
+
+        @type  cell_range: string, tuple or RangeRef
+        @param cell_range: Cell range name ("A1:H200"), tuple
+                           (start column, start row, end column, end row)
+                           or RangeRef
+
+        @type  func: string
+        @param func: Function: "sum", "count", "count_nums", "average",
+                     "max", "min", "product", "stdev", "stdevp", "var",
+                     "varp"
+
+        @rtype:   float
+        @return:  Function result
+        """
+        if func not in _AGGREGATE_FUNCTIONS:
+            raise ValueError("Unknown function '{0}'".format(func))
+        return self._cell_range(cell_range).computeFunction(
+            uno.Enum("com.sun.star.sheet.GeneralFunction",
+                     _AGGREGATE_FUNCTIONS[func]))
+
+    @_deadline("range")
+    def sync(self, rows, col=0, row=0):
+        """
+        Write the block of values changing only the cells which differ.
+
+        The rows written by the previous sync() at the same position are
+        kept, so unchanged rows are skipped without reading the sheet and
+        changed rows are written by rectangles. Cells of the previous block
+        outside of the new block are cleared. The first sync reads the block
+        in one call and writes the changed cells only.
+
+        The kept rows assume that the block is changed by sync() only.
+
+        @type  rows: list
+        @param rows: Rows of values (numbers, strings or None for empty
+                     cells). Short rows are padded with empty cells.
+
+        @type  col: int
+        @param col: Column index of the top left cell
+
+        @type  row: int
+        @param row: Row index of the top left cell
+
+        @rtype:   int
+        @return:  Number of written cells
+        """
+        if col < 0:
+            raise ValueError("'col' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        rows = [[_data_value(value) for value in row_data]
+                for row_data in rows]
+        n_columns = max([len(row_data) for row_data in rows] or [0])
+        data = [tuple(row_data + [""] * (n_columns - len(row_data)))
+                for row_data in rows]
+
+        key = (self._oSheet.getName(), col, row)
+        previous = self._sheets._sync_rows.get(key)
+        # Cells of every row to write
+        cells = []
+        if previous is not None and previous[0] == n_columns:
+            # Rows changed since the previous sync, whole width
+            cells = [(col_index, index)
+                     for index, row_data in enumerate(data)
+                     if index >= len(previous[1]) or
+                     previous[1][index] != row_data
+                     for col_index in range(n_columns)]
+        elif data and n_columns:
+            current = self._oSheet.getCellRangeByPosition(
+                col, row, col + n_columns - 1, row + len(data) - 1
+            ).getDataArray()
+            cells = [(col_index, row_index)
+                     for row_index, row_data in enumerate(data)
+                     for col_index, value in enumerate(row_data)
+                     if current[row_index][col_index] != value]
+        pending = [0] * len(data)
+        for col_index, row_index in cells:
+            pending[row_index] += 1
+
+        written = 0
+        for start_col, start_row, end_col, end_row in RangeRef.cover(cells):
+            self._oSheet.getCellRangeByPosition(
+                col + start_col, row + start_row,
+                col + end_col, row + end_row).setDataArray(tuple(
+                    row_data[start_col:end_col + 1]
+                    for row_data in data[start_row:end_row + 1]))
+            written += (end_col - start_col + 1) * (end_row - start_row + 1)
+            for row_index in range(start_row, end_row + 1):
+                pending[row_index] -= end_col - start_col + 1
+
+        if previous is not None:
+            # Clear the rest of the previous block
+            old_columns, old_rows = previous[0], len(previous[1])
+            flags = CELL_VALUE | CELL_DATETIME | CELL_STRING | CELL_FORMULA
+            if old_rows > len(data) and old_columns:
+                self._oSheet.getCellRangeByPosition(
+                    col, row + len(data), col + old_columns - 1,
+                    row + old_rows - 1).clearContents(flags)
+            if old_columns > n_columns and min(old_rows, len(data)):
+                self._oSheet.getCellRangeByPosition(
+                    col + n_columns, row, col + old_columns - 1,
+                    row + min(old_rows, len(data)) - 1).clearContents(flags)
+        # Only rows known to be in the sheet are skipped next time
+        self._sheets._sync_rows[key] = (n_columns, [
+            row_data if 0 == pending[index] else None
+            for index, row_data in enumerate(data)])
+        return written
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Sheets:
+    """
+    Document sheets.
+    Search and manage sheets.
+    """
+
+    def __init__(self, document):
+        """
+        Constructor
+
+        @type  document: Document
+        @param document: Document object
+        """
+        self._document = document
+        # Rows of the blocks written by Sheet.sync()
+        self._sync_rows = {}
+
+        # LibreOffice variables.
+        self._oSheets = None
+        if self._document:
+            self._oSheets = self._document.o_doc.getSheets()
+        else:
+            raise ValueError("'document' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the document object is initialized
+
+        @rtype:   bool
+        @return:  Document object state
+        """
+        result = False
+        if self._oSheets is None:
+            result = True
+        return result
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @_deadline("cell")
+    def sheet(self, index_or_name):
+        """
+        Get sheet by index or name.
+
+        @type  index_or_name: int, string
+        @param index_or_name: Sheet index or name
+
+        @rtype:   Sheet
+        @return:  Sheet object
+        """
+        return Sheet(self, index_or_name)
+
+    @property
+    @_deadline("cell")
+    def count(self):
+        """
+        Get number of sheets in document.
+
+        @rtype:   int
+        @return:  the number of sheets in document.
+        """
+        count = 0
+        if self._oSheets:
+            count = self._oSheets.getCount()
+        return count
+
+    @count.setter
+    def count(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+
+    @property
+    def o_sheets(self):
+        """
+        LibreOffice/OpenOffice Calc Spreadsheets object.
+
+        Required for Fields and Field classes. Not recommended use it directly.
+
+        @rtype:   com::sun::star::sheet::XSpreadsheets
+        @return:  Libre/Open office Spreadsheets object
+        """
+        return self._oSheets
+
+    @o_sheets.setter
+    def o_sheets(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("o_sheets"))
+
+    @_deadline("rows")
+    def insert_spreadsheet(self, name, index):
+        """
+        Inserts a new sheet into the collection.
+
+        @type  name: string
+        @param name: The name of the new spreadsheet.
+
+        @type  index: int
+        @param index: The index of the new spreadsheet in the collection.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if index < 0:
+            raise ValueError("'index' must be >= 0")
+        if 0 == len(name):
+            raise ValueError("'name' is an empty string")
+        result = False
+        if self.o_sheets:
+            self.o_sheets.insertNewByName(name, index)
+            result = True
+        return result
+
+    @_deadline("open")
+    def import_csv(self, path_or_bytes, sheet_name, delimiter=",",
+                   encoding="utf-8", column_types=None, index=None):
+        """
+        Import CSV/TSV data into a new sheet.
+
+        The data is parsed by the office text import filter in one load
+        (hidden document) and the sheet is moved into this document.
+
+        @type  path_or_bytes: string or bytes
+        @param path_or_bytes: CSV file name or CSV content
+
+        @type  sheet_name: string
+        @param sheet_name: Name of the new sheet
+
+        @type  delimiter: string
+        @param delimiter: Field delimiter(s), "\\t" for TSV
+
+        @type  encoding: string
+        @param encoding: Character set ("utf-8", "latin-1", "cp1252", ...)
+
+        @type  column_types: dict
+        @param column_types: Column formats by column index: "standard",
+                             "text" (keep leading zeroes), "mdy", "dmy",
+                             "ymd" (dates), "skip", "us" (US English
+                             numbers). Default is "standard".
+
+        @type  index: int
+        @param index: Index of the new sheet. Default is after the last sheet
+
+        @rtype:   Sheet
+        @return:  Sheet object
+        """
+        if 0 == len(sheet_name):
+            raise ValueError("'sheet_name' is an empty string")
+        if 0 == len(delimiter):
+            raise ValueError("'delimiter' is an empty string")
+        if index is not None and index < 0:
+            raise ValueError("'index' must be >= 0")
+        if self._oSheets.hasByName(sheet_name):
+            raise ValueError("Sheet '{0}' already exists".format(
+                sheet_name))
+        charset = _CSV_CHARSETS.get(encoding.lower(), encoding)
+        formats = []
+        for column, column_type in sorted((column_types or {}).items()):
+            if column < 0:
+                raise ValueError("Column index must be >= 0")
+            if column_type not in _CSV_COLUMN_TYPES:
+                raise ValueError("Unknown column type '{0}'".format(
+                    column_type))
+            formats.append("{0}/{1}".format(column + 1,
+                                            _CSV_COLUMN_TYPES[column_type]))
+        # Separators, text delimiter ("), character set, first line,
+        # column formats
+        filter_options = "{0},34,{1},1,{2}".format(
+            "/".join(str(ord(char)) for char in delimiter), charset,
+            "/".join(formats))
+
+        temp_dir = None
+        file_name = path_or_bytes
+        if isinstance(path_or_bytes, (bytes, bytearray)):
+            temp_dir = tempfile.mkdtemp(prefix="pyoocalc")
+            file_name = os.path.join(temp_dir, "import.csv")
+            with open(file_name, "wb") as stream:
+                stream.write(path_or_bytes)
+        oDoc = None
+        try:
+            oDoc = self._document._oDesktop.loadComponentFromURL(
+                unohelper.systemPathToFileUrl(os.path.abspath(file_name)),
+                "_blank", 0, self._document._to_properties(
+                    Hidden=True, FilterName=_CSV_FILTER,
+                    FilterOptions=filter_options))
+            if index is None:
+                index = self._oSheets.getCount()
+            index = self._oSheets.importSheet(
+                oDoc, oDoc.getSheets().getByIndex(0).getName(), index)
+            self._oSheets.getByIndex(index).setName(sheet_name)
+        finally:
+            if oDoc is not None:
+                oDoc.close(True)
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        return Sheet(self, sheet_name)
+
+    def _sheet_fields(self, oDoc, oSheet):
+        """
+        Get document (global) named ranges referring to the sheet.
+
+        @rtype:   list
+        @return:  (name, CellRangeAddress) tuples
+        """
+        result = []
+        sheet = oSheet.getRangeAddress().Sheet
+        oNamedRanges = oDoc.NamedRanges
+        for name in oNamedRanges.getElementNames():
+            oCells = oNamedRanges.getByName(name).getReferredCells()
+            if oCells is not None:
+                oAddress = oCells.getRangeAddress()
+                if oAddress.Sheet == sheet:
+                    result.append((name, oAddress))
+        return result
+
+    def _add_sheet_fields(self, oSheet, fields):
+        """
+        Add the named ranges to the sheet as sheet-local named ranges
+        referring to the same cells of the sheet.
+
+        @type  fields: list
+        @param fields: (name, CellRangeAddress) tuples
+        """
+        oNamedRanges = oSheet.NamedRanges
+        sheet = oSheet.getRangeAddress().Sheet
+        sheet_name = "$'{0}'".format(oSheet.getName().replace("'", "''"))
+        for name, oAddress in fields:
+            if oNamedRanges.hasByName(name):
+                continue
+            content = "{0}.${1}${2}:${3}${4}".format(
+                sheet_name, _column_name(oAddress.StartColumn),
+                oAddress.StartRow + 1, _column_name(oAddress.EndColumn),
+                oAddress.EndRow + 1)
+            oNamedRanges.addNewByName(
+                name, content,
+                CellRef(oAddress.StartColumn, oAddress.StartRow).to_uno(sheet),
+                0)
+
+    def clone_sheet(self, source, new_name, index=None, rescope=True):
+        """
+        Copy the sheet by the office, see clone_many().
+
+        @type  source: int, string or Sheet
+        @param source: Sheet index or name of this document or Sheet object
+                       of any document
+
+        @type  new_name: string
+        @param new_name: Name of the copy
+
+        @type  index: int
+        @param index: Index of the copy. Default is after the last sheet
+
+        @type  rescope: bool
+        @param rescope: Copy the document fields of the source sheet into
+                        the sheet-local fields of the copy
+
+        @rtype:   Sheet
+        @return:  Sheet object of the copy
+        """
+        return self.clone_many(source, [new_name], index, rescope)[0]
+
+    @_deadline("range")
+    def clone_many(self, source, names, index=None, rescope=True):
+        """
+        Copy the sheet several times by the office.
+
+        Every copy is one office call (copyByName() within the document,
+        importSheet() from another document). The document fields (global
+        named ranges) of the source sheet keep referring to the source, so
+        with 'rescope' they are added to every copy as sheet-local named
+        ranges with the same names: use Sheet.fields of the copy.
+
+        @type  source: int, string or Sheet
+        @param source: Sheet index or name of this document or Sheet object
+                       of any document
+
+        @type  names: list
+        @param names: Names of the copies
+
+        @type  index: int
+        @param index: Index of the first copy. Default is after the last
+                      sheet
+
+        @type  rescope: bool
+        @param rescope: Copy the document fields of the source sheet into
+                        the sheet-local fields of the copies
+
+        @rtype:   list
+        @return:  Sheet objects of the copies
+        """
+        if index is not None and index < 0:
+            raise ValueError("'index' must be >= 0")
+        if len(set(names)) != len(names):
+            raise ValueError("'names' are not unique")
+        for name in names:
+            if 0 == len(name):
+                raise ValueError("'names' contains an empty string")
+            if self._oSheets.hasByName(name):
+                raise ValueError("Sheet '{0}' already exists".format(name))
+
+        oDoc = self._document.o_doc
+        if isinstance(source, Sheet):
+            oSrcDoc = source._sheets._document.o_doc
+            oSrcSheet = source.o_sheet
+        else:
+            oSrcDoc = oDoc
+            if isinstance(source, int):
+                oSrcSheet = self._oSheets.getByIndex(source)
+            else:
+                oSrcSheet = self._oSheets.getByName(source)
+        src_name = oSrcSheet.getName()
+        fields = self._sheet_fields(oSrcDoc, oSrcSheet) if rescope else []
+        if index is None:
+            index = self._oSheets.getCount()
+
+        result = []
+        for offset, name in enumerate(names):
+            if oSrcDoc == oDoc:
+                self._oSheets.copyByName(src_name, name, index + offset)
+                oSheet = self._oSheets.getByName(name)
+            else:
+                oSheet = self._oSheets.getByIndex(self._oSheets.importSheet(
+                    oSrcDoc, src_name, index + offset))
+                oSheet.setName(name)
+            self._add_sheet_fields(oSheet, fields)
+            result.append(Sheet(self, name))
+        return result
+
+    @_deadline("rows")
+    def remove_spreadsheet(self, name):
+        """
+        Inserts a new sheet into the collection.
+
+        @type  name: string
+        @param name: The name of the removing spreadsheet.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if 0 == len(name):
+            raise ValueError("'name' is an empty string")
+        result = False
+        if self.o_sheets:
+            self.o_sheets.removeByName(name)
+            result = True
+        return result
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class SheetSnapshot:
+    """
+    Read-only columnar copy of a sheet used area.
+
+    Numbers are stored in array('d') and strings as integer codes in
+    array('i') into the string table shared by the whole snapshot. A column
+    of numbers only is stored as numbers only (8 bytes per cell), a column
+    of strings and empty cells as string codes only, -1 is an empty cell
+    (4 bytes per cell), an empty column is not stored at all. A column
+    mixing numbers with other cells gets a one byte kind code per cell
+    (empty, number or string) on top of its value arrays.
+    """
+
+    _EMPTY = 0
+    _NUMBER = 1
+    _STRING = 2
+
+    def __init__(self, name, n_columns, strings, string_codes):
+        """
+        Constructor
+
+        @type  name: string
+        @param name: Sheet name
+
+        @type  n_columns: int
+        @param n_columns: Number of columns in the sheet used area
+
+        @type  strings: list
+        @param strings: String table shared by the snapshot
+
+        @type  string_codes: dict
+        @param string_codes: String to code mapping for the string table
+        """
+        self._name = name
+        self._n_rows = 0
+        self._strings = strings
+        self._string_codes = string_codes
+        self._kinds = [None] * n_columns
+        self._numbers = [None] * n_columns
+        self._codes = [None] * n_columns
+
+    @property
+    def name(self):
+        """
+        Get sheet name.
+
+        @rtype:   string
+        @return:  Sheet name
+        """
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("name"))
+
+    @property
+    def n_rows(self):
+        """
+        Get number of rows in the snapshot.
+
+        @rtype:   int
+        @return:  Number of rows
+        """
+        return self._n_rows
+
+    @n_rows.setter
+    def n_rows(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("n_rows"))
+
+    @property
+    def n_columns(self):
+        """
+        Get number of columns in the snapshot.
+
+        @rtype:   int
+        @return:  Number of columns
+        """
+        return len(self._numbers)
+
+    @n_columns.setter
+    def n_columns(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("n_columns"))
+
+    def _append_rows(self, data):
+        """
+        Append a block of rows returned by getDataArray().
+
+        @type  data: tuple
+        @param data: Tuple of rows, every row is a tuple of floats and strings
+        """
+        strings = self._strings
+        string_codes = self._string_codes
+        kinds = self._kinds
+        numbers = self._numbers
+        codes = self._codes
+        for row_data in data:
+            n_rows = self._n_rows
+            for col, cell in enumerate(row_data):
+                code = -1
+                if isinstance(cell, float):
+                    kind = self._NUMBER
+                elif cell == "":
+                    kind = self._EMPTY
+                else:
+                    kind = self._STRING
+                    code = string_codes.get(cell)
+                    if code is None:
+                        code = string_codes[cell] = len(strings)
+                        strings.append(cell)
+                column_kinds = kinds[col]
+                if column_kinds is None:
+                    # Single kind column so far
+                    column_numbers = numbers[col]
+                    column_codes = codes[col]
+                    if column_numbers is not None:
+                        if kind == self._NUMBER:
+                            column_numbers.append(cell)
+                            continue
+                        column_kinds = kinds[col] = \
+                            array('b', [self._NUMBER]) * n_rows
+                    elif column_codes is not None:
+                        if kind != self._NUMBER:
+                            column_codes.append(code)
+                            continue
+                        column_kinds = kinds[col] = array('b', (
+                            self._EMPTY if value < 0 else self._STRING
+                            for value in column_codes))
+                    elif kind == self._EMPTY:
+                        continue
+                    elif kind == self._STRING:
+                        codes[col] = array('i', [-1]) * n_rows
+                        codes[col].append(code)
+                        continue
+                    elif 0 == n_rows:
+                        numbers[col] = array('d', [cell])
+                        continue
+                    else:
+                        column_kinds = kinds[col] = \
+                            array('b', [self._EMPTY]) * n_rows
+                column_kinds.append(kind)
+                if kind == self._NUMBER and numbers[col] is None:
+                    numbers[col] = array('d', [0.0]) * n_rows
+                if kind == self._STRING and codes[col] is None:
+                    codes[col] = array('i', [-1]) * n_rows
+                if numbers[col] is not None:
+                    numbers[col].append(cell if kind == self._NUMBER else 0.0)
+                if codes[col] is not None:
+                    codes[col].append(code)
+            self._n_rows += 1
+
+    def _value(self, col, row):
+        """
+        Get cell value without the bounds check.
+        """
+        kinds = self._kinds[col]
+        if kinds is None:
+            if self._numbers[col] is not None:
+                return self._numbers[col][row]
+            if self._codes[col] is not None:
+                code = self._codes[col][row]
+                return self._strings[code] if code >= 0 else None
+            return None
+        kind = kinds[row]
+        if kind == self._NUMBER:
+            return self._numbers[col][row]
+        if kind == self._STRING:
+            return self._strings[self._codes[col][row]]
+        return None
+
+    def value(self, col, row):
+        """
+        Get cell value.
+
+        @type  col: int
+        @param col: Cell column index
+
+        @type  row: int
+        @param row: Cell row index
+
+        @rtype:   float, string or None
+        @return:  Cell value. None for an empty cell
+        """
+        if not 0 <= col < self.n_columns:
+            raise ValueError("'col' is out of the snapshot range")
+        if not 0 <= row < self._n_rows:
+            raise ValueError("'row' is out of the snapshot range")
+        return self._value(col, row)
+
+    def row(self, row):
+        """
+        Get row values.
+
+        @type  row: int
+        @param row: Row index
+
+        @rtype:   tuple
+        @return:  Row values
+        """
+        if not 0 <= row < self._n_rows:
+            raise ValueError("'row' is out of the snapshot range")
+        return tuple(self._value(col, row) for col in range(self.n_columns))
+
+    def column(self, col):
+        """
+        Get column values.
+
+        @type  col: int
+        @param col: Column index
+
+        @rtype:   list
+        @return:  Column values
+        """
+        if not 0 <= col < self.n_columns:
+            raise ValueError("'col' is out of the snapshot range")
+        return [self._value(col, row) for row in range(self._n_rows)]
+
+    def numbers(self, col):
+        """
+        Get the raw numeric column.
+
+        Non numeric cells are stored as 0.0, use value() to distinguish them.
+
+        @type  col: int
+        @param col: Column index
+
+        @rtype:   array
+        @return:  array('d') with column numbers
+        """
+        if not 0 <= col < self.n_columns:
+            raise ValueError("'col' is out of the snapshot range")
+        if self._numbers[col] is None:
+            return array('d', [0.0]) * self._n_rows
+        return self._numbers[col]
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Snapshot:
+    """
+    Read-only columnar copy of all document sheets.
+
+    See Document.snapshot().
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._sheets = []
+        self._strings = []
+        self._string_codes = {}
+
+    def _add_sheet(self, name, n_columns):
+        """
+        Create and register a new sheet snapshot.
+
+        @rtype:   SheetSnapshot
+        @return:  Empty sheet snapshot
+        """
+        sheet = SheetSnapshot(name, n_columns, self._strings,
+                              self._string_codes)
+        self._sheets.append(sheet)
+        return sheet
+
+    @property
+    def count(self):
+        """
+        Get number of sheets in the snapshot.
+
+        @rtype:   int
+        @return:  the number of sheets
+        """
+        return len(self._sheets)
+
+    @count.setter
+    def count(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+
+    @property
+    def names(self):
+        """
+        Get sheet names.
+
+        @rtype:   list
+        @return:  Sheet names in document order
+        """
+        return [sheet.name for sheet in self._sheets]
+
+    @names.setter
+    def names(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("names"))
+
+    @property
+    def strings(self):
+        """
+        Get the string table shared by all sheets.
+
+        @rtype:   list
+        @return:  Distinct strings, indexed by string code
+        """
+        return self._strings
+
+    @strings.setter
+    def strings(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("strings"))
+
+    def sheet(self, index_or_name):
+        """
+        Get sheet snapshot by index or name.
+
+        @type  index_or_name: int, string
+        @param index_or_name: Sheet index or name
+
+        @rtype:   SheetSnapshot
+        @return:  Sheet snapshot
+        """
+        if isinstance(index_or_name, int):
+            if index_or_name < 0:
+                raise ValueError("'index_or_name' must be >= 0")
+            return self._sheets[index_or_name]
+        for sheet in self._sheets:
+            if sheet.name == index_or_name:
+                return sheet
+        raise ValueError("No sheet '{0}' in the snapshot".format(
+            index_or_name))
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Document:
+    def __init__(self,
+                 autostart=False,
+                 office='soffice \
+--accept="socket,host=localhost,port=2002;urp;"',
+                 connection_string="\
+uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext",
+                 timeout=30,
+                 attempt_period=0.1,
+                 session=None,
+                 deadlines=None,
+                 script_context=None):
+        """
+        Constructor
+
+        @type  autostart: bool
+        @param autostart: Auto Starts Libre/Open Office with a listening socket
+
+        @type  office: string
+        @param office: Libre/Open Office startup string
+
+        @type  connection_string: string
+        @param connection_string: Libre/Open office initialization string
+
+        @type  timeout: int
+        @param timeout: Timeout for starting Libre/Open Office in seconds
+
+        @type  attempt_period: int
+        @param attempt_period: Timeout between attempts in seconds
+
+        @type  session: Session
+        @param session: Use the connection of the session. Other connection
+                        arguments are ignored.
+
+        @type  deadlines: dict
+        @param deadlines: Deadlines of operations in seconds, see the
+                          'deadlines' property. Default is the deadlines of
+                          the session connection or no deadlines.
+
+        @type  script_context: com::sun::star::script::provider::\
+XScriptContext
+        @param script_context: Run inside of the office as a Python macro:
+                        pass XSCRIPTCONTEXT of the macro. The document is
+                        attached to the office component context and to the
+                        document of the macro (or the current document),
+                        office calls are local function calls. Other
+                        connection arguments are ignored.
+        """
+        self._sheets = None
+        self._fields = None
+        self._number_formats = {}
+        self._connection_string = connection_string
+        self._session = session
+        self._temp_dir = None
+        self._in_office = script_context is not None
+        self._deadlines = {}
+        self._dispatcher = _Dispatcher()
+        self._lock = threading.Lock()
+
+        # LibreOffice variables.
+        self._oResolver = None
+        self._oContext = None
+        self._oDesktop = None
+        self._oDoc = None
+        self._oLocal = uno.getComponentContext()
+
+        if session is not None:
+            connection = session._connection
+            self._connection_string = connection._connection_string
+            self._oLocal = connection._oLocal
+            self._oResolver = connection._oResolver
+            self._oContext = connection._oContext
+            self._oDesktop = connection._oDesktop
+            self._dispatcher = connection._dispatcher
+            if deadlines is None:
+                deadlines = connection._deadlines
+        elif script_context is not None:
+            self._oContext = script_context.getComponentContext()
+            self._oDesktop = script_context.getDesktop()
+            self._oDoc = script_context.getDocument() or \
+                self._oDesktop.getCurrentComponent()
+        elif self._oLocal:
+            self._oResolver = \
+                self._oLocal.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.bridge.UnoUrlResolver", self._oLocal)
+            if autostart:
+                self._autostart_office(office, timeout, attempt_period)
+            else:
+                self._init_doc()
+        if deadlines:
+            self.deadlines = deadlines
+
+    def __enter__(self):
+        """
+        PEP 0343 - The “with” statement
+        The specification, background, and examples for the Python with
+        statement.
+
+        The with statement will bind this method’s return value to the
+        target(s) specified in the as clause of the statement, if any.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        PEP 0343 - The “with” statement
+        The specification, background, and examples for the Python with
+        statement.
+
+        Exit the runtime context related to this object.
+        """
+        # Nothing to do
+        pass
+
+    def _autostart_office(self, office, timeout, attempt_period):
+        """
+        Starts Libre/Open Office with a listening socket.
+
+        @type  timeout: int
+        @param timeout: Timeout for starting Libre/Open Office in seconds
+
+        @type  attempt_period: int
+        @param attempt_period: Timeout between attempts in seconds
+
+        @type  office: string
+        @param office: Libre/Open Office startup string
+        """
+        #######################################################################
+        def start_office_instance(_office):
+            """
+            Starts Libre/Open Office with a listening socket.
+
+            @type  office: string
+            @param office: Libre/Open Office startup string
+            """
+            # Fork to execute Office
+            if os.fork():
+                return
+
+            # Start OpenOffice.org and report any errors that occur.
+            try:
+                retcode = subprocess.call(_office, shell=True)
+                if retcode < 0:
+                    raise OSError(retcode, "Office was terminated by signal")
+                elif retcode > 0:
+                    raise OSError(retcode, "Office returned")
+            except OSError as ose:
+                raise OSError(ose)
+
+            # Terminate this process when Office has closed.
+            raise SystemExit()
+
+        #######################################################################
+        waiting = False
+        try:
+            self._init_doc()
+        except NoConnectException as e:
+            waiting = True
+            start_office_instance(office)
+        except DisposedException as e:
+            waiting = True
+
+        if waiting:
+            exception = None
+            steps = int(timeout/attempt_period)
+            for i in range(steps + 1):
+                try:
+                    self._init_doc()
+                    break
+                except (NoConnectException, DisposedException) as e:
+                    exception = e
+                    time.sleep(attempt_period)
+            else:
+                if exception:
+                    raise NoConnectException(exception)
+                else:
+                    raise NoConnectException()
+
+    def _init_doc(self):
+        """
+        Initialize Libre/Open Office connection
+        """
+        try:
+            if self._oResolver:
+                self._oContext = self._oResolver.resolve(
+                    self._connection_string)
+                self._oDesktop = self._oContext.ServiceManager.\
+                    createInstanceWithContext(
+                                        "com.sun.star.frame.Desktop",
+                                        self._oContext)
+        except NoConnectException as e:
+            raise (e)
+        except IllegalArgumentException as e:
+            raise (e)
+        except RuntimeException as e:
+            raise (e)
+
+    @property
+    def is_null(self):
+        """
+        Checking if the document object is initialized
+
+        @rtype:   bool
+        @return:  Document object state
+        """
+        result = False
+        if self._oDesktop is None:
+            result = True
+        return result
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def deadlines(self):
+        """
+        Get deadlines of operations.
+
+        Operations: "open" (open/new document), "save", "close",
+        "calculate", "cell" (cell and field value calls), "range" (range
+        calls, replace_all(), snapshot()), "rows" (row insertion, table
+        resizing, sheet insertion and removal), "job" (whole Supervisor
+        job) and "default" for the operations without their own deadline.
+        A call made by another operation (e.g. cell calls of a job) is bound
+        by the tighter of its own deadline and the rest of the outer one.
+
+        A call exceeding its deadline raises DeadlineExceeded and quarantines
+        the connection: every following call of the documents sharing the
+        connection raises DeadlineExceeded too. Open a new connection (or
+        let the Supervisor recover) to continue.
+
+        "wait" bounds waiting for the calls of other threads sharing the
+        connection, the deadline of the operation by default. Exceeding it
+        raises DeadlineExceeded without quarantining the connection.
+
+        @rtype:   dict
+        @return:  Deadlines in seconds by operation
+        """
+        return dict(self._deadlines)
+
+    @deadlines.setter
+    def deadlines(self, value):
+        """
+        Set deadlines of operations.
+
+        @type  value: dict
+        @param value: Deadlines in seconds by operation. None or an empty
+                      dict - no deadlines
+        """
+        deadlines = dict(value or {})
+        for operation, timeout in deadlines.items():
+            if operation not in _DEADLINE_OPERATIONS:
+                raise ValueError("Unknown operation '{0}'".format(operation))
+            if timeout is not None and timeout <= 0:
+                raise ValueError("Deadline of '{0}' must be a positive "
+                                 "number".format(operation))
+        self._deadlines = deadlines
+
+    @property
+    def in_office(self):
+        """
+        Checking if the document runs inside of the office (macro).
+
+        @rtype:   bool
+        @return:  True - in-office execution, False - remote connection
+        """
+        return self._in_office
+
+    @in_office.setter
+    def in_office(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("in_office"))
+
+    @_deadline("job")
+    def run_in_office(self, script, *args, location="user"):
+        """
+        Run a Python macro inside of the office process.
+
+        Code making many small calls runs as a macro without a bridge round
+        trip per call, only the arguments and the result cross the bridge.
+
+        @type  script: string
+        @param script: Macro module and function, "module.py$function"
+
+        @type  args: tuple
+        @param args: Macro arguments (strings, numbers, bools)
+
+        @type  location: string
+        @param location: Macro location: "user", "share" or "document"
+
+        @rtype:   object
+        @return:  Macro result
+        """
+        if 0 == len(script):
+            raise ValueError("'script' is an empty string")
+        if self._oContext is None:
+            return None
+        if "document" == location:
+            oProvider = self._oDoc.getScriptProvider()
+        else:
+            oFactory = self._oContext.ServiceManager.\
+                createInstanceWithContext(
+                    "com.sun.star.script.provider."
+                    "MasterScriptProviderFactory", self._oContext)
+            oProvider = oFactory.createScriptProvider("")
+        oScript = oProvider.getScript(
+            "vnd.sun.star.script:{0}?language=Python&location={1}".format(
+                script, location))
+        return oScript.invoke(tuple(args), (), ())[0]
+
+    def render_in_office(self, template_name, values, out_name,
+                         filter_name=""):
+        """
+        Create the document from the template inside of the office.
+
+        Runs the render() macro of pyoocalc_runner.py, see the module for
+        the installation.
+
+        @type  template_name: string
+        @param template_name: Template document name
+
+        @type  values: dict
+        @param values: Values by field names. A key can be a field name or
+                       a tuple (field name, column, row), see
+                       Field.set_value()
+
+        @type  out_name: string
+        @param out_name: Result document name
+
+        @type  filter_name: string
+        @param filter_name: file type, see save_document()
+
+        @rtype:   dict
+        @return:  "result" (operation result) and "elapsed" (macro time in
+                  seconds)
+        """
+        values = json.dumps([[list(key) if isinstance(key, tuple) else key,
+                              value] for key, value in values.items()])
+        return json.loads(self.run_in_office(
+            "pyoocalc_runner.py$render", os.path.abspath(template_name),
+            values, os.path.abspath(out_name), filter_name))
+
+    @property
+    def quarantined(self):
+        """
+        Checking if the connection is quarantined after an exceeded deadline.
+
+        @rtype:   bool
+        @return:  Connection state
+        """
+        return self._dispatcher.quarantined
+
+    @quarantined.setter
+    def quarantined(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("quarantined"))
+
+    def _call(self, operation, function, *args, **kwargs):
+        """
+        Call the function within the deadline of the operation.
+
+        @type  operation: string
+        @param operation: Operation name, see the 'deadlines' property
+
+        @type  function: callable
+        @param function: Function calling the office
+
+        @rtype:   object
+        @return:  Function result
+        """
+        timeout = self._deadlines.get(operation,
+                                      self._deadlines.get("default"))
+        return self._dispatcher.call(
+            timeout, self._deadlines.get("wait", timeout), function, *args,
+            **kwargs)
+
+    def _to_properties(self, **args):
+        """
+        Converts '**args' arguments to the tuple of 'PropertyValue's
+
+        @rtype:   tuple
+        @return:  Fields object
+        """
+        props = []
+        for key in args:
+            prop = PropertyValue()
+            prop.Name = key
+            prop.Value = args[key]
+            props.append(prop)
+        return tuple(props)
+
+    @property
+    def o_doc(self):
+        """
+        LibreOffice/OpenOffice Calc document object.
+
+        Required for Fields and Field classes. Not recommended use it directly.
+
+        @rtype:   com::sun::star::lang::XComponent
+        @return:  Libre/Open office document object
+        """
+        return self._oDoc
+
+    @o_doc.setter
+    def o_doc(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("o_doc"))
+
+    @_deadline("open")
+    def _open_document(self, doc_name="", properties=()):
+        """
+        Open document.
+
+        @type  doc_name: string
+        @param doc_name: Document name.
+
+        @type  properties: tuple
+        @param properties: Load properties (PropertyValue)
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if self._oDesktop:
+            try:
+                self._oDoc = self._oDesktop.loadComponentFromURL(
+                    doc_name, "_blank", 0, properties)
+                self._number_formats = {}
+                result = True
+            except IllegalArgumentException as e:
+                raise (e)
+            except IOException as e:
+                raise (e)
+        return result
+
+    def new_document(self):
+        """
+        Create new document.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        return self._open_document("private:factory/scalc")
+
+    def open_document(self, doc_name, profile=None):
+        """
+        Open document.
+
+        @type  doc_name: string
+        @param doc_name: Document name.
+
+        @type  profile: string or list
+        @param profile: Open profile name or names combined:
+                        "default" - visible, editable, as configured
+                        "hidden" - no window is created
+                        "read_only" - no edit setup
+                        "no_macros" - macros are never executed
+                        "no_link_update" - links are not updated
+                        "preview" - read only preview load. All sheets
+                                    are loaded, the import filters cannot
+                                    load only some sheets
+                        "ingest" - hidden, read_only, no_macros and
+                                   no_link_update
+                        Example: profile=("hidden", "no_macros")
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if len(doc_name) > 0:
+            properties = self._to_properties(**_open_properties(profile))
+            doc_name = unohelper.systemPathToFileUrl(doc_name)
+            result = self._open_document(doc_name, properties)
+        else:
+            raise ValueError("'doc_name' is an empty string")
+        return result
+
+    @_deadline("save")
+    def save_document(self, doc_name="", filter_name=""):
+        """
+        Save document.
+
+        @type  doc_name: string
+        @param doc_name: Document name. If no document name defined the current
+                        name is used.
+
+        @type  filter_name: string
+        @param filter_name: file type:
+                            # ods=""
+                            # pdf="calc_pdf_Export"
+                            # csv="Text - txt - csv (StarCalc)"
+                            # xls="calc_MS_Excel_40"
+                            # xlsx="Calc Office Open XML"
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if self._oDoc:
+            if 0 == len(doc_name):
+                self._oDoc.store()
+            else:
+                full_file_name = unohelper.systemPathToFileUrl(doc_name)
+                try:
+                    self._oDoc.storeToURL(
+                                full_file_name,
+                                self._to_properties(FilterName=filter_name))
+                    result = True
+                except IllegalArgumentException as e:
+                    raise IllegalArgumentException(e)
+                except ErrorCodeIOException as e:
+                    raise ErrorCodeIOException(e)
+                except IOException as e:
+                    raise IOException(e)
+        return result
+
+    @_deadline("close")
+    def close_document(self):
+        """
+        Close document.
+
+        Close current document.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        try:
+            if self._oDoc:
+                self._oDoc.close(True)
+                self._oDoc = None
+                result = True
+        except ErrorCodeIOException as e:
+            raise ErrorCodeIOException(e)
+        except IOException as e:
+            raise IOException(e)
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+        if self._session is None:
+            # Own connection, do not keep the worker thread of an idle
+            # connection
+            self._dispatcher.close()
+        return result
+
+    def _stored_file_name(self, directory):
+        """
+        Get file name of the document content saved on disk.
+
+        Modified or never saved documents are stored into the 'directory'.
+
+        @rtype:   string
+        @return:  File name
+        """
+        if self._oDoc.hasLocation() and not self._oDoc.isModified():
+            return unohelper.fileUrlToSystemPath(self._oDoc.getURL())
+        file_name = os.path.join(directory, "document.ods")
+        self._oDoc.storeToURL(unohelper.systemPathToFileUrl(file_name),
+                              self._to_properties(FilterName="calc8"))
+        return file_name
+
+    def export_sheets(self, filter_name, out_dir, workers=1, extension=None,
+                      connection_strings=None):
+        """
+        Export every sheet into a separate file.
+
+        Sheets are exported concurrently by 'workers' threads, every thread
+        has its own office connection and loads the document once.
+        Results are generated as soon as the sheets are exported.
+
+        @type  filter_name: string
+        @param filter_name: file type, see save_document()
+
+        @type  out_dir: string
+        @param out_dir: Output directory. File name is the sheet name.
+
+        @type  workers: int
+        @param workers: Number of concurrent exports
+
+        @type  extension: string
+        @param extension: File name extension. Default is based on the filter
+
+        @type  connection_strings: list
+        @param connection_strings: Office connection strings distributed
+                            between workers. Several office instances are
+                            required to export in parallel, a single office
+                            serializes the exports. Default is the
+                            connection string of this document.
+
+        @rtype:   generator
+        @return:  (sheet name, file name) tuples in order of completion
+        """
+        if workers <= 0:
+            raise ValueError("'workers' must be a positive number")
+        if 0 == len(out_dir):
+            raise ValueError("'out_dir' is an empty string")
+        if extension is None:
+            extension = _FILTER_EXTENSIONS.get(filter_name)
+            if extension is None:
+                raise ValueError(
+                    "Unknown extension of the filter '{0}'".format(
+                        filter_name))
+        return self._export_sheets(filter_name, out_dir, workers, extension,
+                                   connection_strings)
+
+    def _export_sheets(self, filter_name, out_dir, workers, extension,
+                       connection_strings):
+        """
+        Generator of export_sheets() with the validated arguments.
+        """
+        if not self._oDoc:
+            return
+
+        def source(temp_dir):
+            return (self._oDoc.getSheets().getElementNames(),
+                    self._stored_file_name(temp_dir))
+
+        def store_sheet(doc, name):
+            oSheet = doc.o_doc.getSheets().getByName(name)
+            # CSV and similar filters export the active sheet only
+            doc.o_doc.getCurrentController().setActiveSheet(oSheet)
+            properties = {"FilterName": filter_name}
+            if filter_name.endswith("_pdf_Export"):
+                properties["FilterData"] = uno.Any(
+                    "[]com.sun.star.beans.PropertyValue",
+                    doc._to_properties(Selection=oSheet))
+            file_name = os.path.join(out_dir, "{0}.{1}".format(name,
+                                                               extension))
+            uno.invoke(doc.o_doc, "storeToURL",
+                       (unohelper.systemPathToFileUrl(file_name),
+                        doc._to_properties(**properties)))
+            return file_name
+
+        def export_sheet(name):
+            doc = pool.document()
+            return doc._call("save", store_sheet, doc, name)
+
+        temp_dir = tempfile.mkdtemp(prefix="pyoocalc")
+        try:
+            names, file_name = self._call("save", source, temp_dir)
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        pool = _DocumentPool(file_name,
+                             connection_strings or [self._connection_string])
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = dict((executor.submit(export_sheet, name), name)
+                               for name in names)
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            pool.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @property
+    @_deadline("calculate")
+    def automatic_calculation(self):
+        """
+        Get automatic calculation mode of the document.
+
+        @rtype:   bool
+        @return:  True if formulas are recalculated on every change
+        """
+        result = False
+        if self._oDoc:
+            result = self._oDoc.isAutomaticCalculationEnabled()
+        return result
+
+    @automatic_calculation.setter
+    @_deadline("calculate")
+    def automatic_calculation(self, value):
+        """
+        Enable or disable automatic calculation of the document.
+
+        @type  value: bool
+        @param value: False defers the calculation until recalculate()
+        """
+        if self._oDoc:
+            self._oDoc.enableAutomaticCalculation(bool(value))
+
+    @_deadline("calculate")
+    def recalculate(self, hard=False):
+        """
+        Recalculate formulas of the document.
+
+        @type  hard: bool
+        @param hard: Recalculate all formulas, not only the dirty ones
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        result = False
+        if self._oDoc:
+            if hard:
+                self._oDoc.calculateAll()
+            else:
+                self._oDoc.calculate()
+            result = True
+        return result
+
+    @_deadline("range")
+    def _number_format_key(self, number_format):
+        """
+        Get the number format key, the format is added if it is new.
+        Keys are cached per document.
+
+        @type  number_format: string
+        @param number_format: Number format string ("#,##0.00")
+
+        @rtype:   int
+        @return:  Number format key
+        """
+        key = self._number_formats.get(number_format)
+        if key is None:
+            oFormats = self._oDoc.getNumberFormats()
+            oLocale = uno.createUnoStruct("com.sun.star.lang.Locale")
+            key = oFormats.queryKey(number_format, oLocale, False)
+            if -1 == key:
+                key = oFormats.addNew(number_format, oLocale)
+            self._number_formats[number_format] = key
+        return key
+
+    @_deadline("range")
+    def replace_all(self, mapping, sheets=None, match_case=True):
+        """
+        Replace text placeholders in all cells.
+
+        Every placeholder is replaced by the office in one call per sheet.
+
+        @type  mapping: dict
+        @param mapping: Replacement text by placeholder ("${CUSTOMER}").
+                        Placeholders and replacements are strings
+
+        @type  sheets: list
+        @param sheets: Sheet indexes or names. None - all sheets
+
+        @type  match_case: bool
+        @param match_case: Case sensitive search
+
+        @rtype:   dict
+        @return:  Number of replacements by placeholder
+        """
+        # The whole mapping is checked before the document is changed
+        for key, value in mapping.items():
+            if not isinstance(key, str):
+                raise ValueError("Placeholder {0!r} is not a string".format(
+                    key))
+            if 0 == len(key):
+                raise ValueError("Placeholder is an empty string")
+            if not isinstance(value, str):
+                raise ValueError(
+                    "Replacement of '{0}' is not a string".format(key))
+        result = dict((key, 0) for key in mapping)
+        if self._oDoc:
+            oSheets = self._oDoc.getSheets()
+            if sheets is None:
+                sheets = range(oSheets.getCount())
+            oSheetList = []
+            for index_or_name in sheets:
+                if isinstance(index_or_name, int):
+                    oSheetList.append(oSheets.getByIndex(index_or_name))
+                else:
+                    oSheetList.append(oSheets.getByName(index_or_name))
+            for oSheet in oSheetList:
+                oDescriptor = oSheet.createReplaceDescriptor()
+                oDescriptor.SearchCaseSensitive = match_case
+                oDescriptor.SearchRegularExpression = False
+                for key, value in mapping.items():
+                    oDescriptor.setSearchString(key)
+                    oDescriptor.setReplaceString(value)
+                    result[key] += oSheet.replaceAll(oDescriptor)
+        return result
+
+    @_deadline("range")
+    def snapshot(self, block_cells=65536):
+        """
+        Read all sheets into a columnar in-memory snapshot.
+
+        Used area of every sheet is read by blocks of rows (one bridge call
+        per block) and stored column-wise in compact typed arrays.
+
+        @type  block_cells: int
+        @param block_cells: Approximate number of cells read per bridge call
+
+        @rtype:   Snapshot
+        @return:  Snapshot object
+        """
+        if block_cells <= 0:
+            raise ValueError("'block_cells' must be a positive number")
+        result = Snapshot()
+        if self._oDoc:
+            oSheets = self._oDoc.getSheets()
+            for index in range(oSheets.getCount()):
+                oSheet = oSheets.getByIndex(index)
+                oCursor = oSheet.createCursor()
+                oCursor.gotoEndOfUsedArea(False)
+                oAddress = oCursor.getRangeAddress()
+                n_columns = oAddress.EndColumn + 1
+                n_rows = oAddress.EndRow + 1
+                sheet = result._add_sheet(oSheet.getName(), n_columns)
+                block_rows = max(1, block_cells // n_columns)
+                for start_row in range(0, n_rows, block_rows):
+                    end_row = min(n_rows, start_row + block_rows) - 1
+                    oRange = oSheet.getCellRangeByPosition(
+                        0, start_row, n_columns - 1, end_row)
+                    sheet._append_rows(oRange.getDataArray())
+        return result
+
+    @property
+    def sheets(self):
+        """
+        Get Sheets document's object.
 
-        @rtype:   bool
-        @return:  Operation result
+        @rtype:   Sheets
+        @return:  Sheets object
         """
-        if 0 == len(name):
-            raise ValueError("'name' is an empty string")
-        if sheet < 0:
-            raise ValueError("'sheet' must be >= 0")
-        if column < 0:
-            raise ValueError("'column' must be >= 0")
-        if row < 0:
-            raise ValueError("'row' must be >= 0")
-        cell_address = uno.createUnoStruct("com.sun.star.table.CellAddress")
-        cell_address.Sheet = sheet
-        cell_address.Column = column
-        cell_address.Row = row
-        if self._oNamedRanges:
-            self._oNamedRanges.addNewByName(name, value, cell_address, 0)
-        return None
+        if self._sheets is None:
+            # Wait for the connection outside of the document lock, a call
+            # holding the connection may get the sheets too
+            sheets = self._call("cell", Sheets, self)
+            with self._lock:
+                if self._sheets is None:
+                    self._sheets = sheets
+        return self._sheets
 
-    def remove(self, name):
+    @sheets.setter
+    def sheets(self, value):
         """
-        Not implemented yet. FIXME
-        Removes a field (named range) from the collection.
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("sheets"))
 
-        @type  name: string
-        @param name: the new name of the named range.
+    @property
+    def fields(self):
+        """
+        Get Fields document's object.
 
-        @rtype:   bool
-        @return:  Operation result
+        @rtype:   Fields
+        @return:  Fields object
         """
-        result = False
-        if 0 == len(name):
-            raise ValueError("'name' is an empty string")
-        if self._oNamedRanges:
-            self._oNamedRanges.removeByName(name)
-            result = True
-        return result
+        if self._fields is None:
+            # Wait for the connection outside of the document lock, a call
+            # holding the connection may get the fields too
+            fields = self._call("cell", Fields, self)
+            with self._lock:
+                if self._fields is None:
+                    self._fields = fields
+        return self._fields
+
+    @fields.setter
+    def fields(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("fields"))
+
+    def replica(self, connection_string=None):
+        """
+        Open a read-only copy of the document on a new connection.
+
+        Calls on one connection are serialized, a replica lets other
+        threads read the same content concurrently. Modified or never saved
+        documents are copied with the current content. Changes made after
+        the replica is opened are not visible in the replica.
+
+        @type  connection_string: string
+        @param connection_string: Connection string of the replica. Default
+                                  is the connection string of this document.
+                                  An office instance serves the calls of
+                                  all its connections one by one, use
+                                  another office for truly parallel reads.
+
+        @rtype:   Document
+        @return:  Document object, None if no document is open
+        """
+        doc = None
+        if self._oDoc:
+            temp_dir = tempfile.mkdtemp(prefix="pyoocalc")
+            try:
+                file_name = self._call("save", self._stored_file_name,
+                                       temp_dir)
+                doc = Document(
+                    connection_string=connection_string or
+                    self._connection_string, deadlines=self._deadlines)
+                doc._open_document(unohelper.systemPathToFileUrl(file_name),
+                                   doc._to_properties(Hidden=True,
+                                                      ReadOnly=True))
+            except BaseException:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise
+            # The office keeps the file open, it is removed by
+            # close_document() of the replica
+            doc._temp_dir = temp_dir
+        return doc
+
+    @property
+    def version(self):
+        """
+        Get library version.
+
+        @rtype:   string
+        @return:  library version
+        """
+        return __version__
+
+    @version.setter
+    def version(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("version"))
 
 ###############################################################################
 ###############################################################################
 ###############################################################################
 
 
-class Sheet:
+class Session:
     """
-    Document sheet.
-    Manage sheet and cells.
+    Office connection shared by several documents.
+
+    Opens, tracks and closes documents over one connection. The number of
+    open documents can be limited, the least recently used document is
+    closed (without saving) when the limit is reached.
+
+    A session can be shared between threads, office calls of its documents
+    are serialized by the connection.
     """
 
-    def __init__(self, sheets, index_or_name):
+    def __init__(self,
+                 autostart=False,
+                 office='soffice \
+--accept="socket,host=localhost,port=2002;urp;"',
+                 connection_string="\
+uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext",
+                 timeout=30,
+                 attempt_period=0.1,
+                 max_documents=0,
+                 deadlines=None):
         """
         Constructor
 
-        @type  sheets: Sheets
-        @param sheets: Sheets object
+        See Document constructor for the connection arguments.
 
-        @type  index_or_name: int or string
-        @param index_or_name: Sheet index or sheet name
+        @type  max_documents: int
+        @param max_documents: Maximal number of open documents. 0 - no limit
+
+        @type  deadlines: dict
+        @param deadlines: Deadlines of operations of the session documents,
+                          see Document.deadlines
         """
+        if max_documents < 0:
+            raise ValueError("'max_documents' must be >= 0")
+        self._max_documents = max_documents
+        self._lock = threading.RLock()
+        self._documents = OrderedDict()
+        self._new_documents = 0
+        self._connection = Document(autostart, office, connection_string,
+                                    timeout, attempt_period,
+                                    deadlines=deadlines)
 
-        self._sheets = sheets
-        self._is_null = True
+    def __enter__(self):
+        """
+        PEP 0343 - The “with” statement
+        """
+        return self
 
-        # LibreOffice variables.
-        self._oSheet = None
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        PEP 0343 - The “with” statement
 
-        if sheets:
-            if isinstance(index_or_name, int):
-                if index_or_name < 0:
-                    raise ValueError("'index_or_name' must be >= 0")
-                # get by index
-                self._oSheet = self._sheets.o_sheets.getByIndex(index_or_name)
-                self._is_null = False
-            else:
-                if 0 == len(index_or_name):
-                    raise ValueError("'index_or_name' is an empty string")
-                # get by name
-                self._oSheet = self._sheets.o_sheets.getByName(index_or_name)
-                self._is_null = False
-        else:
-            raise ValueError("'sheets' value is None")
+        Close all documents of the session.
+        """
+        self.close_all()
 
     @property
     def is_null(self):
         """
-        Checking if the sheet is null.
+        Checking if the session connection is initialized
 
         @rtype:   bool
-        @return:  Value insertion result
+        @return:  Session state
         """
-        return self._is_null
+        return self._connection.is_null
 
     @is_null.setter
     def is_null(self, value):
@@ -441,597 +3772,1208 @@ class Sheet:
         """
         raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
 
-    def set_cell_value_by_index(self, value, col, row, is_formula=False):
+    @property
+    def count(self):
         """
-        Set cell value.
+        Get number of open documents.
 
-        @type  value: string
-        @param value: Cell value
+        @rtype:   int
+        @return:  the number of open documents
+        """
+        return len(self._documents)
 
-        @type  col: int
-        @param col: Cell column index
+    @count.setter
+    def count(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
 
-        @type  row: int
-        @param row: Cell row index
+    @property
+    def documents(self):
+        """
+        Get open documents, the least recently used first.
 
-        @type  is_formula: bool
-        @param is_formula: Not supported yet
+        @rtype:   list
+        @return:  Document objects
+        """
+        with self._lock:
+            return list(self._documents.values())
+
+    @documents.setter
+    def documents(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("documents"))
+
+    def _add(self, key, doc):
+        """
+        Register the document and close the least recently used documents
+        above the limit.
+        """
+        self._documents[key] = doc
+        while self._max_documents and \
+                len(self._documents) > self._max_documents:
+            key, lru_doc = self._documents.popitem(last=False)
+            lru_doc.close_document()
+
+    def new_document(self):
+        """
+        Create new document.
+
+        @rtype:   Document
+        @return:  Document object
+        """
+        doc = Document(session=self)
+        doc.new_document()
+        with self._lock:
+            self._new_documents += 1
+            self._add(("new", self._new_documents), doc)
+        return doc
+
+    def open_document(self, doc_name, profile=None):
+        """
+        Open document or get already open one.
+
+        @type  doc_name: string
+        @param doc_name: Document name.
+
+        @type  profile: string or list
+        @param profile: Open profile, see Document.open_document(). Used
+                        when the document is not open yet.
+
+        @rtype:   Document
+        @return:  Document object
+        """
+        if 0 == len(doc_name):
+            raise ValueError("'doc_name' is an empty string")
+        key = os.path.abspath(doc_name)
+        with self._lock:
+            doc = self._documents.get(key)
+            if doc is not None:
+                self._documents.move_to_end(key)
+            else:
+                doc = Document(session=self)
+                doc.open_document(doc_name, profile)
+                self._add(key, doc)
+        return doc
+
+    def close_document(self, doc):
+        """
+        Close the document of the session.
+
+        @type  doc: Document
+        @param doc: Document object
 
         @rtype:   bool
         @return:  Operation result
         """
-        if col < 0:
-            raise ValueError("'col' must be >= 0")
-        if row < 0:
-            raise ValueError("'row' must be >= 0")
         result = False
-        oCell = self._oSheet.getCellByPosition(col, row)
-        if is_formula:
-            oCell.setFormula(value)
-            result = True
-        elif isinstance(value, int)\
-                or isinstance(value, float):
-            oCell.setValue(value)
-            result = True
-        else:
-            oCell.setString(value)
-            result = True
+        with self._lock:
+            for key, session_doc in list(self._documents.items()):
+                if session_doc is doc:
+                    del self._documents[key]
+                    result = doc.close_document()
         return result
 
-    def cell_value_by_index(self, col, row, val_type="AUTO"):
+    def close_all(self):
         """
-        Get cell value.
+        Close all documents of the session.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        with self._lock:
+            while self._documents:
+                key, doc = self._documents.popitem(last=False)
+                doc.close_document()
+            self._connection._dispatcher.close()
+        return True
+
+    @_deadline("range")
+    def copy_range(self, src_sheet, src_range, dst_sheet, col, row,
+                   formulas=True):
+        """
+        Copy a cell range between sheets of open documents.
+
+        Within one document the office copy is used (formats are copied
+        too). Between documents the content is copied in one call.
+
+        @type  src_sheet: Sheet
+        @param src_sheet: Source sheet
+
+        @type  src_range: tuple or RangeRef
+        @param src_range: (start column, start row, end column, end row)
+
+        @type  dst_sheet: Sheet
+        @param dst_sheet: Destination sheet
 
         @type  col: int
-        @param col: Cell column index
+        @param col: Destination column index
 
         @type  row: int
-        @param row: Cell row index
+        @param row: Destination row index
 
-        @type  val_type: string
-        @param val_type: Data type of return value
+        @type  formulas: bool
+        @param formulas: Copy formulas, otherwise only values
 
-        @rtype:   long, int, float or string
-        @return:  Value. Value type depends on val_type parameter
+        @rtype:   bool
+        @return:  Operation result
         """
+        start_col, start_row, end_col, end_row = src_range
+        if start_col < 0 or start_row < 0 or end_col < start_col or \
+                end_row < start_row:
+            raise ValueError("'src_range' is not a valid range")
         if col < 0:
             raise ValueError("'col' must be >= 0")
         if row < 0:
             raise ValueError("'row' must be >= 0")
-        value = None
-        oCell = self._oSheet.getCellByPosition(col, row)
+        oSrcRange = src_sheet.o_sheet.getCellRangeByPosition(
+            start_col, start_row, end_col, end_row)
+        src_doc = src_sheet._sheets._document
+        dst_doc = dst_sheet._sheets._document
+        if src_doc.o_doc == dst_doc.o_doc:
+            dst_sheet.o_sheet.copyRange(
+                CellRef(col, row).to_uno(
+                    dst_sheet.o_sheet.getRangeAddress().Sheet),
+                oSrcRange.getRangeAddress())
+        else:
+            oDstRange = dst_sheet.o_sheet.getCellRangeByPosition(
+                col, row, col + end_col - start_col, row + end_row - start_row)
+            if formulas:
+                oDstRange.setFormulaArray(oSrcRange.getFormulaArray())
+            else:
+                oDstRange.setDataArray(oSrcRange.getDataArray())
+        return True
 
-        if val_type == "AUTO":
-            # Return data type is set based on getType()
-            value_type = oCell.getType()
-            if VALUE == value_type:
-                value = oCell.getValue()
-            if FORMULA == value_type:
-                value = oCell.getFormula()
-            if TEXT == value_type:
-                value = oCell.getString()
-        elif val_type == "VALUE":
-            # Force return data type to be cell value
-            value = oCell.getValue()
-        elif val_type == "FORMULA":
-            # Force return data type to be cell formula
-            value = oCell.getFormula()
-        elif val_type == "STRING":
-            # Force return data type to be cell string
-            value = oCell.getString()
-        return value
+    @_deadline("range")
+    def copy_sheet(self, src_doc, name, dst_doc, new_name=None, index=None):
+        """
+        Copy a sheet between open documents.
+
+        @type  src_doc: Document
+        @param src_doc: Source document
+
+        @type  name: string
+        @param name: Source sheet name
+
+        @type  dst_doc: Document
+        @param dst_doc: Destination document
+
+        @type  new_name: string
+        @param new_name: Name of the copy. Default is the source sheet name
+
+        @type  index: int
+        @param index: Position of the copy. Default is after the last sheet
+
+        @rtype:   Sheet
+        @return:  Sheet object of the copy
+        """
+        if 0 == len(name):
+            raise ValueError("'name' is an empty string")
+        oDstSheets = dst_doc.o_doc.getSheets()
+        if index is None:
+            index = oDstSheets.getCount()
+        if index < 0:
+            raise ValueError("'index' must be >= 0")
+        if src_doc.o_doc == dst_doc.o_doc:
+            if not new_name:
+                raise ValueError("'new_name' is required to copy a sheet "
+                                 "within a document")
+            oDstSheets.copyByName(name, new_name, index)
+        else:
+            index = oDstSheets.importSheet(src_doc.o_doc, name, index)
+            if new_name:
+                oDstSheets.getByIndex(index).setName(new_name)
+        return dst_doc.sheets.sheet(index)
 
 ###############################################################################
 ###############################################################################
 ###############################################################################
 
 
-class Sheets:
+class Office:
     """
-    Document sheets.
-    Search and manage sheets.
+    Libre/Open Office process managed by the library.
     """
 
-    def __init__(self, document):
+    def __init__(self,
+                 office='soffice --headless --norestore --nologo --nodefault \
+--accept="socket,host=localhost,port=2002;urp;"',
+                 connection_string="\
+uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext",
+                 timeout=30,
+                 attempt_period=0.1):
         """
         Constructor
 
-        @type  document: Document
-        @param document: Document object
-        """
-        self._document = document
-        self._sheet = None
+        @type  office: string
+        @param office: Libre/Open Office startup string
 
-        # LibreOffice variables.
-        self._oSheets = None
-        if self._document:
-            self._oSheets = self._document.o_doc.getSheets()
-        else:
-            raise ValueError("'document' value is None")
+        @type  connection_string: string
+        @param connection_string: Libre/Open office initialization string
+
+        @type  timeout: int
+        @param timeout: Timeout for starting Libre/Open Office in seconds
+
+        @type  attempt_period: int
+        @param attempt_period: Timeout between attempts in seconds
+        """
+        self._office = office
+        self._connection_string = connection_string
+        self._timeout = timeout
+        self._attempt_period = attempt_period
+        self._process = None
 
     @property
-    def is_null(self):
+    def connection_string(self):
         """
-        Checking if the document object is initialized
+        Get office connection string.
 
-        @rtype:   bool
-        @return:  Document object state
+        @rtype:   string
+        @return:  Libre/Open office initialization string
         """
-        result = False
-        if self._oSheets is None:
-            result = True
-        return result
+        return self._connection_string
 
-    @is_null.setter
-    def is_null(self, value):
+    @connection_string.setter
+    def connection_string(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("connection_string"))
 
-    def sheet(self, index_or_name):
+    @property
+    def pid(self):
         """
-        Get sheet by index or name.
+        Get office process id.
 
-        @type  index_or_name: int, string
-        @param index_or_name: Sheet index or name
+        @rtype:   int
+        @return:  Process id or None if the office is not started
+        """
+        result = None
+        if self._process:
+            result = self._process.pid
+        return result
 
-        @rtype:   Sheet
-        @return:  Sheet object
+    @pid.setter
+    def pid(self, value):
         """
-        return Sheet(self, index_or_name)
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("pid"))
 
     @property
-    def count(self):
+    def is_running(self):
         """
-        Get number of sheets in document.
+        Checking if the office process is running.
 
-        @rtype:   int
-        @return:  the number of sheets in document.
+        @rtype:   bool
+        @return:  Office process state
         """
-        count = 0
-        if self._oSheets:
-            count = self._oSheets.getCount()
-        return count
+        return self._process is not None and self._process.poll() is None
 
-    @count.setter
-    def count(self, value):
+    @is_running.setter
+    def is_running(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_running"))
 
     @property
-    def o_sheets(self):
+    def rss(self):
         """
-        LibreOffice/OpenOffice Calc Spreadsheets object.
+        Get resident memory of the office processes (the office process
+        and its child processes), read from /proc.
 
-        Required for Fields and Field classes. Not recommended use it directly.
+        Only the office process and its children are looked up (the
+        launcher runs the office as a child process), /proc is not
+        scanned.
 
-        @rtype:   com::sun::star::sheet::XSpreadsheets
-        @return:  Libre/Open office Spreadsheets object
+        @rtype:   int
+        @return:  Resident memory in bytes. 0 if the office is not started
         """
-        return self._oSheets
+        result = 0
+        if self.is_running:
+            page_size = os.sysconf("SC_PAGE_SIZE")
+            pids = [self._process.pid]
+            while pids:
+                pid = pids.pop()
+                try:
+                    with open("/proc/{0}/statm".format(pid)) as f:
+                        result += int(f.read().split()[1]) * page_size
+                    with open("/proc/{0}/task/{0}/children".format(
+                            pid)) as f:
+                        pids.extend(int(child) for child in f.read().split())
+                except (OSError, ValueError, IndexError):
+                    # The process has exited
+                    pass
+        return result
 
-    @o_sheets.setter
-    def o_sheets(self, value):
+    @rss.setter
+    def rss(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("o_sheets"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("rss"))
 
-    def insert_spreadsheet(self, name, index):
+    def start(self):
         """
-        Inserts a new sheet into the collection.
+        Start the office and wait until it accepts connections.
 
-        @type  name: string
-        @param name: The name of the new spreadsheet.
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if self.is_running:
+            return True
+        # New session, so the office and its child processes can be stopped
+        # together.
+        self._process = subprocess.Popen(shlex.split(self._office),
+                                         start_new_session=True)
+        exception = None
+        steps = int(self._timeout / self._attempt_period)
+        for i in range(steps + 1):
+            try:
+                Document(connection_string=self._connection_string)
+                return True
+            except (NoConnectException, DisposedException) as e:
+                exception = e
+                if not self.is_running:
+                    break
+                time.sleep(self._attempt_period)
+        self.stop()
+        if exception:
+            raise NoConnectException(exception)
+        raise NoConnectException()
 
-        @type  index: int
-        @param index: The index of the new spreadsheet in the collection.
+    def stop(self, timeout=10):
+        """
+        Stop the office process (and its child processes).
+
+        @type  timeout: int
+        @param timeout: Time to wait for termination before killing
 
         @rtype:   bool
         @return:  Operation result
         """
-        if index < 0:
-            raise ValueError("'index' must be >= 0")
-        if 0 == len(name):
-            raise ValueError("'name' is an empty string")
         result = False
-        if self.o_sheets:
-            self.o_sheets.insertNewByName(name, index)
+        if self._process:
+            for sig in (signal.SIGTERM, signal.SIGKILL):
+                try:
+                    os.killpg(self._process.pid, sig)
+                except OSError:
+                    pass
+                try:
+                    self._process.wait(timeout)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+            self._process = None
             result = True
         return result
 
-    def remove_spreadsheet(self, name):
+    def restart(self):
         """
-        Inserts a new sheet into the collection.
-
-        @type  name: string
-        @param name: The name of the removing spreadsheet.
+        Restart the office.
 
         @rtype:   bool
         @return:  Operation result
         """
-        if 0 == len(name):
-            raise ValueError("'name' is an empty string")
-        result = False
-        if self.o_sheets:
-            self.o_sheets.removeByName(name)
-            result = True
-        return result
+        self.stop()
+        return self.start()
 
 ###############################################################################
 ###############################################################################
 ###############################################################################
 
 
-class Document:
-    def __init__(self,
-                 autostart=False,
-                 office='soffice \
---accept="socket,host=localhost,port=2002;urp;"',
-                 connection_string="\
-uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext",
-                 timeout=30,
-                 attempt_period=0.1):
-        """
-        Constructor
-
-        @type  autostart: bool
-        @param autostart: Auto Starts Libre/Open Office with a listening socket
-
-        @type  office: string
-        @param office: Libre/Open Office startup string
-
-        @type  connection_string: string
-        @param connection_string: Libre/Open office initialization string
+class RecyclePolicy:
+    """
+    Office recycling policy.
 
-        @type  timeout: int
-        @param timeout: Timeout for starting Libre/Open Office in seconds
+    The office is restarted between jobs when it has processed too many
+    documents or uses too much memory.
+    """
 
-        @type  attempt_period: int
-        @param attempt_period: Timeout between attempts in seconds
+    def __init__(self, max_documents=0, max_rss=0):
         """
-        self._sheets = None
-        self._fields = None
-        self._connection_string = connection_string
-
-        # LibreOffice variables.
-        self._oResolver = None
-        self._oContext = None
-        self._oDesktop = None
-        self._oDoc = None
-        self._oLocal = uno.getComponentContext()
+        Constructor
 
-        if self._oLocal:
-            self._oResolver = \
-                self._oLocal.ServiceManager.createInstanceWithContext(
-                    "com.sun.star.bridge.UnoUrlResolver", self._oLocal)
-            if autostart:
-                self._autostart_office(office, timeout, attempt_period)
-            else:
-                self._init_doc()
+        @type  max_documents: int
+        @param max_documents: Documents processed before restart. 0 - no limit
 
-    def __enter__(self):
+        @type  max_rss: int
+        @param max_rss: Office resident memory in bytes. 0 - no limit
         """
-        PEP 0343 - The “with” statement
-        The specification, background, and examples for the Python with
-        statement.
-
-        The with statement will bind this method’s return value to the
-        target(s) specified in the as clause of the statement, if any.
+        if max_documents < 0:
+            raise ValueError("'max_documents' must be >= 0")
+        if max_rss < 0:
+            raise ValueError("'max_rss' must be >= 0")
+        self._max_documents = max_documents
+        self._max_rss = max_rss
+
+    def need_recycle(self, office, documents):
         """
-        return self
+        Checking if the office must be restarted.
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """
-        PEP 0343 - The “with” statement
-        The specification, background, and examples for the Python with
-        statement.
+        @type  office: Office
+        @param office: Managed office
 
-        Exit the runtime context related to this object.
-        """
-        # Nothing to do
-        pass
+        @type  documents: int
+        @param documents: Documents processed since the office start
 
-    def _autostart_office(self, office, timeout, attempt_period):
+        @rtype:   bool
+        @return:  True if a threshold is exceeded
         """
-        Starts Libre/Open Office with a listening socket.
+        if self._max_documents and documents >= self._max_documents:
+            return True
+        if self._max_rss and office.rss >= self._max_rss:
+            return True
+        return False
 
-        @type  timeout: int
-        @param timeout: Timeout for starting Libre/Open Office in seconds
+###############################################################################
+###############################################################################
+###############################################################################
 
-        @type  attempt_period: int
-        @param attempt_period: Timeout between attempts in seconds
 
-        @type  office: string
-        @param office: Libre/Open Office startup string
+class Supervisor:
+    """
+    Supervised office for long running workers.
+
+    Jobs are run on documents of the supervised connection. When the office
+    crashes or hangs the office is restarted, the connection is reopened and
+    the job is retried, up to 'retries' times. Only idempotent jobs must be
+    run this way (open, convert, render from template).
+    """
+
+    def __init__(self, office=None, retries=2, ping_timeout=5, policy=None,
+                 deadlines=None):
         """
-        #######################################################################
-        def start_office_instance(_office):
-            """
-            Starts Libre/Open Office with a listening socket.
+        Constructor
 
-            @type  office: string
-            @param office: Libre/Open Office startup string
-            """
-            # Fork to execute Office
-            if os.fork():
-                return
+        @type  office: Office
+        @param office: Managed office. Default is Office()
 
-            # Start OpenOffice.org and report any errors that occur.
-            try:
-                retcode = subprocess.call(_office, shell=True)
-                if retcode < 0:
-                    raise OSError(retcode, "Office was terminated by signal")
-                elif retcode > 0:
-                    raise OSError(retcode, "Office returned")
-            except OSError as ose:
-                raise OSError(ose)
+        @type  retries: int
+        @param retries: Number of retries of a failed job
 
-            # Terminate this process when Office has closed.
-            raise SystemExit()
+        @type  ping_timeout: int
+        @param ping_timeout: Time in seconds to wait for the office answer
+                             before the office is considered as hung
 
-        #######################################################################
-        waiting = False
-        try:
-            self._init_doc()
-        except NoConnectException as e:
-            waiting = True
-            start_office_instance(office)
-        except DisposedException as e:
-            waiting = True
+        @type  policy: RecyclePolicy
+        @param policy: Office recycling policy. None - no recycling
 
-        if waiting:
-            exception = None
-            steps = int(timeout/attempt_period)
-            for i in range(steps + 1):
-                try:
-                    self._init_doc()
-                    break
-                except (NoConnectException, DisposedException) as e:
-                    exception = e
-                    time.sleep(attempt_period)
-            else:
-                if exception:
-                    raise NoConnectException(exception)
-                else:
-                    raise NoConnectException()
+        @type  deadlines: dict
+        @param deadlines: Deadlines of operations, see Document.deadlines.
+                          The "job" deadline bounds the whole job. A job
+                          exceeding a deadline is retried on a new
+                          connection.
+        """
+        if retries < 0:
+            raise ValueError("'retries' must be >= 0")
+        self._office = office or Office()
+        self._retries = retries
+        self._ping_timeout = ping_timeout
+        self._policy = policy
+        self._deadlines = deadlines
+        self._session = None
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._documents = 0
+        self._recycling = False
+        self._metrics = {"jobs": 0, "retries": 0, "failures": 0,
+                         "restarts": 0, "recycles": 0}
 
-    def _init_doc(self):
+    def __enter__(self):
         """
-        Initialize Libre/Open Office connection
+        PEP 0343 - The “with” statement
         """
-        try:
-            if self._oResolver:
-                self._oContext = self._oResolver.resolve(
-                    self._connection_string)
-                self._oDesktop = self._oContext.ServiceManager.\
-                    createInstanceWithContext(
-                                        "com.sun.star.frame.Desktop",
-                                        self._oContext)
-        except NoConnectException as e:
-            raise (e)
-        except IllegalArgumentException as e:
-            raise (e)
-        except RuntimeException as e:
-            raise (e)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        PEP 0343 - The “with” statement
+
+        Stop the managed office.
+        """
+        self.stop()
 
     @property
-    def is_null(self):
+    def office(self):
         """
-        Checking if the document object is initialized
+        Get managed office.
 
-        @rtype:   bool
-        @return:  Document object state
+        @rtype:   Office
+        @return:  Office object
         """
-        result = False
-        if self._oDesktop is None:
-            result = True
-        return result
+        return self._office
 
-    @is_null.setter
-    def is_null(self, value):
+    @office.setter
+    def office(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("office"))
 
-    def _to_properties(self, **args):
+    @property
+    def metrics(self):
         """
-        Converts '**args' arguments to the tuple of 'PropertyValue's
+        Get supervisor metrics.
+
+        @rtype:   dict
+        @return:  Counters: jobs, retries, failures, restarts, recycles
+        """
+        with self._lock:
+            return dict(self._metrics)
+
+    @metrics.setter
+    def metrics(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("metrics"))
+
+    def _connect(self):
+        """
+        Get the session of the current connection, connect if needed.
 
         @rtype:   tuple
-        @return:  Fields object
+        @return:  (Session, connection generation)
         """
-        props = []
-        for key in args:
-            prop = PropertyValue()
-            prop.Name = key
-            prop.Value = args[key]
-            props.append(prop)
-        return tuple(props)
+        with self._lock:
+            if self._session is None:
+                if not self._office.is_running:
+                    self._office.start()
+                self._session = Session(
+                    connection_string=self._office.connection_string,
+                    deadlines=self._deadlines)
+            return self._session, self._generation
+
+    def ping(self):
+        """
+        Check if the office answers within the ping timeout.
 
-    @property
-    def o_doc(self):
+        @rtype:   bool
+        @return:  Office state
         """
-        LibreOffice/OpenOffice Calc document object.
+        session = self._session
+        if session is None or not self._office.is_running:
+            return False
+        answer = []
 
-        Required for Fields and Field classes. Not recommended use it directly.
+        def call():
+            try:
+                session._connection._oDesktop.getComponents()
+                answer.append(True)
+            except Exception:
+                pass
+        thread = threading.Thread(target=call, daemon=True)
+        thread.start()
+        thread.join(self._ping_timeout)
+        return bool(answer)
+
+    def _drop_session(self):
+        """
+        Forget the session of the current connection and stop its worker
+        thread.
 
-        @rtype:   com::sun::star::lang::XComponent
-        @return:  Libre/Open office document object
+        Called with the lock held.
         """
-        return self._oDoc
+        if self._session is not None:
+            self._session._connection._dispatcher.close()
+            self._session = None
+        self._generation += 1
 
-    @o_doc.setter
-    def o_doc(self, value):
+    def _recover(self, generation):
         """
-        Side-effect protection. Raising an exception 'ValueError'.
+        Restart the office if the connection of the 'generation' is dead.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("o_doc"))
+        with self._lock:
+            if generation != self._generation:
+                # Already recovered by another thread
+                return
+            if not self.ping():
+                self._office.restart()
+                self._metrics["restarts"] += 1
+                self._documents = 0
+            self._drop_session()
 
-    def _open_document(self, doc_name=""):
+    def _recycle(self):
         """
-        Open document.
+        Gracefully restart the office when no job is running.
 
-        @type  doc_name: string
-        @param doc_name: Document name.
+        Called with the lock held.
+        """
+        self._recycling = True
+        try:
+            while self._in_flight:
+                self._idle.wait()
+            if self._session is not None:
+                try:
+                    self._session._connection._oDesktop.terminate()
+                except _RECOVERABLE_EXCEPTIONS:
+                    pass
+            self._office.restart()
+            self._metrics["recycles"] += 1
+            self._documents = 0
+            self._drop_session()
+        finally:
+            self._recycling = False
+            self._idle.notify_all()
+
+    def _begin_job(self):
+        """
+        Wait for the recycling and register the running job.
+        """
+        with self._idle:
+            while self._recycling:
+                self._idle.wait()
+            if self._policy and self._office.is_running and \
+                    self._policy.need_recycle(self._office, self._documents):
+                self._recycle()
+            self._in_flight += 1
+
+    def _end_job(self, finished):
+        """
+        Unregister the finished job attempt.
 
-        @rtype:   bool
-        @return:  Operation result
+        @type  finished: bool
+        @param finished: False if the attempt is retried, a job is counted
+                         by the recycling policy once
         """
-        result = False
-        if self._oDesktop:
-            try:
-                self._oDoc = self._oDesktop.loadComponentFromURL(
-                    doc_name, "_blank", 0, ())
-                result = True
-            except IllegalArgumentException as e:
-                raise (e)
-            except IOException as e:
-                raise (e)
-        return result
+        with self._idle:
+            self._in_flight -= 1
+            if finished:
+                self._documents += 1
+            self._idle.notify_all()
 
-    def new_document(self):
+    def stop(self):
         """
-        Create new document.
+        Stop the managed office.
 
         @rtype:   bool
         @return:  Operation result
         """
-        return self._open_document("private:factory/scalc")
+        with self._lock:
+            self._drop_session()
+            return self._office.stop()
 
-    def open_document(self, doc_name):
+    def run(self, job, *args, **kwargs):
         """
-        Open document.
+        Run the job with retries.
+
+        @type  job: callable
+        @param job: Job function, called as job(document, *args, **kwargs)
+                    with a new Document of the supervised connection. The
+                    document is closed after the job.
+
+        @rtype:   object
+        @return:  Job result
+        """
+        with self._lock:
+            self._metrics["jobs"] += 1
+        attempt = 0
+        while True:
+            generation = None
+            finished = True
+            self._begin_job()
+            try:
+                session, generation = self._connect()
+                doc = Document(session=session)
+                try:
+                    return doc._call("job", job, doc, *args, **kwargs)
+                finally:
+                    try:
+                        doc.close_document()
+                    except _RECOVERABLE_EXCEPTIONS:
+                        pass
+            except _RECOVERABLE_EXCEPTIONS:
+                if attempt >= self._retries:
+                    with self._lock:
+                        self._metrics["failures"] += 1
+                    raise
+                finished = False
+                attempt += 1
+                with self._lock:
+                    self._metrics["retries"] += 1
+                if generation is None:
+                    generation = self._generation
+                self._recover(generation)
+            finally:
+                self._end_job(finished)
+
+    def convert(self, doc_name, out_name, filter_name=""):
+        """
+        Convert the document.
 
         @type  doc_name: string
-        @param doc_name: Document name.
+        @param doc_name: Source document name
+
+        @type  out_name: string
+        @param out_name: Result document name
+
+        @type  filter_name: string
+        @param filter_name: file type, see Document.save_document()
 
         @rtype:   bool
         @return:  Operation result
         """
-        result = False
-        if len(doc_name) > 0:
-            doc_name = unohelper.systemPathToFileUrl(doc_name)
-            result = self._open_document(doc_name)
-        else:
-            raise ValueError("'doc_name' is an empty string")
-        return result
+        def job(doc):
+            doc.open_document(doc_name)
+            return doc.save_document(out_name, filter_name)
+        return self.run(job)
 
-    def save_document(self, doc_name="", filter_name=""):
+    def render(self, template_name, values, out_name, filter_name=""):
         """
-        Save document.
+        Create the document from the template.
 
-        @type  doc_name: string
-        @param doc_name: Document name. If no document name defined the current
-                        name is used.
+        @type  template_name: string
+        @param template_name: Template document name
+
+        @type  values: dict
+        @param values: Values by field names. A key can be a field name or
+                       a tuple (field name, column, row), see
+                       Field.set_value()
+
+        @type  out_name: string
+        @param out_name: Result document name
 
         @type  filter_name: string
-        @param filter_name: file type:
-                            # ods=""
-                            # pdf="calc_pdf_Export"
-                            # csv="Text - txt - csv (StarCalc)"
-                            # xls="calc_MS_Excel_40"
-                            # xlsx="Calc Office Open XML"
+        @param filter_name: file type, see Document.save_document()
 
         @rtype:   bool
         @return:  Operation result
         """
-        result = False
-        if self._oDoc:
-            if 0 == len(doc_name):
-                self._oDoc.store()
-            else:
-                full_file_name = unohelper.systemPathToFileUrl(doc_name)
-                try:
-                    self._oDoc.storeToURL(
-                                full_file_name,
-                                self._to_properties(FilterName=filter_name))
-                    result = True
-                except IllegalArgumentException as e:
-                    raise IllegalArgumentException(e)
-                except ErrorCodeIOException as e:
-                    raise ErrorCodeIOException(e)
-                except IOException as e:
-                    raise IOException(e)
-        return result
+        def job(doc):
+            doc.open_document(template_name)
+            for key, value in values.items():
+                if isinstance(key, tuple):
+                    name, column, row = key
+                else:
+                    name, column, row = key, 0, 0
+                field = doc.fields.field(name)
+                if field.is_null:
+                    raise ValueError("No field '{0}' in the template".format(
+                        name))
+                field.set_value(value, column, row)
+            return doc.save_document(out_name, filter_name)
+        return self.run(job)
 
-    def close_document(self):
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class ReportStats:
+    """
+    Report generation statistics.
+    """
+
+    STAGES = ("fill", "export", "restore")
+
+    def __init__(self):
         """
-        Close document.
+        Constructor
+        """
+        self._lock = threading.Lock()
+        self._documents = 0
+        self._errors = []
+        self._start = time.time()
+        self._elapsed = 0.0
+        self._stages = dict((stage, 0.0) for stage in self.STAGES)
+
+    def _add(self, stages):
+        """
+        Register the generated document.
 
-        Close current document.
+        @type  stages: dict
+        @param stages: Stage durations in seconds
+        """
+        with self._lock:
+            self._documents += 1
+            for stage, duration in stages.items():
+                self._stages[stage] += duration
 
-        @rtype:   bool
-        @return:  Operation result
+    def _fail(self, index, exception):
         """
-        result = False
-        try:
-            if self._oDoc:
-                self._oDoc.close(True)
-                self._oDoc = None
-                result = True
-        except ErrorCodeIOException as e:
-            raise ErrorCodeIOException(e)
-        except IOException as e:
-            raise IOException(e)
-        return result
+        Register the failed row.
+
+        @type  index: int
+        @param index: Row number
+
+        @type  exception: Exception
+        @param exception: Failure reason
+        """
+        with self._lock:
+            self._errors.append((index, exception))
+
+    def _finish(self):
+        """
+        Stop the time measurement.
+        """
+        self._elapsed = time.time() - self._start
 
     @property
-    def sheets(self):
+    def documents(self):
         """
-        Get Sheets document's object.
+        Get number of generated documents.
 
-        @rtype:   Sheets
-        @return:  Sheets object
+        @rtype:   int
+        @return:  Number of documents
         """
+        return self._documents
 
-        if self._sheets is None:
-            self._sheets = Sheets(self)
-        return self._sheets
+    @documents.setter
+    def documents(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("documents"))
 
-    @sheets.setter
-    def sheets(self, value):
+    @property
+    def failures(self):
+        """
+        Get number of failed rows.
+
+        @rtype:   int
+        @return:  Number of rows without a document
+        """
+        return len(self._errors)
+
+    @failures.setter
+    def failures(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("sheets"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("failures"))
 
     @property
-    def fields(self):
+    def errors(self):
         """
-        Get Fields document's object.
+        Get failed rows.
 
-        @rtype:   Fields
-        @return:  Fields object
+        @rtype:   list
+        @return:  (row number, exception) tuples in order of failure
         """
-        if self._fields is None:
-            self._fields = Fields(self)
-        return self._fields
+        with self._lock:
+            return list(self._errors)
 
-    @fields.setter
-    def fields(self, value):
+    @errors.setter
+    def errors(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("fields"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("errors"))
 
     @property
-    def version(self):
+    def elapsed(self):
         """
-        Get library version.
+        Get generation time.
 
-        @rtype:   string
-        @return:  library version
+        @rtype:   float
+        @return:  Time in seconds
         """
-        return __version__
+        return self._elapsed or time.time() - self._start
 
-    @version.setter
-    def version(self, value):
+    @elapsed.setter
+    def elapsed(self, value):
         """
         Side-effect protection. Raising an exception 'ValueError'.
         """
-        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("version"))
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("elapsed"))
+
+    @property
+    def documents_per_second(self):
+        """
+        Get generation throughput.
+
+        @rtype:   float
+        @return:  Documents per second
+        """
+        elapsed = self.elapsed
+        return self._documents / elapsed if elapsed else 0.0
+
+    @documents_per_second.setter
+    def documents_per_second(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format(
+            "documents_per_second"))
+
+    def latency(self, stage):
+        """
+        Get mean stage latency.
+
+        @type  stage: string
+        @param stage: Stage name: "fill", "export" or "restore"
+
+        @rtype:   float
+        @return:  Mean stage duration per document in seconds
+        """
+        if stage not in self._stages:
+            raise ValueError("Unknown stage '{0}'".format(stage))
+        return self._stages[stage] / self._documents if self._documents \
+            else 0.0
+
+    def __str__(self):
+        return "{0} documents in {1:.2f} s, {2} failures, " \
+            "{3:.2f} documents/s, mean latency: {4}".format(
+                self._documents, self.elapsed, self.failures,
+                self.documents_per_second,
+                ", ".join("{0} {1:.1f} ms".format(
+                    stage, self.latency(stage) * 1000)
+                    for stage in self.STAGES))
+
+
+def generate_reports(template, rows, output_pattern, filter_name="",
+                     workers=1, connection_strings=None):
+    """
+    Generate a document per row of data from the template (mail merge).
+
+    Every worker thread has its own office connection and loads the template
+    once. For every row the fields are filled, the document is exported and
+    the filled cells are restored. Rows are read from the iterable as the
+    workers need them. A failed row does not stop the generation, it is
+    recorded in ReportStats.errors.
+
+    @type  template: string
+    @param template: Template file name
+
+    @type  rows: iterable
+    @param rows: Dicts of values by field name. A key can also be a tuple
+                 (field name, column, row), see Field.set_value()
+
+    @type  output_pattern: string
+    @param output_pattern: Output file name pattern, formatted with the row
+                           values and 'index' (row number), for example
+                           "out/{index}-{CUSTOMER}.pdf". 'index' is reserved,
+                           it is the row number even if the row has a field
+                           named "index".
+
+    @type  filter_name: string
+    @param filter_name: file type, see Document.save_document()
+
+    @type  workers: int
+    @param workers: Number of worker threads
+
+    @type  connection_strings: list
+    @param connection_strings: Office connection strings distributed
+                               between workers.
+
+    @rtype:   ReportStats
+    @return:  Generation statistics
+    """
+    if workers <= 0:
+        raise ValueError("'workers' must be a positive number")
+    if 0 == len(output_pattern):
+        raise ValueError("'output_pattern' is an empty string")
+    stats = ReportStats()
+    pool = _DocumentPool(os.path.abspath(template),
+                         connection_strings or [_DEFAULT_CONNECTION_STRING])
+
+    def cell(doc, key):
+        # Cells are resolved once per worker document
+        cells = pool.cache()
+        oCell = cells.get(key)
+        if oCell is None:
+            name, column, row = key if isinstance(key, tuple) \
+                else (key, 0, 0)
+            field = doc.fields.field(name)
+            if field.is_null:
+                raise ValueError("No field '{0}' in the template".format(
+                    name))
+            oCell = cells[key] = field._oSheet.getCellByPosition(
+                field._oCellAddress.Column + column,
+                field._oCellAddress.Row + row)
+        return oCell
+
+    def render(index, values):
+        doc = pool.document()
+        stages = {}
+        originals = []
+        try:
+            start = time.time()
+            for key, value in values.items():
+                oCell = cell(doc, key)
+                originals.append((oCell, oCell.getFormula()))
+                if isinstance(value, (int, float)) and \
+                        not isinstance(value, bool):
+                    oCell.setValue(value)
+                else:
+                    oCell.setString(str(value))
+            stages["fill"] = time.time() - start
+
+            start = time.time()
+            names = dict((key, value) for key, value in values.items()
+                         if isinstance(key, str))
+            names["index"] = index
+            file_name = os.path.abspath(output_pattern.format_map(names))
+            doc.o_doc.storeToURL(unohelper.systemPathToFileUrl(file_name),
+                                 doc._to_properties(FilterName=filter_name))
+            stages["export"] = time.time() - start
+        finally:
+            # The template is reused by the next row, also after a failure
+            start = time.time()
+            for oCell, formula in reversed(originals):
+                oCell.setFormula(formula)
+            stages["restore"] = time.time() - start
+        stats._add(stages)
+
+    def run(index, values):
+        try:
+            render(index, values)
+        except Exception as e:
+            stats._fail(index, e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for index, values in enumerate(rows):
+                # Keep a bounded number of rows in flight
+                if len(pending) >= 2 * workers:
+                    pending = wait(pending,
+                                   return_when=FIRST_COMPLETED).not_done
+                pending.add(executor.submit(run, index, values))
+            wait(pending)
+    finally:
+        pool.close()
+        stats._finish()
+    return stats
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class _DocumentPool:
+    """
+    Per-thread documents.
+
+    Every thread gets its own office connection with the document loaded
+    once (hidden). Connection strings are assigned to threads in turn.
+    """
+
+    def __init__(self, file_name, connection_strings):
+        """
+        Constructor
+
+        @type  file_name: string
+        @param file_name: Document file name
+
+        @type  connection_strings: list
+        @param connection_strings: Office connection strings
+        """
+        self._file_name = file_name
+        self._connection_strings = connection_strings
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._documents = []
+
+    def cache(self):
+        """
+        Get cache of the current thread, for objects of the thread document.
+
+        @rtype:   dict
+        @return:  Cache dict
+        """
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            cache = self._local.cache = {}
+        return cache
+
+    def document(self):
+        """
+        Get document of the current thread.
+
+        @rtype:   Document
+        @return:  Document object
+        """
+        doc = getattr(self._local, "document", None)
+        if doc is None:
+            with self._lock:
+                connection_string = self._connection_strings[
+                    len(self._documents) % len(self._connection_strings)]
+                doc = Document(connection_string=connection_string)
+                self._documents.append(doc)
+            doc._open_document(unohelper.systemPathToFileUrl(self._file_name),
+                               doc._to_properties(Hidden=True))
+            self._local.document = doc
+        return doc
+
+    def close(self):
+        """
+        Close documents of all threads.
+        """
+        with self._lock:
+            for doc in self._documents:
+                doc.close_document()
+            self._documents = []
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+def main(argv=None):
+    """
+    Command line interface.
+
+    $ python3 pyoocalc.py report template.ods rows.csv "out/{index}.pdf" \\
+        --filter calc_pdf_Export --workers 4
+
+    @type  argv: list
+    @param argv: Command line arguments. Default is sys.argv[1:]
+
+    @rtype:   int
+    @return:  Exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="pyoocalc",
+        description="PyOOCalc - Python Libre/Open Office Calc interface")
+    commands = parser.add_subparsers(dest="command")
+    report = commands.add_parser(
+        "report", help="generate a document per CSV row from the template")
+    report.add_argument("template", help="template file name")
+    report.add_argument("rows", help="CSV file with field names in the "
+                        "header, '-' for the standard input")
+    report.add_argument("output_pattern", help="output file name pattern, "
+                        "e.g. 'out/{index}-{CUSTOMER}.pdf'")
+    report.add_argument("--filter", default="", dest="filter_name",
+                        help="export filter name, e.g. calc_pdf_Export")
+    report.add_argument("--workers", type=int, default=1,
+                        help="number of worker threads")
+    report.add_argument("--connection", action="append",
+                        dest="connection_strings",
+                        help="office connection string, can be repeated")
+    report.add_argument("--delimiter", default=",",
+                        help="CSV field delimiter")
+    args = parser.parse_args(argv)
+
+    if "report" != args.command:
+        parser.print_help()
+        return 2
+    if "-" == args.rows:
+        rows_file = sys.stdin
+    else:
+        rows_file = open(args.rows, newline="", encoding="utf-8")
+    try:
+        stats = generate_reports(
+            args.template, csv.DictReader(rows_file,
+                                          delimiter=args.delimiter),
+            args.output_pattern, args.filter_name, args.workers,
+            args.connection_strings)
+    finally:
+        if rows_file is not sys.stdin:
+            rows_file.close()
+    for index, exception in stats.errors:
+        print("row {0}: {1}".format(index, exception), file=sys.stderr)
+    print(stats)
+    return 1 if stats.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1742 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+PyOOCalc ODS - Office-free OpenDocument Spreadsheet (.ods) access
+
+Reads '.ods' files directly from the zip package without a running
+LibreOffice/OpenOffice instance. The API mirrors the read part of the
+pyoocalc API (Document/Sheets/Sheet/Fields/Field).
+
+No requirements except the Python standard library.
+
+Copyright (c) 2015
+
+@author: Yurii Puchkov
+@organization: http://arilot.com/
+@license: GPL v3
+@contact: panpuchkov@gmail.com
+"""
+
+###############################################################################
+import bisect
+import copy
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ElementTree
+import xml.sax
+import xml.sax.handler
+from xml.sax.saxutils import escape, quoteattr
+
+
+###############################################################################
+__version__ = "0.0.5"
+_MSG_EXCEPT_SIDE_EFFECT = "Assigning a value to the '{0}' is not allowed."
+
+_NS_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_NS_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_NS_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+_TAG_TABLE = _NS_TABLE + "table"
+_TAG_ROW = _NS_TABLE + "table-row"
+_TAG_CELL = _NS_TABLE + "table-cell"
+_TAG_COVERED_CELL = _NS_TABLE + "covered-table-cell"
+_TAG_NAMED_RANGE = _NS_TABLE + "named-range"
+_TAG_PARAGRAPH = _NS_TEXT + "p"
+_TAG_SPACE = _NS_TEXT + "s"
+_TAG_TAB = _NS_TEXT + "tab"
+_TAG_LINE_BREAK = _NS_TEXT + "line-break"
+
+_ATTR_NAME = _NS_TABLE + "name"
+_ATTR_ROWS_REPEATED = _NS_TABLE + "number-rows-repeated"
+_ATTR_COLUMNS_REPEATED = _NS_TABLE + "number-columns-repeated"
+_ATTR_FORMULA = _NS_TABLE + "formula"
+_ATTR_CELL_RANGE_ADDRESS = _NS_TABLE + "cell-range-address"
+_ATTR_VALUE_TYPE = _NS_OFFICE + "value-type"
+_ATTR_VALUE = _NS_OFFICE + "value"
+_ATTR_DATE_VALUE = _NS_OFFICE + "date-value"
+_ATTR_TIME_VALUE = _NS_OFFICE + "time-value"
+_ATTR_BOOLEAN_VALUE = _NS_OFFICE + "boolean-value"
+_ATTR_SPACES = _NS_TEXT + "c"
+
+_CELL_TAGS = (_TAG_CELL, _TAG_COVERED_CELL)
+
+# Qualified names used by the template writer (the writer works with the
+# prefixes used by the office, as the namespace processing is disabled).
+_QNAME_TABLE = "table:table"
+_QNAME_ROW = "table:table-row"
+_QNAME_ROW_GROUPS = (_QNAME_ROW, "table:table-rows", "table:table-header-rows",
+                     "table:table-row-group")
+_QNAME_CELLS = ("table:table-cell", "table:covered-table-cell")
+_QNAME_ROWS_REPEATED = "table:number-rows-repeated"
+_QNAME_COLUMNS_REPEATED = "table:number-columns-repeated"
+_QNAME_PARAGRAPH = "text:p"
+_QNAME_ANNOTATION = "office:annotation"
+_QNAME_VALUE_ATTRIBUTES = (
+    "office:value-type", "calcext:value-type", "office:value",
+    "office:date-value", "office:time-value", "office:boolean-value",
+    "office:string-value", "office:currency", "table:formula")
+_QNAME_FORMULA = "table:formula"
+_QNAME_RESULT_ATTRIBUTES = tuple(key for key in _QNAME_VALUE_ATTRIBUTES
+                                 if key != _QNAME_FORMULA)
+_NUMBER_TYPES = ("float", "percentage", "currency")
+
+# Spreadsheet epoch used for date and time cell values
+_NULL_DATE = datetime.datetime(1899, 12, 30)
+
+# Bump on any change of the field index file layout
+_FIELD_INDEX_FORMAT = 1
+_FIELD_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                "pyoocalc", "fields")
+
+_RE_CELL = re.compile(r"^\$?([A-Za-z]+)\$?([0-9]+)$")
+_RE_DURATION = re.compile(
+    r"^(-)?P(?:([0-9]+)D)?T?(?:([0-9]+)H)?(?:([0-9]+)M)?(?:([0-9.]+)S)?$")
+_RE_FORMULA_NAMESPACE = re.compile(r"^[a-z]+:(?==)")
+_RE_FORMULA_REFERENCE = re.compile(r"\[([^\]]*)\]")
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+def _column_index(letters):
+    """
+    Convert column letters into a zero based column index ("A" -> 0).
+    """
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def _split_sheet_name(address):
+    """
+    Split "$'Sheet 1'.$A$1" into the sheet name and the cell part.
+    """
+    address = address.lstrip("$")
+    if address.startswith("'"):
+        end = 1
+        while True:
+            end = address.index("'", end)
+            if address[end + 1:end + 2] == "'":
+                end += 2
+            else:
+                break
+        return address[1:end].replace("''", "'"), address[end + 2:]
+    sheet, _, cell = address.rpartition(".")
+    return sheet, cell
+
+
+def _parse_cell_range_address(address):
+    """
+    Parse the ODF cell range address ("$Sheet1.$A$5:.$B$7").
+
+    @rtype:   tuple
+    @return:  (sheet name, start column, start row, end column, end row)
+    """
+    start, _, end = address.partition(":")
+    sheet, start_cell = _split_sheet_name(start)
+    match = _RE_CELL.match(start_cell)
+    if match is None:
+        raise ValueError("Wrong cell address '{0}'".format(address))
+    start_column = _column_index(match.group(1))
+    start_row = int(match.group(2)) - 1
+    end_column, end_row = start_column, start_row
+    if end:
+        match = _RE_CELL.match(_split_sheet_name(end)[1])
+        if match is None:
+            raise ValueError("Wrong cell address '{0}'".format(address))
+        end_column = _column_index(match.group(1))
+        end_row = int(match.group(2)) - 1
+    return sheet, start_column, start_row, end_column, end_row
+
+
+def _paragraph_text(element):
+    """
+    Get text of the text:p element including text:s, text:tab and
+    text:line-break elements.
+    """
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag == _TAG_SPACE:
+            parts.append(" " * int(child.get(_ATTR_SPACES, "1")))
+        elif child.tag == _TAG_TAB:
+            parts.append("\t")
+        elif child.tag == _TAG_LINE_BREAK:
+            parts.append("\n")
+        else:
+            parts.append(_paragraph_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _date_to_number(value):
+    """
+    Convert the ODF date value into a spreadsheet serial number.
+    """
+    if "T" in value:
+        date = datetime.datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    else:
+        date = datetime.datetime.strptime(value, "%Y-%m-%d")
+    return (date - _NULL_DATE).total_seconds() / 86400.0
+
+
+def _time_to_number(value):
+    """
+    Convert the ODF duration ("PT10H30M00S") into a fraction of a day.
+    """
+    match = _RE_DURATION.match(value)
+    if match is None:
+        return 0.0
+    sign, days, hours, minutes, seconds = match.groups()
+    number = (int(days or 0) + (int(hours or 0) +
+              (int(minutes or 0) + float(seconds or 0)) / 60.0) / 60.0 / 24.0)
+    return -number if sign else number
+
+
+def _convert_formula(formula):
+    """
+    Convert the ODF formula ("of:=SUM([.A1:.A3])") into the office UI
+    notation ("=SUM(A1:A3)").
+    """
+    formula = _RE_FORMULA_NAMESPACE.sub("", formula)
+
+    def reference(match):
+        parts = match.group(1).split(":")
+        return ":".join(part[1:] if part.startswith(".") else part
+                        for part in parts)
+    return _RE_FORMULA_REFERENCE.sub(reference, formula)
+
+
+def _read_cell(element):
+    """
+    Read cell content.
+
+    @rtype:   tuple or None
+    @return:  (value type, number, text, formula) or None for an empty cell
+    """
+    value_type = element.get(_ATTR_VALUE_TYPE)
+    formula = element.get(_ATTR_FORMULA)
+    paragraphs = [_paragraph_text(child) for child in element
+                  if child.tag == _TAG_PARAGRAPH]
+    if value_type is None and formula is None and not paragraphs:
+        return None
+    number = 0.0
+    if value_type in _NUMBER_TYPES:
+        number = float(element.get(_ATTR_VALUE, "0"))
+    elif value_type == "date":
+        number = _date_to_number(element.get(_ATTR_DATE_VALUE))
+    elif value_type == "time":
+        number = _time_to_number(element.get(_ATTR_TIME_VALUE))
+    elif value_type == "boolean":
+        number = 1.0 if element.get(_ATTR_BOOLEAN_VALUE) == "true" else 0.0
+    return (value_type, number, "\n".join(paragraphs),
+            _convert_formula(formula) if formula else None)
+
+
+def _cell_value(cell, val_type="AUTO"):
+    """
+    Get cell value in the same way as pyoocalc.Sheet.cell_value_by_index().
+    """
+    if val_type == "AUTO":
+        if cell is None:
+            return None
+        value_type, number, text, formula = cell
+        if formula:
+            return formula
+        if value_type is None or value_type == "string":
+            return text
+        return number
+    elif val_type == "VALUE":
+        return cell[1] if cell else 0.0
+    elif val_type == "FORMULA":
+        if cell is None:
+            return ""
+        if cell[3]:
+            return cell[3]
+        if cell[0] is None or cell[0] == "string":
+            return cell[2]
+        if cell[1].is_integer():
+            return str(int(cell[1]))
+        return repr(cell[1])
+    elif val_type == "STRING":
+        return cell[2] if cell else ""
+    return None
+
+
+def _iter_content(file_name, sheet_index=None, read_cells=True):
+    """
+    Iterate over the content.xml of the document.
+
+    See _iter_content_xml().
+
+    @type  file_name: string
+    @param file_name: Document file name
+
+    @type  sheet_index: int
+    @param sheet_index: Stop after the sheet with this index. None - read all
+
+    @type  read_cells: bool
+    @param read_cells: Generate "row" events
+
+    @rtype:   generator
+    @return:  Events, see _iter_content_xml()
+    """
+    with zipfile.ZipFile(file_name) as package:
+        with package.open("content.xml") as content:
+            for event in _iter_content_xml(content, sheet_index, read_cells):
+                yield event
+
+
+def _iter_content_xml(content, sheet_index=None, read_cells=True):
+    """
+    Iterate over the content.xml stream.
+
+    The content is parsed incrementally, every processed row is released,
+    so memory usage does not depend on the document size.
+
+    @type  content: file object
+    @param content: content.xml stream
+
+    @type  sheet_index: int
+    @param sheet_index: Stop after the sheet with this index. None - read all
+
+    @type  read_cells: bool
+    @param read_cells: Generate "row" events
+
+    @rtype:   generator
+    @return:  Events:
+                ("table", sheet index, sheet name)
+                ("row", row index, number of repeated rows, cells), where
+                    cells is a list of (column, repeated, cell) for not
+                    empty cells
+                ("named-range", name, cell range address)
+    """
+    stack = []
+    table_index = -1
+    row = 0
+    for event, element in ElementTree.iterparse(
+            content, events=("start", "end")):
+        if "start" == event:
+            stack.append(element)
+            if element.tag == _TAG_TABLE:
+                table_index += 1
+                row = 0
+                yield ("table", table_index, element.get(_ATTR_NAME))
+            continue
+
+        stack.pop()
+        if element.tag == _TAG_ROW:
+            repeated = int(element.get(_ATTR_ROWS_REPEATED, "1"))
+            if read_cells and sheet_index in (None, table_index):
+                cells = []
+                column = 0
+                for child in element:
+                    if child.tag not in _CELL_TAGS:
+                        continue
+                    columns = int(child.get(_ATTR_COLUMNS_REPEATED, "1"))
+                    cell = _read_cell(child)
+                    if cell is not None:
+                        cells.append((column, columns, cell))
+                    column += columns
+                yield ("row", row, repeated, cells)
+            row += repeated
+            if stack:
+                stack[-1].remove(element)
+        elif element.tag == _TAG_TABLE:
+            if stack:
+                stack[-1].remove(element)
+            if table_index == sheet_index:
+                return
+        elif element.tag == _TAG_NAMED_RANGE:
+            # Only document global named ranges, sheet local named
+            # ranges are stored inside of the table element.
+            if not any(parent.tag == _TAG_TABLE for parent in stack):
+                yield ("named-range", element.get(_ATTR_NAME),
+                       element.get(_ATTR_CELL_RANGE_ADDRESS))
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Field:
+    """
+    Document field (named range), read only.
+    """
+
+    def __init__(self, fields, name):
+        """
+        Constructor
+
+        @type  fields: Fields
+        @param fields: Fields object
+
+        @type  name: string
+        @param name: Field name
+        """
+        self._fields = fields
+        self._is_null = True
+        self._sheet = None
+        self._column = 0
+        self._row = 0
+
+        if self._fields:
+            if 0 == len(name):
+                raise ValueError("'name' is an empty string")
+            address = self._fields._named_ranges.get(name)
+            if address:
+                sheet_name, self._column, self._row = \
+                    _parse_cell_range_address(address)[:3]
+                self._sheet = self._fields.document.sheets.sheet(sheet_name)
+                self._is_null = False
+        else:
+            raise ValueError("'fields' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the field is null.
+
+        @rtype:   bool
+        @return:  Field state
+        """
+        return self._is_null
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    def value(self, column=0, row=0):
+        """
+        Get filed value at position Column/Row
+
+        @type  column: int
+        @param column: column index
+
+        @type  row: int
+        @param row: row index
+
+        @rtype:   string
+        @return: Document cell value in string format. Regardless of document\
+                cell type.
+        """
+        value = ""
+        if self._sheet:
+            value = self._sheet.cell_value_by_index(
+                self._column + column, self._row + row, "STRING")
+        return value
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Fields:
+    """
+    Document fields (named ranges), read only.
+    """
+
+    def __init__(self, document):
+        """
+        Constructor
+
+        @type  document: Document
+        @param document: Document object
+        """
+        self._document = document
+        self._is_null = True
+        self._named_ranges = None
+        if self._document:
+            self._named_ranges = self._document._structure()[1]
+            self._is_null = False
+        else:
+            raise ValueError("'document' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the fields object is initialized
+
+        @rtype:   bool
+        @return:  Fields object state
+        """
+        return self._is_null
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def count(self):
+        """
+        Get number of fields (named ranges) in the document.
+
+        @rtype:   int
+        @return:  the number of fields in the document.
+        """
+        return len(self._named_ranges)
+
+    @count.setter
+    def count(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+
+    @property
+    def names(self):
+        """
+        Get field names.
+
+        @rtype:   list
+        @return:  Field names
+        """
+        return list(self._named_ranges)
+
+    @names.setter
+    def names(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("names"))
+
+    @property
+    def document(self):
+        """
+        Get document object.
+
+        @rtype:   Document
+        @return:  Document object
+        """
+        return self._document
+
+    @document.setter
+    def document(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("document"))
+
+    def field(self, name):
+        """
+        Get document field by name
+
+        @type  name: string
+        @param name: Field name
+
+        @rtype:   Field object
+        @return:  Field object
+        """
+        return Field(self, name)
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Sheet:
+    """
+    Document sheet, read only.
+
+    Cells are loaded on the first access. Repeated rows and columns are kept
+    as runs and never expanded.
+    """
+
+    def __init__(self, sheets, index_or_name):
+        """
+        Constructor
+
+        @type  sheets: Sheets
+        @param sheets: Sheets object
+
+        @type  index_or_name: int or string
+        @param index_or_name: Sheet index or sheet name
+        """
+        self._sheets = sheets
+        self._is_null = True
+        self._index = None
+        self._row_starts = None
+        self._rows = None
+
+        if sheets:
+            names = self._sheets.names
+            if isinstance(index_or_name, int):
+                if index_or_name < 0:
+                    raise ValueError("'index_or_name' must be >= 0")
+                if index_or_name >= len(names):
+                    raise ValueError("No sheet with index {0}".format(
+                        index_or_name))
+                self._index = index_or_name
+            else:
+                if 0 == len(index_or_name):
+                    raise ValueError("'index_or_name' is an empty string")
+                if index_or_name not in names:
+                    raise ValueError("No sheet '{0}'".format(index_or_name))
+                self._index = names.index(index_or_name)
+            self._is_null = False
+        else:
+            raise ValueError("'sheets' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the sheet is null.
+
+        @rtype:   bool
+        @return:  Sheet state
+        """
+        return self._is_null
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def name(self):
+        """
+        Get sheet name.
+
+        @rtype:   string
+        @return:  Sheet name
+        """
+        return self._sheets.names[self._index]
+
+    @name.setter
+    def name(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("name"))
+
+    def _iter_rows(self):
+        """
+        Iterate over the "row" events of the sheet.
+        """
+        file_name = self._sheets.document.file_name
+        in_sheet = False
+        for event in _iter_content(file_name, self._index):
+            if "table" == event[0]:
+                in_sheet = event[1] == self._index
+            elif "row" == event[0] and in_sheet:
+                yield event
+
+    def _load(self):
+        """
+        Load runs of not empty rows of the sheet.
+        """
+        self._row_starts = []
+        self._rows = []
+        for event, row, repeated, cells in self._iter_rows():
+            if cells:
+                self._row_starts.append(row)
+                self._rows.append((repeated,
+                                   [cell[0] for cell in cells], cells))
+
+    def _cell(self, col, row):
+        """
+        Get cell content tuple or None for an empty cell.
+        """
+        if self._rows is None:
+            self._load()
+        index = bisect.bisect_right(self._row_starts, row) - 1
+        if index < 0:
+            return None
+        repeated, columns, cells = self._rows[index]
+        if row >= self._row_starts[index] + repeated:
+            return None
+        index = bisect.bisect_right(columns, col) - 1
+        if index < 0:
+            return None
+        column, columns_repeated, cell = cells[index]
+        if col >= column + columns_repeated:
+            return None
+        return cell
+
+    def cell_value_by_index(self, col, row, val_type="AUTO"):
+        """
+        Get cell value.
+
+        @type  col: int
+        @param col: Cell column index
+
+        @type  row: int
+        @param row: Cell row index
+
+        @type  val_type: string
+        @param val_type: Data type of return value
+
+        @rtype:   float or string
+        @return:  Value. Value type depends on val_type parameter
+        """
+        if col < 0:
+            raise ValueError("'col' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        return _cell_value(self._cell(col, row), val_type)
+
+    def rows(self, val_type="AUTO"):
+        """
+        Iterate over the sheet rows.
+
+        The sheet is streamed from the file, nothing is cached. Repeated rows
+        are expanded, trailing empty rows and cells are skipped.
+
+        @type  val_type: string
+        @param val_type: Data type of the values, see cell_value_by_index()
+
+        @rtype:   generator
+        @return:  Tuples of cell values
+        """
+        empty_rows = 0
+        for event, row, repeated, cells in self._iter_rows():
+            if not cells:
+                empty_rows += repeated
+                continue
+            for i in range(empty_rows):
+                yield ()
+            empty_rows = 0
+            values = []
+            for column, columns_repeated, cell in cells:
+                values.extend([_cell_value(None, val_type)] *
+                              (column - len(values)))
+                values.extend([_cell_value(cell, val_type)] *
+                              columns_repeated)
+            values = tuple(values)
+            for i in range(repeated):
+                yield values
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Sheets:
+    """
+    Document sheets, read only.
+    """
+
+    def __init__(self, document):
+        """
+        Constructor
+
+        @type  document: Document
+        @param document: Document object
+        """
+        self._document = document
+        self._sheets = {}
+        if self._document is None:
+            raise ValueError("'document' value is None")
+
+    @property
+    def is_null(self):
+        """
+        Checking if the sheets object is initialized
+
+        @rtype:   bool
+        @return:  Sheets object state
+        """
+        return self._document is None
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def document(self):
+        """
+        Get document object.
+
+        @rtype:   Document
+        @return:  Document object
+        """
+        return self._document
+
+    @document.setter
+    def document(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("document"))
+
+    @property
+    def names(self):
+        """
+        Get sheet names.
+
+        @rtype:   list
+        @return:  Sheet names in document order
+        """
+        return self._document._structure()[0]
+
+    @names.setter
+    def names(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("names"))
+
+    @property
+    def count(self):
+        """
+        Get number of sheets in document.
+
+        @rtype:   int
+        @return:  the number of sheets in document.
+        """
+        return len(self.names)
+
+    @count.setter
+    def count(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("count"))
+
+    def sheet(self, index_or_name):
+        """
+        Get sheet by index or name.
+
+        Sheet objects are cached, so loaded cells are reused.
+
+        @type  index_or_name: int, string
+        @param index_or_name: Sheet index or name
+
+        @rtype:   Sheet
+        @return:  Sheet object
+        """
+        sheet = Sheet(self, index_or_name)
+        return self._sheets.setdefault(sheet._index, sheet)
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Document:
+    """
+    OpenDocument Spreadsheet file opened without an office, read only.
+    """
+
+    def __init__(self, file_name):
+        """
+        Constructor
+
+        @type  file_name: string
+        @param file_name: Document file name
+        """
+        if 0 == len(file_name):
+            raise ValueError("'file_name' is an empty string")
+        if not zipfile.is_zipfile(file_name):
+            raise ValueError("'{0}' is not an ODS document".format(
+                file_name))
+        self._file_name = file_name
+        self._sheet_names = None
+        self._named_ranges = None
+        self._sheets = None
+        self._fields = None
+
+    def __enter__(self):
+        """
+        PEP 0343 - The “with” statement
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        PEP 0343 - The “with” statement
+        """
+        # Nothing to do
+        pass
+
+    def _structure(self):
+        """
+        Read sheet names and named ranges of the document.
+
+        @rtype:   tuple
+        @return:  (list of sheet names, dict of named range addresses)
+        """
+        if self._sheet_names is None:
+            sheet_names = []
+            named_ranges = {}
+            for event in _iter_content(self._file_name, read_cells=False):
+                if "table" == event[0]:
+                    sheet_names.append(event[2])
+                elif "named-range" == event[0]:
+                    named_ranges[event[1]] = event[2]
+            self._sheet_names = sheet_names
+            self._named_ranges = named_ranges
+        return self._sheet_names, self._named_ranges
+
+    @property
+    def is_null(self):
+        """
+        Checking if the document object is initialized
+
+        @rtype:   bool
+        @return:  Document object state
+        """
+        return self._file_name is None
+
+    @is_null.setter
+    def is_null(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("is_null"))
+
+    @property
+    def file_name(self):
+        """
+        Get document file name.
+
+        @rtype:   string
+        @return:  Document file name
+        """
+        return self._file_name
+
+    @file_name.setter
+    def file_name(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("file_name"))
+
+    @property
+    def sheets(self):
+        """
+        Get Sheets document's object.
+
+        @rtype:   Sheets
+        @return:  Sheets object
+        """
+        if self._sheets is None:
+            self._sheets = Sheets(self)
+        return self._sheets
+
+    @sheets.setter
+    def sheets(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("sheets"))
+
+    @property
+    def fields(self):
+        """
+        Get Fields document's object.
+
+        @rtype:   Fields
+        @return:  Fields object
+        """
+        if self._fields is None:
+            self._fields = Fields(self)
+        return self._fields
+
+    @fields.setter
+    def fields(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("fields"))
+
+    @property
+    def version(self):
+        """
+        Get library version.
+
+        @rtype:   string
+        @return:  library version
+        """
+        return __version__
+
+    @version.setter
+    def version(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("version"))
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+def _file_hash(file_name):
+    """
+    Get SHA-256 hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as stream:
+        for chunk in iter(lambda: stream.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FieldIndex:
+    """
+    Persistent template field (named range) map.
+
+    The map is built once per template content and stored as JSON in the
+    cache directory under the SHA-256 hash of the file, so the same template
+    copied under another name reuses the entry and a changed template gets
+    a new one. Loading the index reads only the hash and the small JSON
+    file, neither the document content nor the office is needed.
+
+    The index is a standalone planning helper: it lets a producer check
+    and plan values (validate(), cell()) before a job is queued. The render
+    paths (Template, pyoocalc.Supervisor.render(), pyoocalc.generate_reports()
+    and the in-office runner) resolve fields by themselves and do not use
+    it.
+
+    Tables are guessed: the fields placed on the same row of the same sheet
+    are reported as one table, ordered by columns. A template does not
+    declare its tables, pyoocalc.Field.resize_table() is given the table
+    field explicitly, so a row of unrelated fields is reported as a table
+    too.
+    """
+
+    def __init__(self, file_name, cache_dir=None):
+        """
+        Constructor
+
+        @type  file_name: string
+        @param file_name: Template file name
+
+        @type  cache_dir: string
+        @param cache_dir: Index cache directory. Default is
+                          ~/.cache/pyoocalc/fields
+        """
+        if 0 == len(file_name):
+            raise ValueError("'file_name' is an empty string")
+        if not zipfile.is_zipfile(file_name):
+            raise ValueError("'{0}' is not an ODS document".format(
+                file_name))
+        self._file_name = file_name
+        self._cache_dir = cache_dir or _FIELD_INDEX_DIR
+        self._hash = _file_hash(file_name)
+        self._cached = False
+        self._index = self._load()
+        if self._index is None:
+            self._index = self._build()
+            self._store()
+        else:
+            self._cached = True
+
+    def _cache_file_name(self):
+        """
+        Get the index file name in the cache directory.
+        """
+        return os.path.join(self._cache_dir, self._hash + ".json")
+
+    def _load(self):
+        """
+        Read the index from the cache.
+
+        @rtype:   dict
+        @return:  Index or None if there is no valid cached index
+        """
+        try:
+            with open(self._cache_file_name(), encoding="utf-8") as stream:
+                index = json.load(stream)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(index, dict) or \
+                index.get("format") != _FIELD_INDEX_FORMAT or \
+                index.get("hash") != self._hash:
+            return None
+        return index
+
+    def _build(self):
+        """
+        Build the index from the template content.
+
+        @rtype:   dict
+        @return:  Index
+        """
+        sheets = []
+        fields = {}
+        for event in _iter_content(self._file_name, read_cells=False):
+            if "table" == event[0]:
+                sheets.append(event[2])
+            elif "named-range" == event[0]:
+                sheet, column, row, end_column, end_row = \
+                    _parse_cell_range_address(event[2])
+                fields[event[1]] = {"sheet": sheet,
+                                    "column": column,
+                                    "row": row,
+                                    "columns": end_column - column + 1,
+                                    "rows": end_row - row + 1}
+
+        rows = {}
+        for name, field in fields.items():
+            rows.setdefault((field["sheet"], field["row"]), []).append(name)
+        tables = []
+        for (sheet, row), names in sorted(rows.items(), key=lambda item: (
+                sheets.index(item[0][0]) if item[0][0] in sheets else -1,
+                item[0][1])):
+            if len(names) > 1:
+                names.sort(key=lambda name: fields[name]["column"])
+                tables.append({"sheet": sheet, "row": row, "fields": names})
+
+        return {"format": _FIELD_INDEX_FORMAT,
+                "hash": self._hash,
+                "sheets": sheets,
+                "fields": fields,
+                "tables": tables}
+
+    def _store(self):
+        """
+        Write the index into the cache. The file is replaced atomically, so
+        concurrent workers never read a partial index. Cache write errors
+        are ignored, the index is rebuilt next time.
+        """
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            handle, temp_name = tempfile.mkstemp(dir=self._cache_dir,
+                                                 suffix=".tmp")
+            try:
+                with os.fdopen(handle, "w", encoding="utf-8") as stream:
+                    json.dump(self._index, stream, sort_keys=True)
+                os.replace(temp_name, self._cache_file_name())
+            except BaseException:
+                os.remove(temp_name)
+                raise
+        except OSError:
+            pass
+
+    @property
+    def file_name(self):
+        """
+        Get template file name.
+
+        @rtype:   string
+        @return:  Template file name
+        """
+        return self._file_name
+
+    @file_name.setter
+    def file_name(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("file_name"))
+
+    @property
+    def hash(self):
+        """
+        Get template content hash (index key).
+
+        @rtype:   string
+        @return:  SHA-256 hex digest
+        """
+        return self._hash
+
+    @hash.setter
+    def hash(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("hash"))
+
+    @property
+    def cached(self):
+        """
+        Checking if the index was loaded from the cache.
+
+        @rtype:   bool
+        @return:  True - loaded from the cache, False - built
+        """
+        return self._cached
+
+    @cached.setter
+    def cached(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("cached"))
+
+    @property
+    def sheets(self):
+        """
+        Get template sheet names.
+
+        @rtype:   list
+        @return:  Sheet names
+        """
+        return list(self._index["sheets"])
+
+    @sheets.setter
+    def sheets(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("sheets"))
+
+    @property
+    def names(self):
+        """
+        Get field names.
+
+        @rtype:   list
+        @return:  Field names
+        """
+        return list(self._index["fields"])
+
+    @names.setter
+    def names(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("names"))
+
+    @property
+    def tables(self):
+        """
+        Get template tables.
+
+        Rows with more than one field, see the class description.
+
+        @rtype:   list
+        @return:  Dicts with "sheet", "row" and "fields" (field names
+                  ordered by columns)
+        """
+        return [dict(table, fields=list(table["fields"]))
+                for table in self._index["tables"]]
+
+    @tables.setter
+    def tables(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("tables"))
+
+    def field(self, name):
+        """
+        Get field position.
+
+        @type  name: string
+        @param name: Field name
+
+        @rtype:   dict
+        @return:  "sheet", "column", "row", "columns" and "rows" (extent)
+                  or None if there is no such field
+        """
+        field = self._index["fields"].get(name)
+        return dict(field) if field else None
+
+    def cell(self, name, column=0, row=0):
+        """
+        Get the cell position for a value of the field.
+
+        @type  name: string
+        @param name: Field name
+
+        @type  column: int
+        @param column: Column offset relatively to the field
+
+        @type  row: int
+        @param row: Row offset relatively to the field
+
+        @rtype:   tuple
+        @return:  (sheet name, column, row)
+        """
+        if column < 0:
+            raise ValueError("'column' must be >= 0")
+        if row < 0:
+            raise ValueError("'row' must be >= 0")
+        field = self._index["fields"].get(name)
+        if field is None:
+            raise ValueError("No field '{0}' in the template".format(name))
+        return field["sheet"], field["column"] + column, field["row"] + row
+
+    def validate(self, values):
+        """
+        Check values against the template fields.
+
+        @type  values: dict
+        @param values: Values by field names. A key can be a field name or
+                       a tuple (field name, column, row), see Template.fill()
+
+        @rtype:   list
+        @return:  Error messages, empty list if the values are valid
+        """
+        errors = []
+        fields = self._index["fields"]
+        for key in values:
+            if isinstance(key, tuple):
+                if 3 != len(key):
+                    errors.append("Wrong key {0!r}".format(key))
+                    continue
+                name, column, row = key
+                if not isinstance(column, int) or column < 0:
+                    errors.append("Wrong column in {0!r}".format(key))
+                if not isinstance(row, int) or row < 0:
+                    errors.append("Wrong row in {0!r}".format(key))
+            else:
+                name = key
+            if name not in fields:
+                errors.append("No field '{0}' in the template".format(name))
+        return errors
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+def _write_node(write, node):
+    """
+    Serialize the buffered node [qname, attributes, children].
+    """
+    name, attrs, children = node
+    write("<" + name)
+    for key, value in attrs.items():
+        write(" {0}={1}".format(key, quoteattr(value)))
+    if not children:
+        write("/>")
+        return
+    write(">")
+    for child in children:
+        if isinstance(child, str):
+            write(escape(child))
+        else:
+            _write_node(write, child)
+    write("</" + name + ">")
+
+
+def _paragraph_nodes(text):
+    """
+    Build text:p nodes for the text. Sequences of spaces are kept by the
+    text:s elements.
+    """
+    paragraphs = []
+    for line in text.split("\n"):
+        children = []
+        for i, part in enumerate(re.split(r"( {2,})", line)):
+            if i % 2:
+                children.append(" ")
+                children.append(["text:s",
+                                 {"text:c": str(len(part) - 1)}, []])
+            elif part:
+                children.append(part)
+        paragraphs.append([_QNAME_PARAGRAPH, {}, children])
+    return paragraphs
+
+
+def _set_cell_node(cell, value, calcext):
+    """
+    Replace value, value type and text of the cell node.
+
+    @type  calcext: bool
+    @param calcext: The document declares the 'calcext' namespace
+    """
+    name, attrs, children = cell
+    for key in _QNAME_VALUE_ATTRIBUTES:
+        attrs.pop(key, None)
+    children[:] = [child for child in children
+                   if not isinstance(child, str) and
+                   child[0] == _QNAME_ANNOTATION]
+    if value is None:
+        return
+    if isinstance(value, bool):
+        value_type = "boolean"
+        attrs["office:boolean-value"] = "true" if value else "false"
+        text = "TRUE" if value else "FALSE"
+    elif isinstance(value, (int, float)):
+        value_type = "float"
+        attrs["office:value"] = repr(value)
+        text = str(value)
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        value_type = "date"
+        attrs["office:date-value"] = value.isoformat()
+        text = value.isoformat()
+    else:
+        value_type = "string"
+        text = str(value)
+    attrs["office:value-type"] = value_type
+    if calcext:
+        attrs["calcext:value-type"] = value_type
+    children.extend(_paragraph_nodes(text))
+
+
+def _split_repeated(nodes, qnames, attribute, index, start=0):
+    """
+    Find the node (row or cell) at position 'index' among the sibling nodes.
+    The repeated node is split into the nodes before, at and after the
+    position.
+
+    @type  nodes: list
+    @param nodes: Sibling nodes, updated in place
+
+    @type  qnames: tuple
+    @param qnames: Qualified names of the nodes to count
+
+    @type  attribute: string
+    @param attribute: Qualified name of the repetition attribute
+
+    @type  start: int
+    @param start: Position of the first node
+
+    @rtype:   list
+    @return:  Node at position 'index' or None if out of range
+    """
+    for i, node in enumerate(nodes):
+        if isinstance(node, str) or node[0] not in qnames:
+            continue
+        repeated = int(node[1].get(attribute, "1"))
+        if start <= index < start + repeated:
+            if 1 == repeated:
+                return node
+            parts = []
+            target = None
+            for part_start, part_count in (
+                    (start, index - start), (index, 1),
+                    (index + 1, start + repeated - index - 1)):
+                if part_count <= 0:
+                    continue
+                part = copy.deepcopy(node)
+                if 1 == part_count:
+                    part[1].pop(attribute, None)
+                else:
+                    part[1][attribute] = str(part_count)
+                parts.append(part)
+                if part_start == index:
+                    target = part
+            nodes[i:i + 1] = parts
+            return target
+        start += repeated
+    return None
+
+
+class _TemplateHandler(xml.sax.handler.ContentHandler):
+    """
+    SAX handler copying content.xml to the output and substituting values.
+
+    Only rows containing target cells are buffered, the rest of the document
+    is written as it is parsed.
+    """
+
+    def __init__(self, write, targets):
+        """
+        Constructor
+
+        @type  write: callable
+        @param write: Output function
+
+        @type  targets: dict
+        @param targets: {sheet name: {row: {column: value}}}
+        """
+        xml.sax.handler.ContentHandler.__init__(self)
+        self._write = write
+        self._targets = targets
+        self._calcext = False
+        self._sheet_targets = None
+        self._row = 0
+        self._row_repeated = 1
+        self._rows_seen = False
+        self._depth = 0
+        self._table_depth = 0
+        self._stack = None
+        self._open_tag = False
+
+    def _close_open_tag(self):
+        if self._open_tag:
+            self._write(">")
+            self._open_tag = False
+
+    def startDocument(self):
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    def startElement(self, name, attrs):
+        attrs = dict(attrs.items())
+        if name in _QNAME_CELLS and _QNAME_FORMULA in attrs:
+            # The office shows cached formula results of its own documents
+            # without recalculation, a formula without a result is
+            # calculated when the document is opened.
+            for key in _QNAME_RESULT_ATTRIBUTES:
+                attrs.pop(key, None)
+        if self._stack is not None:
+            node = [name, attrs, []]
+            self._stack[-1][2].append(node)
+            self._stack.append(node)
+            return
+        if self._sheet_targets and self._rows_seen and \
+                self._depth == self._table_depth + 1 and \
+                name not in _QNAME_ROW_GROUPS:
+            # Rows below the table go before the trailing elements of the
+            # table (named expressions etc.)
+            self._close_open_tag()
+            self._append_rows()
+        if "office:document-content" == name:
+            self._calcext = "xmlns:calcext" in attrs
+        elif _QNAME_TABLE == name:
+            self._sheet_targets = self._targets.get(attrs.get("table:name"))
+            self._row = 0
+            self._rows_seen = False
+            self._table_depth = self._depth
+        elif _QNAME_ROW == name:
+            self._rows_seen = True
+            self._row_repeated = int(attrs.get(_QNAME_ROWS_REPEATED, "1"))
+            if self._sheet_targets and any(
+                    self._row <= row < self._row + self._row_repeated
+                    for row in self._sheet_targets):
+                node = [name, attrs, []]
+                self._stack = [node]
+                return
+        self._close_open_tag()
+        self._write("<" + name)
+        for key, value in attrs.items():
+            self._write(" {0}={1}".format(key, quoteattr(value)))
+        self._open_tag = True
+        self._depth += 1
+
+    def endElement(self, name):
+        if self._stack is not None:
+            node = self._stack.pop()
+            if not self._stack:
+                self._stack = None
+                self._close_open_tag()
+                self._flush_row(node)
+            return
+        self._depth -= 1
+        if _QNAME_ROW == name:
+            self._row += self._row_repeated
+        elif _QNAME_TABLE == name and self._sheet_targets:
+            self._close_open_tag()
+            self._append_rows()
+            self._sheet_targets = None
+        if self._open_tag:
+            self._write("/>")
+            self._open_tag = False
+        else:
+            self._write("</" + name + ">")
+
+    def characters(self, content):
+        if self._stack is not None:
+            self._stack[-1][2].append(content)
+            return
+        self._close_open_tag()
+        self._write(escape(content))
+
+    def ignorableWhitespace(self, content):
+        self.characters(content)
+
+    def _flush_row(self, node):
+        """
+        Split the buffered row, substitute values and write the result.
+        """
+        rows = [node]
+        repeated = int(node[1].get(_QNAME_ROWS_REPEATED, "1"))
+        for row in sorted(self._sheet_targets):
+            if self._row <= row < self._row + repeated:
+                self._fill_row(
+                    _split_repeated(rows, (_QNAME_ROW,), _QNAME_ROWS_REPEATED,
+                                    row, self._row),
+                    self._sheet_targets.pop(row))
+        for row_node in rows:
+            _write_node(self._write, row_node)
+        self._row += repeated
+
+    def _fill_row(self, node, values):
+        """
+        Substitute values into the cells of the row node.
+
+        @type  values: dict
+        @param values: {column: value}
+        """
+        for column, value in sorted(values.items()):
+            cell = _split_repeated(node[2], _QNAME_CELLS,
+                                   _QNAME_COLUMNS_REPEATED, column)
+            if cell is None:
+                end = sum(int(child[1].get(_QNAME_COLUMNS_REPEATED, "1"))
+                          for child in node[2]
+                          if not isinstance(child, str) and
+                          child[0] in _QNAME_CELLS)
+                if column > end:
+                    node[2].append(["table:table-cell", {
+                        _QNAME_COLUMNS_REPEATED: str(column - end)}, []])
+                cell = ["table:table-cell", {}, []]
+                node[2].append(cell)
+            _set_cell_node(cell, value, self._calcext)
+
+    def _append_rows(self):
+        """
+        Write rows for targets below the last row of the table.
+        """
+        for row in sorted(self._sheet_targets):
+            if row > self._row:
+                self._write('<table:table-row {0}="{1}">'
+                            '<table:table-cell/></table:table-row>'.format(
+                                _QNAME_ROWS_REPEATED, row - self._row))
+            node = [_QNAME_ROW, {}, []]
+            self._fill_row(node, self._sheet_targets.pop(row))
+            _write_node(self._write, node)
+            self._row = row + 1
+
+###############################################################################
+###############################################################################
+###############################################################################
+
+
+class Template:
+    """
+    Office-free template filling.
+
+    Writes values into the cells referenced by fields (named ranges) of the
+    '.ods' template. The template is read once, every fill() streams the
+    content.xml into the new document, the rest of the package is copied
+    as it is.
+
+    Cached results (value and value type) of formula cells are removed, so
+    the office calculates the formulas when the document is opened. The
+    cached display text is kept, Document of this module reads the value of
+    such a cell as 0.
+    """
+
+    def __init__(self, file_name):
+        """
+        Constructor
+
+        @type  file_name: string
+        @param file_name: Template file name
+        """
+        if 0 == len(file_name):
+            raise ValueError("'file_name' is an empty string")
+        if not zipfile.is_zipfile(file_name):
+            raise ValueError("'{0}' is not an ODS document".format(
+                file_name))
+        self._file_name = file_name
+        self._entries = []
+        with zipfile.ZipFile(file_name) as package:
+            for info in package.infolist():
+                self._entries.append((info, package.read(info)))
+        self._named_ranges = {}
+        for info, content in self._entries:
+            if "content.xml" == info.filename:
+                for event in _iter_content_xml(io.BytesIO(content),
+                                               read_cells=False):
+                    if "named-range" == event[0]:
+                        self._named_ranges[event[1]] = event[2]
+
+    @property
+    def fields(self):
+        """
+        Get template field names.
+
+        @rtype:   list
+        @return:  Field names
+        """
+        return list(self._named_ranges)
+
+    @fields.setter
+    def fields(self, value):
+        """
+        Side-effect protection. Raising an exception 'ValueError'.
+        """
+        raise ValueError(_MSG_EXCEPT_SIDE_EFFECT.format("fields"))
+
+    def _targets(self, values):
+        """
+        Resolve field names into cell positions.
+
+        @rtype:   dict
+        @return:  {sheet name: {row: {column: value}}}
+        """
+        targets = {}
+        for key, value in values.items():
+            if isinstance(key, tuple):
+                name, column, row = key
+            else:
+                name, column, row = key, 0, 0
+            if column < 0:
+                raise ValueError("'column' must be >= 0")
+            if row < 0:
+                raise ValueError("'row' must be >= 0")
+            address = self._named_ranges.get(name)
+            if address is None:
+                raise ValueError("No field '{0}' in the template".format(
+                    name))
+            sheet, start_column, start_row = \
+                _parse_cell_range_address(address)[:3]
+            targets.setdefault(sheet, {}).setdefault(
+                start_row + row, {})[start_column + column] = value
+        return targets
+
+    def fill(self, file_name, values):
+        """
+        Create a new document from the template.
+
+        @type  file_name: string
+        @param file_name: New document file name
+
+        @type  values: dict
+        @param values: Values by field names. A key can be a field name or
+                       a tuple (field name, column, row) with the offset
+                       relatively to the field, like Field.set_value() does.
+                       Value types: string, int, float, bool, date, datetime
+                       or None to clear the cell.
+
+        @rtype:   bool
+        @return:  Operation result
+        """
+        if 0 == len(file_name):
+            raise ValueError("'file_name' is an empty string")
+        targets = self._targets(values)
+        with zipfile.ZipFile(file_name, "w") as package:
+            for info, content in self._entries:
+                if "content.xml" != info.filename:
+                    package.writestr(info, content)
+                    continue
+                info = zipfile.ZipInfo(info.filename, info.date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with package.open(info, "w") as stream:
+                    output = io.TextIOWrapper(stream, encoding="utf-8")
+                    parser = xml.sax.make_parser()
+                    parser.setFeature(xml.sax.handler.feature_external_ges,
+                                      False)
+                    parser.setContentHandler(
+                        _TemplateHandler(output.write, targets))
+                    parser.parse(io.BytesIO(content))
+                    output.flush()
+                    output.detach()
+        return True
+
+
+def fill_template(template_name, file_name, values):
+    """
+    Create a new document from the '.ods' template without the office.
+
+    See Template.fill().
+
+    @type  template_name: string
+    @param template_name: Template file name
+
+    @type  file_name: string
+    @param file_name: New document file name
+
+    @type  values: dict
+    @param values: Values by field names
+
+    @rtype:   bool
+    @return:  Operation result
+    """
+    return Template(template_name).fill(file_name, values)
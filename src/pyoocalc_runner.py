@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+PyOOCalc runner - in-office execution of PyOOCalc jobs (Python macros)
+
+The module runs inside of the Libre/Open Office process by the Python
+script provider, every office call of a job is a local function call
+instead of a bridge round trip.
+
+Requirements for Ubuntu users:
+
+sudo apt-get install libreoffice-script-provider-python
+
+Installation (user macros):
+
+~/.config/libreoffice/4/user/Scripts/python/pyoocalc_runner.py
+~/.config/libreoffice/4/user/Scripts/python/pythonpath/pyoocalc.py
+
+Usage from a remote connection:
+
+doc = pyoocalc.Document()
+doc.render_in_office("template.ods", {"TABLE_NAME": "Name"}, "result.pdf",
+                     "calc_pdf_Export")
+
+Copyright (c) 2015
+
+@author: Yurii Puchkov
+@organization: http://arilot.com/
+@license: GPL v3
+@contact: panpuchkov@gmail.com
+"""
+
+import json
+import time
+
+import pyoocalc
+
+###############################################################################
+
+
+def _document():
+    """
+    Get the document attached to the office of the macro.
+
+    @rtype:   pyoocalc.Document
+    @return:  Document object
+    """
+    # XSCRIPTCONTEXT is set by the script provider
+    return pyoocalc.Document(script_context=XSCRIPTCONTEXT)
+
+
+def render(template_name, values, out_name, filter_name=""):
+    """
+    Create the document from the template.
+
+    @type  template_name: string
+    @param template_name: Template document name
+
+    @type  values: string
+    @param values: JSON list of [key, value] pairs. A key is a field name or
+                   a list [field name, column, row], see
+                   pyoocalc.Field.set_value(). Values are set as text,
+                   null clears the cell.
+
+    @type  out_name: string
+    @param out_name: Result document name
+
+    @type  filter_name: string
+    @param filter_name: file type, see pyoocalc.Document.save_document()
+
+    @rtype:   string
+    @return:  JSON object: "result" (operation result) and "elapsed"
+              (time in seconds)
+    """
+    start = time.time()
+    doc = _document()
+    doc.open_document(template_name, ("hidden", "no_macros",
+                                      "no_link_update"))
+    try:
+        for key, value in json.loads(values):
+            if isinstance(key, list):
+                name, column, row = key
+            else:
+                name, column, row = key, 0, 0
+            field = doc.fields.field(name)
+            if field.is_null:
+                raise ValueError("No field '{0}' in the template".format(
+                    name))
+            if value is None:
+                value = ""
+            elif not isinstance(value, str):
+                value = str(value)
+            field.set_value(value, column, row)
+        result = doc.save_document(out_name, filter_name)
+    finally:
+        doc.close_document()
+    return json.dumps({"result": result, "elapsed": time.time() - start})
+
+
+g_exportedScripts = (render,)
@@ -23,10 +23,18 @@ import unittest
 
 ###############################################################################
 import os
+import shutil
+import signal
 import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append('./../')
 import pyoocalc
+import pyoocalc_ods
 
 ###############################################################################
 HIDE_OFFICE_RESULTS = True
@@ -59,6 +67,129 @@ def pyoocalc_open_close_doc(f):
 ###############################################################################
 
 
+class Test_PyOOCalc_Refs(unittest.TestCase):
+
+    def test_cell_ref(self):
+        cell = pyoocalc.CellRef.from_name("E5")
+        self.assertEqual(tuple(cell), (4, 4))
+        self.assertEqual(cell.offset(1, 2).name, "F7")
+        self.assertEqual(cell, pyoocalc.CellRef(4, 4))
+        self.assertEqual(len({cell, pyoocalc.CellRef(4, 4)}), 1)
+        self.assertRaises(ValueError, setattr, cell, "_col", 1)
+        self.assertRaises(ValueError, pyoocalc.CellRef, -1, 0)
+
+    def test_range_ref(self):
+        rect = pyoocalc.RangeRef.from_name("B2:D4")
+        self.assertEqual(len(rect), 9)
+        self.assertIn(pyoocalc.CellRef(2, 2), rect)
+        self.assertEqual(rect.intersection(pyoocalc.RangeRef(3, 3, 9, 9)),
+                         pyoocalc.RangeRef.from_name("D4"))
+        self.assertIsNone(rect.intersection(pyoocalc.RangeRef(9, 9)))
+        self.assertEqual(rect.union(pyoocalc.RangeRef(7, 7)).name, "B2:H8")
+        self.assertEqual(rect.offset(1).name, "C2:E4")
+        cells = [(0, 0), (1, 0), (0, 1), (1, 1), (0, 3), (5, 5)]
+        rects = pyoocalc.RangeRef.cover(cells)
+        self.assertEqual(sorted(rect.name for rect in rects),
+                         ["A1:B2", "A4:A4", "F6:F6"])
+        self.assertEqual(pyoocalc.RangeRef.bounds(cells).name, "A1:F6")
+        # the same column run after a gap of rows
+        rects = pyoocalc.RangeRef.cover([(0, 0), (0, 2), (0, 99)])
+        self.assertEqual(sorted(rect.name for rect in rects),
+                         ["A100:A100", "A1:A1", "A3:A3"])
+
+###############################################################################
+
+
+class Test_PyOOCalc_SheetSnapshot(unittest.TestCase):
+
+    def test_sheet_snapshot_columns(self):
+        snapshot = pyoocalc.Snapshot()
+        sheet = snapshot._add_sheet("Sheet1", 4)
+        sheet._append_rows(((1.0, "a", "", 1.0), (2.0, "", "", "b")))
+        sheet._append_rows(((3.0, "a", "", ""),))
+        self.assertEqual(sheet.column(0), [1.0, 2.0, 3.0])
+        self.assertEqual(sheet.column(1), ["a", None, "a"])
+        self.assertEqual(sheet.column(2), [None, None, None])
+        self.assertEqual(sheet.column(3), [1.0, "b", None])
+        self.assertEqual(list(sheet.numbers(3)), [1.0, 0.0, 0.0])
+        # kind codes are kept for the mixed column only
+        self.assertEqual([kinds is not None for kinds in sheet._kinds],
+                         [False, False, False, True])
+
+###############################################################################
+
+
+class Test_PyOOCalc_Dispatcher(unittest.TestCase):
+
+    def test_dispatcher_lock_wait(self):
+        # waiting for the call of another thread is not a part of deadline
+        dispatcher = pyoocalc._Dispatcher()
+        thread = threading.Thread(target=dispatcher.call,
+                                  args=(None, None, time.sleep, 1))
+        thread.start()
+        time.sleep(0.1)
+        self.assertEqual(dispatcher.call(0.5, None, lambda: 1), 1)
+        self.assertFalse(dispatcher.quarantined)
+        thread.join()
+        dispatcher.close()
+
+    def test_dispatcher_wait_deadline(self):
+        # waiting for another thread has its own deadline, no quarantine
+        dispatcher = pyoocalc._Dispatcher()
+        thread = threading.Thread(target=dispatcher.call,
+                                  args=(None, None, time.sleep, 1))
+        thread.start()
+        time.sleep(0.1)
+        self.assertRaises(pyoocalc.DeadlineExceeded, dispatcher.call,
+                          0.5, 0.2, lambda: 1)
+        self.assertRaises(pyoocalc.DeadlineExceeded, dispatcher.call,
+                          None, 0.2, lambda: 1)
+        self.assertFalse(dispatcher.quarantined)
+        thread.join()
+        self.assertEqual(dispatcher.call(0.5, 0.2, lambda: 1), 1)
+        dispatcher.close()
+
+    def test_dispatcher_nested_deadline(self):
+        # a hanging nested call keeps its own deadline inside a call
+        # without one (e.g. a job without the "job" deadline)
+        dispatcher = pyoocalc._Dispatcher()
+        release = threading.Event()
+
+        def job():
+            return dispatcher.call(0.2, 0.2, release.wait, 5)
+
+        start = time.time()
+        self.assertRaises(pyoocalc.DeadlineExceeded, dispatcher.call,
+                          None, None, job)
+        self.assertLess(time.time() - start, 1)
+        self.assertTrue(dispatcher.quarantined)
+        release.set()
+
+        # the rest of the outer deadline bounds a looser nested call
+        dispatcher = pyoocalc._Dispatcher()
+        release.clear()
+
+        def outer():
+            return dispatcher.call(5, 5, release.wait, 5)
+
+        start = time.time()
+        self.assertRaises(pyoocalc.DeadlineExceeded, dispatcher.call,
+                          0.2, 0.2, outer)
+        self.assertLess(time.time() - start, 1)
+        self.assertTrue(dispatcher.quarantined)
+        release.set()
+
+        # nested calls within the deadlines
+        dispatcher = pyoocalc._Dispatcher()
+        self.assertEqual(dispatcher.call(
+            None, None, lambda: dispatcher.call(
+                0.5, 0.5, lambda: dispatcher.call(0.2, 0.2, abs, -1))), 1)
+        self.assertFalse(dispatcher.quarantined)
+        dispatcher.close()
+
+###############################################################################
+
+
 class Test_PyOOCalc_Document(unittest.TestCase):
 
     def setUp(self):
@@ -85,6 +216,34 @@ class Test_PyOOCalc_Document(unittest.TestCase):
         self.assertTrue(doc.open_document(file_name))
         self.assertTrue(doc.close_document())
 
+    def test_document_open_profile(self):
+        doc = pyoocalc.Document()
+        file_name = os.getcwd() + "/test.ods"
+        self.assertTrue(doc.open_document(file_name, "ingest"))
+        self.assertTrue(doc.o_doc.isReadonly())
+        self.assertFalse(doc.o_doc.getCurrentController().getFrame()
+                         .getContainerWindow().isVisible())
+        self.assertTrue(doc.close_document())
+        self.assertRaises(ValueError, doc.open_document, file_name,
+                          ("hidden", "no_such_profile"))
+
+    @pyoocalc_open_close_doc
+    def test_document_script_context(self, doc):
+        class ScriptContext:
+            def getComponentContext(self):
+                return doc._oContext
+
+            def getDesktop(self):
+                return doc._oDesktop
+
+            def getDocument(self):
+                return doc.o_doc
+        in_office_doc = pyoocalc.Document(script_context=ScriptContext())
+        self.assertTrue(in_office_doc.in_office)
+        self.assertFalse(doc.in_office)
+        self.assertEqual(in_office_doc.fields.field("HEADER").value(),
+                         "Libre office test document")
+
     @pyoocalc_open_close_doc
     def test_document_sheets(self, doc):
         self.assertFalse(doc.sheets.is_null, "get sheets object")
@@ -93,6 +252,25 @@ class Test_PyOOCalc_Document(unittest.TestCase):
     def test_document_fields(self, doc):
         self.assertFalse(doc.fields.is_null, "get fields object")
 
+    @pyoocalc_open_close_doc
+    def test_document_export_sheets(self, doc):
+        self.assertTrue(doc.sheets.insert_spreadsheet("test1", 1))
+        out_dir = tempfile.mkdtemp()
+        try:
+            result = dict(doc.export_sheets("Text - txt - csv (StarCalc)",
+                                            out_dir, workers=2))
+            self.assertEqual(sorted(result), ["Sheet1", "test1"])
+            for file_name in result.values():
+                self.assertTrue(os.path.isfile(file_name),
+                                "File does not exists")
+        finally:
+            shutil.rmtree(out_dir)
+        # arguments are checked at call time, not on the first iteration
+        self.assertRaises(ValueError, doc.export_sheets, "no_such_filter",
+                          "/tmp")
+        self.assertRaises(ValueError, doc.export_sheets, "calc8", "/tmp",
+                          workers=0)
+
 ###############################################################################
 
 
@@ -125,6 +303,30 @@ class Test_PyOOCalc_Fields(Test_PyOOCalc_Base):
         self.assertEqual(self._doc.fields.count, 11,
                          "Wrong number of fields")
 
+    def test_fields_resize_tables(self):
+        fields = self._doc.fields.resize_tables({"FIELD_1": (3, 2),
+                                                 "T2FIELD_1": 4})
+        t1_field = fields["FIELD_1"]
+        t2_field = fields["T2FIELD_1"]
+        self.assertEqual(t2_field._oCellAddress.Row,
+                         self._doc.fields.field("T2FIELD_1")._oCellAddress.Row)
+
+        self.assertTrue(t1_field.set_value("f1.3", 0, 1 + 2 * 2))
+        self.assertTrue(t2_field.set_value("t2.f1.4", 0, 4))
+        self.assertEqual(t1_field.value(0, 5), "f1.3")
+        self.assertEqual(t2_field.value(0, 4), "t2.f1.4")
+
+    def test_fields_values(self):
+        fields = self._doc.fields
+        values = fields.values()
+        self.assertEqual(len(values), 11)
+        for name in ("HEADER", "FIELD_1", "T2FIELD_4"):
+            self.assertEqual(values[name], fields.field(name).value())
+        self.assertTrue(fields.field("FIELD_1").set_value("12"))
+        self.assertEqual(fields.values(["FIELD_1"], typed=True),
+                         {"FIELD_1": "12"})
+        self.assertRaises(ValueError, fields.values, ["NO_SUCH_FIELD"])
+
 ###############################################################################
 
 
@@ -167,6 +369,27 @@ class Test_PyOOCalc_Field(Test_PyOOCalc_Base):
         check_insert_rows(t2_field, "t2.f1.1", 1)
         check_insert_rows(t1_field, "f1.1", 2)
 
+    def test_field_resize_table(self):
+        field = self._doc.fields.field("FIELD_1")
+        footprint_row = \
+            self._doc.fields.field("FOOTPRINT")._oCellAddress.Row
+
+        def footprint_offset():
+            footprint = self._doc.fields.field("FOOTPRINT")
+            return footprint._oCellAddress.Row - footprint_row
+
+        # grow from one table row to three, two sheet rows per table row
+        self.assertTrue(field.resize_table(3, step=2))
+        self.assertEqual(footprint_offset(), 4)
+
+        # shrink back to a single table row
+        self.assertTrue(field.resize_table(1, step=2, current=3))
+        self.assertEqual(footprint_offset(), 0)
+
+        # remove the table rows
+        self.assertTrue(field.resize_table(0, step=2))
+        self.assertEqual(footprint_offset(), -2)
+
 ###############################################################################
 
 
@@ -184,6 +407,29 @@ class Test_PyOOCalc_Sheets(Test_PyOOCalc_Base):
         self.assertEqual(self._doc.sheets.count, 1,
                          "Wrong number of fields")
 
+    def test_sheets_clone(self):
+        sheets = self._doc.sheets
+        copies = sheets.clone_many("Sheet1", ["Jan", "Feb"])
+        self.assertEqual(sheets.count, 3)
+        for i, sheet in enumerate(copies):
+            self.assertEqual(sheet.cell_value_by_index(0, 2), "Table 1")
+            field = sheet.fields.field("TABLE_NAME")
+            self.assertFalse(field.is_null, "get copy field object")
+            self.assertTrue(field.set_value("Month {0}".format(i)))
+        self.assertEqual(copies[1].fields.field("TABLE_NAME").value(),
+                         "Month 1")
+        self.assertEqual(self._doc.fields.field("TABLE_NAME").value(), "")
+        self.assertRaises(ValueError, sheets.clone_sheet, "Sheet1", "Jan")
+
+    def test_sheets_import_csv(self):
+        sheets = self._doc.sheets
+        sheet = sheets.import_csv(b"id;name\n007;Bond\n1;M\n", "csv",
+                                  delimiter=";", column_types={0: "text"})
+        self.assertEqual(sheets.count, 2)
+        self.assertEqual(sheet.cell_value_by_index(1, 1), "Bond")
+        self.assertEqual(sheet.cell_value_by_index(0, 1), "007")
+        self.assertRaises(ValueError, sheets.import_csv, b"a", "csv")
+
 ###############################################################################
 
 
@@ -193,7 +439,7 @@ class Test_PyOOCalc_Sheet(Test_PyOOCalc_Base):
         s_val = "value"
         n_val = 123
         f_val = 1.23
-#         formula = "=G2+G3"
+        formula = "=H2+H3"
 
         sheet = self._doc.sheets.sheet("Sheet1")
 
@@ -201,13 +447,431 @@ class Test_PyOOCalc_Sheet(Test_PyOOCalc_Base):
         self.assertTrue(sheet.set_cell_value_by_index(s_val, 7, 0))
         self.assertTrue(sheet.set_cell_value_by_index(n_val, 7, 1))
         self.assertTrue(sheet.set_cell_value_by_index(f_val, 7, 2))
-#         self.assertTrue(sheet.set_cell_value_by_index(formula, 7, 3, True))
+        self.assertTrue(sheet.set_cell_value_by_index(formula, 7, 3, True))
 
         # get values and check results
         self.assertEqual(sheet.cell_value_by_index(7, 0), s_val)
         self.assertEqual(sheet.cell_value_by_index(7, 1), n_val)
         self.assertEqual(sheet.cell_value_by_index(7, 2), f_val)
-#         self.assertEqual(sheet.set_cell_value_by_index(7, 3), formula))
+        self.assertEqual(sheet.cell_value_by_index(7, 3), formula)
+        self.assertEqual(sheet.cell_value_by_index(7, 3, "VALUE"),
+                         n_val + f_val)
+
+    def test_sheet_cell_names(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertTrue(sheet.set_cell_value_by_index(123, 7, 1))
+
+        self.assertEqual(sheet.cell("A3"), "Table 1")
+        self.assertEqual(sheet.cell("$H$2"), 123)
+        self.assertEqual(sheet.range("A3:B3"), (("Table 1", ""),))
+        self.assertEqual(sheet.get_many(["H2", "A3", "A1", (7, 1)]),
+                         [123, "Table 1", "Libre office test document", 123])
+        # scattered cells with gaps of rows
+        self.assertEqual(sheet.get_many(["A1", "A100", "A3"]),
+                         ["Libre office test document", "", "Table 1"])
+        self.assertRaises(ValueError, sheet.cell, "3A")
+
+    def test_sheet_format_range(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertTrue(sheet.format_range("H1:I2", CharWeight=150.0,
+                                           NumberFormat="#,##0.000"))
+        oCell = sheet.o_sheet.getCellByPosition(8, 1)
+        self.assertEqual(oCell.CharWeight, 150.0)
+        self.assertEqual(
+            self._doc.o_doc.getNumberFormats().getByKey(
+                oCell.NumberFormat).FormatString, "#,##0.000")
+
+        self.assertTrue(sheet.apply_style((7, 0, 8, 1), "Heading"))
+        self.assertEqual(oCell.CellStyle, "Heading")
+
+    def test_sheet_write_formulas(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self._doc.automatic_calculation = False
+        self.assertFalse(self._doc.automatic_calculation)
+        self.assertTrue(sheet.write_formulas(7, 0, [[1, 2],
+                                                    ["=H1+I1", "=H2*2"]]))
+        self.assertTrue(self._doc.recalculate())
+        self._doc.automatic_calculation = True
+
+        self.assertEqual(sheet.cell_value_by_index(7, 1), "=H1+I1")
+        self.assertEqual(sheet.cell_value_by_index(7, 1, "VALUE"), 3)
+        self.assertEqual(sheet.cell_value_by_index(8, 1, "VALUE"), 6)
+
+        # None clears the cell
+        self.assertTrue(sheet.write_formulas(7, 0, [[None, 2]]))
+        self.assertEqual(sheet.cell_value_by_index(7, 0, "STRING"), "")
+        self.assertEqual(sheet.cell_value_by_index(7, 1, "VALUE"), 2)
+
+    def test_sheet_sync(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        rows = [[1, 2, "a"], [3, 4, "b"]]
+        self.assertEqual(sheet.sync(rows, 7, 0), 6)
+        self.assertEqual(sheet.sync(rows, 7, 0), 0)
+        rows[1][1] = 5
+        self.assertEqual(sheet.sync(rows, 7, 0), 3)
+        self.assertEqual(sheet.cell_value_by_index(8, 1), 5)
+        self.assertEqual(sheet.cell_value_by_index(9, 0), "a")
+
+        # shrink the block
+        self.assertEqual(sheet.sync([[1, 2]], 7, 0), 0)
+        self.assertIsNone(sheet.cell_value_by_index(9, 0))
+        self.assertIsNone(sheet.cell_value_by_index(7, 1))
+
+    def test_sheet_sync_rows_gap(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        rows = [[1, 2], [3, 4], [5, 6]]
+        self.assertEqual(sheet.sync(rows, 7, 0), 6)
+        # changed rows with an unchanged row between them
+        rows[0][0] = 10
+        rows[2][1] = 60
+        self.assertEqual(sheet.sync(rows, 7, 0), 4)
+        self.assertEqual(sheet.cell_value_by_index(7, 0), 10)
+        self.assertEqual(sheet.cell_value_by_index(8, 2), 60)
+        self.assertEqual(sheet.sync(rows, 7, 0), 0)
+
+    def test_sheet_sync_equal_hashes(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        # hash(-1) == hash(-2)
+        self.assertEqual(sheet.sync([[1, -1]], 7, 0), 2)
+        self.assertEqual(sheet.sync([[1, -2]], 7, 0), 2)
+        self.assertEqual(sheet.cell_value_by_index(8, 0), -2)
+
+        # a string and a float with the same hash
+        text = next(text for text in ("s{0}".format(i) for i in range(10 ** 6))
+                    if abs(hash(text)) < 2 ** 53)
+        number = float(hash(text))
+        self.assertEqual(hash((number,)), hash((text,)))
+        self.assertEqual(sheet.sync([[number]], 7, 2), 1)
+        self.assertEqual(sheet.sync([[text]], 7, 2), 1)
+        self.assertEqual(sheet.cell_value_by_index(7, 2), text)
+
+    def test_sheet_sort_filter_aggregate(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        sheet.sync([["name", "qty"], ["b", 3], ["a", 1], ["c", 2]], 7, 0)
+        self.assertEqual(sheet.aggregate("I2:I4", "sum"), 6)
+        self.assertEqual(sheet.aggregate((8, 1, 8, 3), "max"), 3)
+        self.assertRaises(ValueError, sheet.aggregate, "I2:I4", "median")
+
+        self.assertTrue(sheet.sort_range("H1:I4", [(1, False)],
+                                         has_header=True))
+        self.assertEqual(sheet.range("H2:H4"), (("b",), ("c",), ("a",)))
+
+        self.assertTrue(sheet.filter_range("H1:I4", [(1, ">=", 2)],
+                                           copy_to="K1"))
+        self.assertEqual(sheet.range("K1:L3"), (("name", "qty"),
+                                                ("b", 3.0), ("c", 2.0)))
+
+###############################################################################
+
+
+class Test_PyOOCalc_Replace(Test_PyOOCalc_Base):
+
+    def test_replace_all(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertTrue(sheet.set_cell_value_by_index("${NAME}", 7, 0))
+        self.assertTrue(sheet.set_cell_value_by_index("Dear ${NAME}", 7, 1))
+
+        counts = self._doc.replace_all({"${NAME}": "John", "${NONE}": "-"})
+        self.assertEqual(counts, {"${NAME}": 2, "${NONE}": 0})
+        self.assertEqual(sheet.cell_value_by_index(7, 0), "John")
+        self.assertEqual(sheet.cell_value_by_index(7, 1), "Dear John")
+
+    def test_replace_all_bad_mapping(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertTrue(sheet.set_cell_value_by_index("${NAME}", 7, 0))
+        # nothing is replaced when a later placeholder is wrong
+        for mapping in ({"${NAME}": "John", "": "-"},
+                        {"${NAME}": "John", "${AGE}": 42}):
+            self.assertRaises(ValueError, self._doc.replace_all, mapping)
+            self.assertEqual(sheet.cell_value_by_index(7, 0), "${NAME}")
+
+###############################################################################
+
+
+class Test_PyOOCalc_Snapshot(Test_PyOOCalc_Base):
+
+    def test_snapshot(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertTrue(sheet.set_cell_value_by_index(123, 7, 1))
+
+        snapshot = self._doc.snapshot(block_cells=16)
+        self.assertEqual(snapshot.count, self._doc.sheets.count)
+        sheet_snapshot = snapshot.sheet("Sheet1")
+        self.assertEqual(sheet_snapshot.n_columns, 8)
+        self.assertEqual(sheet_snapshot.value(0, 0),
+                         "Libre office test document")
+        self.assertEqual(sheet_snapshot.value(7, 1), 123)
+        self.assertIsNone(sheet_snapshot.value(7, 0))
+        self.assertEqual(sheet_snapshot.row(1)[7], 123)
+        self.assertEqual(len(sheet_snapshot.column(0)),
+                         sheet_snapshot.n_rows)
+
+###############################################################################
+
+
+class Test_PyOOCalc_Threads(Test_PyOOCalc_Base):
+
+    def test_shared_document(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        field = self._doc.fields.field("FIELD_1")
+        address = field._oCellAddress.Row
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            values = list(executor.map(
+                lambda i: (field.value(), sheet.cell_value_by_index(0, 2)),
+                range(16)))
+        self.assertEqual(values, [("Field 1", "Table 1")] * 16)
+        self.assertTrue(field.insert_rows(2))
+        self.assertEqual(field._oCellAddress.Row, address)
+
+    def test_shared_document_sheets(self):
+        # sheets are inserted and removed while other threads read
+        self._doc.deadlines = {"default": 30}
+        sheets = self._doc.sheets
+        sheet = sheets.sheet("Sheet1")
+        count = sheets.count
+
+        def change(i):
+            name = "Thread {0}".format(i)
+            sheets.insert_spreadsheet(name, sheets.count)
+            sheets.sheet(name).fields.count
+            return sheets.remove_spreadsheet(name)
+
+        def read(i):
+            return (sheet.cell_value_by_index(0, 2), sheets.count >= count,
+                    self._doc.fields.count > 0)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            changes = [executor.submit(change, i) for i in range(8)]
+            reads = [executor.submit(read, i) for i in range(16)]
+            self.assertEqual([future.result() for future in changes],
+                             [True] * 8)
+            self.assertEqual([future.result() for future in reads],
+                             [("Table 1", True, True)] * 16)
+        self.assertEqual(sheets.count, count)
+
+    def test_replica(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertTrue(sheet.set_cell_value_by_index("changed", 7, 0))
+        replica = self._doc.replica()
+        temp_dir = replica._temp_dir
+        try:
+            # the copy of the modified document is kept while it is open
+            self.assertTrue(os.path.isdir(temp_dir))
+            self.assertEqual(
+                replica.sheets.sheet("Sheet1").cell_value_by_index(7, 0),
+                "changed")
+        finally:
+            replica.close_document()
+        self.assertFalse(os.path.exists(temp_dir))
+
+###############################################################################
+
+
+class Test_PyOOCalc_Session(unittest.TestCase):
+
+    def setUp(self):
+        self._session = pyoocalc.Session(max_documents=2)
+
+    def tearDown(self):
+        self._session.close_all()
+        del self._session
+
+    def test_session_open_close(self):
+        file_name = os.getcwd() + "/test.ods"
+        doc = self._session.open_document(file_name)
+        self.assertIs(self._session.open_document(file_name), doc)
+        self.assertEqual(self._session.count, 1)
+        self.assertTrue(self._session.close_document(doc))
+        self.assertEqual(self._session.count, 0)
+
+    def test_session_lru(self):
+        first = self._session.new_document()
+        self._session.new_document()
+        self._session.new_document()
+        self.assertEqual(self._session.count, 2)
+        self.assertNotIn(first, self._session.documents)
+        self.assertIsNone(first.o_doc)
+
+    def test_session_copy(self):
+        src = self._session.open_document(os.getcwd() + "/test.ods")
+        dst = self._session.new_document()
+        sheet = self._session.copy_sheet(src, "Sheet1", dst, "Copy")
+        self.assertEqual(sheet.cell_value_by_index(0, 2), "Table 1")
+
+        dst_sheet = dst.sheets.sheet(0)
+        self.assertTrue(self._session.copy_range(
+            src.sheets.sheet("Sheet1"), (0, 0, 1, 2), dst_sheet, 3, 3))
+        self.assertEqual(dst_sheet.cell_value_by_index(3, 5), "Table 1")
+
+###############################################################################
+
+
+class Test_PyOOCalc_Supervisor(unittest.TestCase):
+    """
+    The supervisor starts its own office listening on port 2003.
+    """
+
+    def setUp(self):
+        office = pyoocalc.Office(
+            office='soffice --headless --norestore --nologo --nodefault '
+                   '--accept="socket,host=localhost,port=2003;urp;"',
+            connection_string="uno:socket,host=localhost,port=2003;urp;"
+                              "StarOffice.ComponentContext")
+        self._supervisor = pyoocalc.Supervisor(office)
+        self._out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self._supervisor.stop()
+        shutil.rmtree(self._out_dir)
+
+    def test_supervisor_recover(self):
+        file_name = os.getcwd() + "/test.ods"
+        out_name = os.path.join(self._out_dir, "test.pdf")
+        self.assertTrue(self._supervisor.convert(file_name, out_name,
+                                                 "calc_pdf_Export"))
+
+        # crash the office
+        os.killpg(self._supervisor.office.pid, signal.SIGKILL)
+
+        out_name = os.path.join(self._out_dir, "test_saved.ods")
+        self.assertTrue(self._supervisor.render(
+            file_name, {"TABLE_NAME": "Test table name"}, out_name))
+        self.assertTrue(os.path.isfile(out_name), "File does not exists")
+        metrics = self._supervisor.metrics
+        self.assertEqual(metrics["jobs"], 2)
+        self.assertEqual(metrics["restarts"], 1)
+        self.assertEqual(metrics["failures"], 0)
+        # the retried job is counted by the recycling policy once
+        self.assertEqual(self._supervisor._documents, 1)
+
+    def test_supervisor_recycle(self):
+        office = self._supervisor.office
+        self._supervisor = pyoocalc.Supervisor(
+            office, policy=pyoocalc.RecyclePolicy(max_documents=2))
+        file_name = os.getcwd() + "/test.ods"
+        out_name = os.path.join(self._out_dir, "test.pdf")
+        for i in range(3):
+            self.assertTrue(self._supervisor.convert(file_name, out_name,
+                                                     "calc_pdf_Export"))
+            self.assertGreater(office.rss, 0)
+        self.assertEqual(self._supervisor.metrics["recycles"], 1)
+
+###############################################################################
+
+
+class Test_PyOOCalc_Deadlines(unittest.TestCase):
+    """
+    The test starts its own office listening on port 2003 and suspends it.
+    """
+
+    def setUp(self):
+        self._office = pyoocalc.Office(
+            office='soffice --headless --norestore --nologo --nodefault '
+                   '--accept="socket,host=localhost,port=2003;urp;"',
+            connection_string="uno:socket,host=localhost,port=2003;urp;"
+                              "StarOffice.ComponentContext")
+        self._office.start()
+
+    def tearDown(self):
+        os.killpg(self._office.pid, signal.SIGCONT)
+        self._office.stop()
+
+    def test_deadline_exceeded(self):
+        doc = pyoocalc.Document(
+            connection_string=self._office.connection_string,
+            deadlines={"default": 10, "cell": 1})
+        doc.open_document(os.getcwd() + "/test.ods")
+        sheet = doc.sheets.sheet(0)
+        self.assertEqual(sheet.cell_value_by_index(0, 2), "Table 1")
+        worker = doc._dispatcher._thread
+
+        # hang the office
+        os.killpg(self._office.pid, signal.SIGSTOP)
+        start = time.time()
+        self.assertRaises(pyoocalc.DeadlineExceeded,
+                          sheet.cell_value_by_index, 0, 2)
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(doc.quarantined)
+        self.assertRaises(pyoocalc.DeadlineExceeded, doc.close_document)
+
+        # the released worker thread exits
+        os.killpg(self._office.pid, signal.SIGCONT)
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+
+    def test_deadline_nested_call(self):
+        # cell calls of a job without the "job" deadline
+        doc = pyoocalc.Document(
+            connection_string=self._office.connection_string,
+            deadlines={"cell": 1})
+        doc.open_document(os.getcwd() + "/test.ods")
+        sheet = doc.sheets.sheet(0)
+
+        def job():
+            os.killpg(self._office.pid, signal.SIGSTOP)
+            return sheet.cell_value_by_index(0, 2)
+
+        start = time.time()
+        self.assertRaises(pyoocalc.DeadlineExceeded, doc._call, "job", job)
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(doc.quarantined)
+
+    def test_deadline_worker_stop(self):
+        doc = pyoocalc.Document(
+            connection_string=self._office.connection_string,
+            deadlines={"default": 10})
+        doc.open_document(os.getcwd() + "/test.ods")
+        worker = doc._dispatcher._thread
+        self.assertTrue(worker.is_alive())
+        self.assertTrue(doc.close_document())
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+
+    def test_deadline_wrong_operation(self):
+        self.assertRaises(ValueError, pyoocalc.Document,
+                          connection_string=self._office.connection_string,
+                          deadlines={"no_such_operation": 1})
+
+###############################################################################
+
+
+class Test_PyOOCalc_Reports(unittest.TestCase):
+
+    def setUp(self):
+        self._out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._out_dir)
+
+    def test_generate_reports(self):
+        rows = ({"TABLE_NAME": "Table {0}".format(i),
+                 ("FIELD_1", 0, 1): i} for i in range(4))
+        stats = pyoocalc.generate_reports(
+            os.getcwd() + "/test.ods", rows,
+            os.path.join(self._out_dir, "{index}-{TABLE_NAME}.ods"),
+            workers=2)
+        self.assertEqual(stats.documents, 4)
+        self.assertGreater(stats.documents_per_second, 0)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self._out_dir, "3-Table 3.ods")))
+
+    def test_generate_reports_failures(self):
+        # the second row fails after filling TABLE_NAME
+        rows = [{"TABLE_NAME": "Table 0"},
+                OrderedDict([("TABLE_NAME", "Table 1"), ("NO_SUCH_FIELD", 1)]),
+                {("FIELD_1", 0, 1): 2}]
+        stats = pyoocalc.generate_reports(
+            os.getcwd() + "/test.ods", rows,
+            os.path.join(self._out_dir, "{index}.ods"))
+        self.assertEqual(stats.documents, 2)
+        self.assertEqual(stats.failures, 1)
+        self.assertEqual(stats.errors[0][0], 1)
+        self.assertIsInstance(stats.errors[0][1], ValueError)
+        self.assertFalse(os.path.exists(
+            os.path.join(self._out_dir, "1.ods")))
+        # the template is restored after the failed row
+        doc = pyoocalc_ods.Document(os.path.join(self._out_dir, "2.ods"))
+        self.assertEqual(doc.fields.field("TABLE_NAME").value(), "")
 
 ###############################################################################
 
@@ -0,0 +1,222 @@
+# coding: utf-8
+
+"""
+PyOOCalc ODS - Office-free OpenDocument Spreadsheet (.ods) access
+
+Tests do not require a running Libre/Open Office.
+
+Copyright (c) 2015
+
+@author: Yurii Puchkov
+@organization: http://arilot.com/
+@license: GPL v3
+@contact: panpuchkov@gmail.com
+"""
+
+import unittest
+
+###############################################################################
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.append('./../')
+import pyoocalc_ods
+
+###############################################################################
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_FILE = os.path.join(TEST_DIR, "test.ods")
+
+###############################################################################
+
+
+class Test_PyOOCalcOds_Base(unittest.TestCase):
+    """
+    Setup base class for future tests.
+    It opens the 'ods' document for testing.
+    """
+    def setUp(self):
+        self._doc = pyoocalc_ods.Document(TEST_FILE)
+
+###############################################################################
+
+
+class Test_PyOOCalcOds_Document(Test_PyOOCalcOds_Base):
+
+    def test_document_sheets(self):
+        self.assertFalse(self._doc.sheets.is_null, "get sheets object")
+        self.assertEqual(self._doc.sheets.count, 1)
+        self.assertEqual(self._doc.sheets.names, ["Sheet1"])
+
+    def test_document_fields(self):
+        self.assertFalse(self._doc.fields.is_null, "get fields object")
+        self.assertEqual(self._doc.fields.count, 11,
+                         "Wrong number of fields")
+
+###############################################################################
+
+
+class Test_PyOOCalcOds_Field(Test_PyOOCalcOds_Base):
+
+    def test_field_value(self):
+        field = self._doc.fields.field("HEADER")
+        self.assertFalse(field.is_null, "get field object")
+        self.assertEqual(field.value(), "Libre office test document")
+        self.assertEqual(self._doc.fields.field("FIELD_1").value(1, 0),
+                         "Field 2")
+
+    def test_field_null(self):
+        self.assertTrue(self._doc.fields.field("NO_SUCH_FIELD").is_null)
+
+###############################################################################
+
+
+class Test_PyOOCalcOds_Sheet(Test_PyOOCalcOds_Base):
+
+    def test_sheet_cell_value_by_index(self):
+        sheet = self._doc.sheets.sheet("Sheet1")
+        self.assertEqual(sheet.cell_value_by_index(0, 2), "Table 1")
+        self.assertEqual(sheet.cell_value_by_index(0, 6),
+                         '=CONCATENATE("- "; A6)')
+        self.assertEqual(sheet.cell_value_by_index(0, 6, "STRING"), "- ")
+        self.assertIsNone(sheet.cell_value_by_index(3, 1))
+        # inside of the repeated rows and after the last row
+        self.assertIsNone(sheet.cell_value_by_index(0, 8))
+        self.assertIsNone(sheet.cell_value_by_index(0, 10000))
+
+    def test_sheet_rows(self):
+        rows = list(self._doc.sheets.sheet(0).rows("STRING"))
+        self.assertEqual(len(rows), 18)
+        self.assertEqual(rows[4], ("Field 1", "Field 2", "Field 3", "",
+                                   "Field 4"))
+
+###############################################################################
+
+
+class Test_PyOOCalcOds_Template(unittest.TestCase):
+
+    def setUp(self):
+        handle, self._file_name = tempfile.mkstemp(suffix=".ods")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self._file_name)
+
+    def test_template_fill(self):
+        template = pyoocalc_ods.Template(TEST_FILE)
+        self.assertEqual(len(template.fields), 11)
+        self.assertTrue(template.fill(self._file_name, {
+            "TABLE_NAME": "Test table name",
+            ("FIELD_1", 0, 1): "f1.1",
+            # repeated empty rows below the first table
+            ("FIELD_1", 0, 4): 123,
+            # below the last row of the sheet
+            ("T2FIELD_1", 1, 5): "t2.f2.5"}))
+
+        doc = pyoocalc_ods.Document(self._file_name)
+        fields = doc.fields
+        self.assertEqual(fields.field("TABLE_NAME").value(),
+                         "Test table name")
+        self.assertEqual(fields.field("FIELD_1").value(0, 1), "f1.1")
+        self.assertEqual(fields.field("FIELD_1").value(0, 4), "123")
+        self.assertEqual(fields.field("T2FIELD_1").value(1, 5), "t2.f2.5")
+        sheet = doc.sheets.sheet("Sheet1")
+        self.assertEqual(sheet.cell_value_by_index(0, 8), 123)
+        # untouched cells
+        self.assertEqual(sheet.cell_value_by_index(0, 2), "Table 1")
+        self.assertIsNone(sheet.cell_value_by_index(0, 7 + 2))
+
+    def test_template_fill_formula_results(self):
+        pyoocalc_ods.fill_template(TEST_FILE, self._file_name,
+                                   {("FIELD_1", 0, 1): "f1.1"})
+        with zipfile.ZipFile(self._file_name) as package:
+            root = ElementTree.fromstring(package.read("content.xml"))
+        cells = [cell for cell in root.iter(pyoocalc_ods._TAG_CELL)
+                 if cell.get(pyoocalc_ods._ATTR_FORMULA)]
+        self.assertTrue(cells)
+        for cell in cells:
+            # the office recalculates formulas without cached results
+            self.assertIsNone(cell.get(pyoocalc_ods._ATTR_VALUE_TYPE))
+            self.assertIsNone(cell.get(pyoocalc_ods._NS_OFFICE +
+                                       "string-value"))
+        sheet = pyoocalc_ods.Document(self._file_name).sheets.sheet(0)
+        self.assertEqual(sheet.cell_value_by_index(0, 6),
+                         '=CONCATENATE("- "; A6)')
+
+    def test_template_fill_named_expressions(self):
+        # sheet local named expressions follow the rows of the table
+        template_name = self._file_name + ".ods"
+        with zipfile.ZipFile(TEST_FILE) as source, \
+                zipfile.ZipFile(template_name, "w") as target:
+            for info in source.infolist():
+                content = source.read(info)
+                if "content.xml" == info.filename:
+                    content = content.replace(
+                        b"</table:table>",
+                        b"<table:named-expressions><table:named-range "
+                        b'table:name="LOCAL" '
+                        b'table:cell-range-address="$Sheet1.$A$1"/>'
+                        b"</table:named-expressions></table:table>")
+                target.writestr(info, content)
+        try:
+            pyoocalc_ods.fill_template(template_name, self._file_name, {
+                ("T2FIELD_1", 0, 5): "t2.f1.5"})
+        finally:
+            os.remove(template_name)
+
+        with zipfile.ZipFile(self._file_name) as package:
+            root = ElementTree.fromstring(package.read("content.xml"))
+        table = root.find(".//" + pyoocalc_ods._TAG_TABLE)
+        self.assertEqual(table[-1].tag,
+                         pyoocalc_ods._NS_TABLE + "named-expressions")
+        self.assertEqual(table[-2].tag, pyoocalc_ods._TAG_ROW)
+        doc = pyoocalc_ods.Document(self._file_name)
+        self.assertEqual(doc.fields.field("T2FIELD_1").value(0, 5),
+                         "t2.f1.5")
+
+    def test_template_unknown_field(self):
+        template = pyoocalc_ods.Template(TEST_FILE)
+        self.assertRaises(ValueError, template.fill, self._file_name,
+                          {"NO_SUCH_FIELD": 1})
+
+###############################################################################
+
+
+class Test_PyOOCalcOds_FieldIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._cache_dir)
+
+    def test_field_index(self):
+        index = pyoocalc_ods.FieldIndex(TEST_FILE, self._cache_dir)
+        self.assertFalse(index.cached)
+        self.assertEqual(len(index.names), 11)
+        self.assertEqual(index.field("HEADER")["sheet"], "Sheet1")
+        self.assertIsNone(index.field("NO_SUCH_FIELD"))
+        self.assertEqual(index.tables[0]["fields"][0], "FIELD_1")
+
+        cached = pyoocalc_ods.FieldIndex(TEST_FILE, self._cache_dir)
+        self.assertTrue(cached.cached)
+        self.assertEqual(cached.hash, index.hash)
+        self.assertEqual(cached.tables, index.tables)
+        self.assertEqual(cached.cell("FIELD_1", 1, 2),
+                         index.cell("FIELD_1", 1, 2))
+
+    def test_field_index_validate(self):
+        index = pyoocalc_ods.FieldIndex(TEST_FILE, self._cache_dir)
+        self.assertEqual(index.validate({"HEADER": 1,
+                                         ("FIELD_1", 0, 1): 2}), [])
+        self.assertEqual(len(index.validate({"NO_SUCH_FIELD": 1,
+                                             ("FIELD_1", -1, 0): 2})), 2)
+
+###############################################################################
+
+
+if __name__ == "__main__":
+    unittest.main()